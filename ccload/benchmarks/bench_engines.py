@@ -0,0 +1,74 @@
+"""Benchmark the aiohttp engine against the raw engine on a local server.
+
+The server runs in its own process and answers every request with a fixed
+small response, so the numbers reflect the client-side cost per request.
+
+Usage:
+    python benchmarks/bench_engines.py -n 50000 -c 50 --pipeline 1 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+from multiprocessing.queues import Queue
+
+from ccload.core.load_tester_features import load_tester
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok"
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer every GET request received on a connection."""
+    buffer = b""
+    while data := await reader.read(65536):
+        buffer += data
+        count = buffer.count(b"\r\n\r\n")
+        if count:
+            buffer = buffer[buffer.rfind(b"\r\n\r\n") + 4:]
+            writer.write(RESPONSE * count)
+    writer.close()
+
+
+def _serve(ports: Queue) -> None:
+    """Run the benchmark server until the process is terminated."""
+    async def serve() -> None:
+        server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+        ports.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=50_000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--pipeline", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    server = context.Process(target=_serve, args=(ports,), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{ports.get()}/"
+
+    runs = [("aiohttp", 1)] + [("raw", depth) for depth in args.pipeline]
+    print(f"n={args.number} c={args.concurrency}")
+    try:
+        for engine, pipeline in runs:
+            stats = asyncio.run(load_tester(
+                url, args.number, args.concurrency,
+                engine=engine, pipeline=pipeline,
+            ))
+            print(
+                f" {engine:<8} pipeline={pipeline:<3}"
+                f" {stats['requests_per_second']:10.0f} req/s"
+                f"  p99 {stats['request_time_p99'] * 1000:7.2f} ms"
+                f"  failed {stats['failed_requests']}",
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark the worker-pool scheduler against the gather-based scheduler.
+
+Both schedulers drive an in-process fake session so that the numbers reflect
+scheduling overhead only, not network or server time.
+
+Usage:
+    python benchmarks/bench_scheduler.py -n 200000 -c 100
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import types
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+
+from ccload.core.load_tester_features import (
+    _calculate_statistics,
+    load_tester,
+    read_url,
+)
+
+
+class _FakeResponse:
+    """Minimal stand-in for an aiohttp response."""
+
+    status = 200
+
+    def __init__(self) -> None:
+        self.content = self
+
+    async def __aenter__(self) -> "_FakeResponse":
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_typ: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: types.TracebackType | None,
+    ) -> None:
+        return
+
+    async def read(self, _n: int = -1) -> bytes:
+        return b"ok"
+
+
+class _FakeSession:
+    """Minimal stand-in for aiohttp.ClientSession."""
+
+    def __init__(self, *_args: Any, **_kwargs: Any) -> None:  # noqa: ANN401
+        pass
+
+    async def __aenter__(self) -> "_FakeSession":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_typ: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: types.TracebackType | None,
+    ) -> None:
+        return
+
+    def request(self, *_args: Any, **_kwargs: Any) -> _FakeResponse:  # noqa: ANN401
+        return _FakeResponse()
+
+
+async def _gather_load_tester(
+    url: str, n_request: int, n_concurrency: int,
+) -> dict[str, Any]:
+    """Schedule one coroutine per request, as ccload did before the pool."""
+    connector = aiohttp.TCPConnector(limit=n_concurrency)
+    start_time = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [read_url(url=url, session=session) for _ in range(n_request)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    total_time = time.perf_counter() - start_time
+    return _calculate_statistics(results, total_time)
+
+
+def _measure(name: str, n_request: int, n_concurrency: int) -> None:
+    runner = {"gather": _gather_load_tester, "pool": load_tester}[name]
+    tracemalloc.start()
+    start = time.perf_counter()
+    with (
+        patch("aiohttp.ClientSession", _FakeSession),
+        patch("aiohttp.TCPConnector"),
+    ):
+        asyncio.run(runner("http://bench.invalid", n_request, n_concurrency))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>6}: {elapsed:8.3f} s  {n_request / elapsed:12.0f} req/s  "
+        f"peak {peak / 2**20:9.2f} MiB",
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=200_000)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"n_request={args.number} n_concurrency={args.concurrency}")
+    for name in ("gather", "pool"):
+        _measure(name, args.number, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark the statistics phase over dict results and over a SampleBuffer.
+
+Usage:
+    python benchmarks/bench_statistics.py -n 1000000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any
+
+from ccload.core.load_tester_features import _calculate_statistics
+from ccload.core.samples import SampleBuffer
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)  # noqa: S311
+    results: list[dict[str, Any] | Exception] = []
+    buffer = SampleBuffer()
+    for _ in range(args.number):
+        ttfb = rng.lognormvariate(-5, 0.5)
+        result = {
+            "status": 200,
+            "ttfb": ttfb,
+            "ttlb": ttfb * 1.5,
+            "request_time": ttfb * 1.6,
+        }
+        results.append(result)
+        buffer.record(result)
+
+    dict_bytes = sys.getsizeof(results[0]) + sum(
+        sys.getsizeof(value) for value in results[0].values()
+    )
+    print(f"n={args.number}")
+    print(f" dict results: ~{dict_bytes} bytes/sample")
+    print(f" SampleBuffer: {buffer.nbytes / args.number:.0f} bytes/sample")
+
+    start = time.perf_counter()
+    _calculate_statistics(results, 1.0)
+    print(f" _calculate_statistics: {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    buffer.summary(1.0)
+    print(f" SampleBuffer.summary:  {time.perf_counter() - start:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,73 @@
 """ccload - A simple load tester for HTTP servers."""
 import argparse
-import asyncio
 import json
-import shutil
-import subprocess
-import time
-from collections.abc import Callable
-from typing import Any
-
-from ccload.core.load_tester_features import _display_results, load_tester
+import os
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from ccload.core import event_loop
+from ccload.core.compare import (
+    DEFAULT_ALPHA,
+    DEFAULT_THRESHOLDS,
+    Threshold,
+    compare_runs,
+    distribution_shift,
+    format_comparison,
+    load_run,
+)
+from ccload.core.feed import RequestFeed
+from ccload.core.load_tester_features import (
+    DEFAULT_GRACE_PERIOD,
+    ENGINES,
+    _display_results,
+    load_tester,
+)
+from ccload.core.multiprocess import run_multiprocess_load_test
+from ccload.core.profile import LoadProfile
+from ccload.core.replay import FORMATS, ReplayIndex, replay_tester
+from ccload.core.sample_log import SampleLog, SampleLogReader
+from ccload.core.samples import SampleBuffer
+from ccload.core.scheduler import ArrivalSchedule
+from ccload.core.timeseries import IntervalListener, LiveLine, print_ndjson
+from ccload.core.url_mix import UrlMix
 from ccload.distributed.distributed_load_test import run_distributed_load_test
+from ccload.distributed.worker_manager import WorkerPool, workers_down, workers_up
+from ccload.exporters.influxdb import InfluxWriter, profile_stages
 from ccload.exporters.metric_exporter import export_metrics
+from ccload.exporters.parquet import (
+    PARQUET_AVAILABLE,
+    ParquetSampleLog,
+    ParquetTimeseries,
+    sample_log_to_parquet,
+)
+from ccload.exporters.prometheus import LiveMetrics, serve_metrics
 from ccload.script.request_script import script_load_tester
 
+DEFAULT_REQUESTS = 10
+
+T = TypeVar("T")
+
 
-def _handle_result(
+def _handle_result(  # noqa: PLR0913
     results: dict[str, Any],
     name: str | None,
     export: str | None,
     output: str | None,
+    *,
+    ndjson: bool = False,
+    exported: bool = False,
 ) -> None:
-    _display_results(results, name)
-    if export and output:
-        export_metrics(results, export, output)
+    if ndjson:
+        summary = {key: value for key, value in results.items() if key != "timeseries"}
+        print(json.dumps({"type": "summary", "name": name, **summary}))
+    else:
+        _display_results(results, name)
+    if export and output and exported:
+        print(f"Metrics exported to {output} in {export} format")
+    elif export and output:
+        export_metrics(results, export, output, name)
 
 def _create_argument_parser() -> argparse.ArgumentParser:
     """Create and configure the argument parser."""
@@ -43,10 +88,44 @@ def _create_argument_parser() -> argparse.ArgumentParser:
     url_group.add_argument(
         "-f",
         "--file",
-        help="File containing URLs to test (one per line)",
+        help="File containing URLs to test, one 'url [weight]' per line; "
+        "every request goes to a URL drawn by weight",
         type=argparse.FileType("r"),
         default=None,
     )
+    url_group.add_argument(
+        "--feed",
+        help="JSONL file streamed one request per line (url, method, headers, "
+        "json or body), for as long as the file or the budget lasts",
+        type=str,
+        default=None,
+    )
+    url_group.add_argument(
+        "--feed-loop",
+        help="Start the --feed file over when it ends; needs --number or "
+        "--duration",
+        action="store_true",
+    )
+    url_group.add_argument(
+        "--replay",
+        help="Traffic log replayed with its original timing: JSONL requests "
+        "with a timestamp, or an access log of paths under the URL",
+        type=str,
+        default=None,
+    )
+    url_group.add_argument(
+        "--replay-format",
+        help="Format of the --replay log (default: guessed from its first line)",
+        choices=FORMATS,
+        default=None,
+    )
+    url_group.add_argument(
+        "--speedup",
+        help="Factor compressing (above 1) or stretching (below 1) the timeline "
+        "of the --replay log (default: 1)",
+        type=float,
+        default=1.0,
+    )
     url_group.add_argument(
         "-s",
         "--script",
@@ -77,7 +156,12 @@ def _create_argument_parser() -> argparse.ArgumentParser:
     )
 
     parser.add_argument(
-        "-n", "--number", help="Number of requests to make", type=int, default=10,
+        "-n",
+        "--number",
+        help=f"Number of requests to make (default: {DEFAULT_REQUESTS}, "
+        "or no limit with --duration, --stages or --feed)",
+        type=int,
+        default=None,
     )
     parser.add_argument(
         "-c",
@@ -87,11 +171,103 @@ def _create_argument_parser() -> argparse.ArgumentParser:
         default=1,
     )
 
+    parser.add_argument(
+        "-d",
+        "--duration",
+        help="Run for this many seconds instead of a fixed number of requests",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--grace-period",
+        help="Seconds to let in-flight requests finish after --duration ends "
+        f"before cancelling them (default: {DEFAULT_GRACE_PERIOD})",
+        type=float,
+        default=DEFAULT_GRACE_PERIOD,
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        help="Run open-loop at this many requests per second, measuring "
+        "latency from each request's intended send time",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--arrival",
+        help="Spacing of open-loop request start times (default: constant)",
+        choices=ArrivalSchedule.DISTRIBUTIONS,
+        default="constant",
+    )
+    parser.add_argument(
+        "--stages",
+        help="Load profile as comma-separated shape:duration[:target] stages, "
+        "with shapes ramp, hold, step and spike (e.g. ramp:30:100,hold:60)",
+        type=LoadProfile.parse,
+        default=None,
+    )
+    parser.add_argument(
+        "--stage-target",
+        help="What the --stages levels set (default: concurrency)",
+        choices=["concurrency", "rate"],
+        default="concurrency",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        help="Number of load generator processes to split the test across",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--loop",
+        help="Event loop running the load generator (default: asyncio)",
+        choices=list(event_loop.LOOP_FACTORIES),
+        default="asyncio",
+    )
+    parser.add_argument(
+        "--engine",
+        help="HTTP client engine; raw trades features for lower overhead "
+        "(default: aiohttp)",
+        choices=list(ENGINES),
+        default="aiohttp",
+    )
+    parser.add_argument(
+        "--pipeline",
+        help="HTTP/1.1 pipelining depth per connection (raw engine only)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--ndjson",
+        help="Stream one JSON line per second on stdout, then the results as "
+        "a final JSON line, instead of the console report",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--raw-samples",
+        help="Keep every raw sample in memory and report exact statistics",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--sample-log",
+        help="Append every raw sample to this binary log during the run, to "
+        "read back with 'ccload samples'",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--compress-samples",
+        help="Compress the chunks of the --sample-log with zlib",
+        action="store_true",
+    )
+
     export_group = parser.add_argument_group("Export Options")
     export_group.add_argument(
         "--export",
-        help="Export metrics in specified format (json, csv, prometheus, influxdb)",
-        choices=["json", "csv", "prometheus", "influxdb"],
+        help="Export metrics in specified format (json, csv, prometheus, influxdb, "
+        "parquet)",
+        choices=["json", "csv", "prometheus", "influxdb", "parquet"],
         default=None,
     )
     export_group.add_argument(
@@ -100,6 +276,21 @@ def _create_argument_parser() -> argparse.ArgumentParser:
         type=str,
         default=None,
     )
+    export_group.add_argument(
+        "--metrics-port",
+        help="Serve live Prometheus metrics on this port at /metrics while "
+        "the test runs",
+        type=int,
+        default=None,
+    )
+    export_group.add_argument(
+        "--influxdb-url",
+        help="Push the time series to this InfluxDB write endpoint while the "
+        "test runs, e.g. http://localhost:8086/api/v2/write?org=o&bucket=b "
+        "(token from $INFLUX_TOKEN)",
+        type=str,
+        default=None,
+    )
 
     distribution_group = parser.add_argument_group("Distributed Options")
     distribution_group.add_argument(
@@ -109,9 +300,10 @@ def _create_argument_parser() -> argparse.ArgumentParser:
     )
     distribution_group.add_argument(
         "--distributed-workers",
-        help="Number of distributed workers to use",
+        help="Number of local workers to spawn for the run (default: the warm "
+        "pool of 'ccload workers up' if running, else 1)",
         type=int,
-        default=1,
+        default=None,
     )
     distribution_group.add_argument(
         "--workers",
@@ -123,7 +315,7 @@ def _create_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def _process_request_data(
+def _process_request_data(  # noqa: PLR0911
     args: argparse.Namespace,
     parser: argparse.ArgumentParser,
 ) -> tuple[str, dict[str, str] | None, dict[str, Any] | None] | None:
@@ -152,13 +344,21 @@ def _process_request_data(
             notify_format_error("JSON data must be valid JSON")
             return None
 
-    # Check for mutually exclusive options
-    input_count = sum(1 for x in [url, args.file, args.script] if x is not None)
+    # Check for mutually exclusive options; the URL of a replay is the base
+    # URL of the paths of an access log
+    if args.replay is not None:
+        if args.file is not None or args.script is not None or args.feed is not None:
+            notify_format_error("--replay cannot be used with a file, script, or feed.")
+            return None
+        return url, headers, json_data
+    input_count = sum(
+        1 for x in [url, args.file, args.script, args.feed] if x is not None
+    )
     if input_count == 0:
-        notify_format_error("URL, file, or script must be provided.")
+        notify_format_error("URL, file, script, or feed must be provided.")
         return None
     if input_count > 1:
-        notify_format_error("Only one of URL, file, or script can be provided.")
+        notify_format_error("Only one of URL, file, script, or feed can be provided.")
         return None
 
     return url, headers, json_data
@@ -167,9 +367,128 @@ def _process_request_data(
 def _run_script_test(args: argparse.Namespace) -> None:
     """Run tests from a script file."""
     print(f"Running script test from: {args.script}")
-    results = asyncio.run(script_load_tester(args.script))
+    results = event_loop.run(script_load_tester(args.script), args.loop)
     for url, result in results.items():
-        _handle_result(result, url, args.export, args.output)
+        _handle_result(result, url, args.export, args.output, ndjson=args.ndjson)
+
+
+def _interval_listener(
+    args: argparse.Namespace,
+    live: LiveLine | None,
+    *outputs: IntervalListener | None,
+) -> IntervalListener | None:
+    """Return the listener handing every interval to the outputs of a run."""
+    listeners = [
+        listener for listener in (print_ndjson if args.ndjson else live, *outputs)
+        if listener is not None
+    ]
+    if not listeners:
+        return None
+
+    def on_interval(point: dict[str, Any]) -> None:
+        for listener in listeners:
+            listener(point)
+
+    return on_interval
+
+
+async def _serving_metrics(
+    args: argparse.Namespace, metrics: LiveMetrics | None, run: Awaitable[T],
+) -> T:
+    """Await a run while serving its live metrics on ``--metrics-port``."""
+    if metrics is None:
+        return await run
+    async with serve_metrics(metrics, args.metrics_port) as url:
+        print(f"Serving live metrics on {url}", file=sys.stderr)
+        return await run
+
+
+def _open_influx_writer(
+    args: argparse.Namespace, tags: dict[str, str], stages: list[dict[str, Any]],
+) -> InfluxWriter | None:
+    """Start pushing the time series of a run to ``--influxdb-url``, if any."""
+    if args.influxdb_url is None:
+        return None
+    return InfluxWriter(
+        args.influxdb_url, tags=tags, stages=stages,
+        token=os.environ.get("INFLUX_TOKEN"),
+    )
+
+
+def _close_influx_writer(writer: InfluxWriter | None) -> None:
+    """Send the lines still buffered by an InfluxDB writer and report them."""
+    if writer is None:
+        return
+    writer.close()
+    print(f"Wrote {writer.written} points to InfluxDB", file=sys.stderr)
+    if writer.dropped:
+        print(
+            f"Dropped {writer.dropped} points InfluxDB did not accept",
+            file=sys.stderr,
+        )
+
+
+def _open_parquet_timeseries(args: argparse.Namespace) -> ParquetTimeseries | None:
+    """Start writing the time series of a run to its Parquet export, if any."""
+    return ParquetTimeseries(args.output) if _parquet_streamed(args) else None
+
+
+def _close_sample_log(sample_log: SampleLog | None) -> None:
+    """Close the sample log of a run, exiting with an error if writing it failed."""
+    if sample_log is None:
+        return
+    try:
+        sample_log.close()
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _run_replay_test(
+    url: str | None,
+    args: argparse.Namespace,
+    headers: dict | None,
+    json_data: dict | None,
+) -> None:
+    """Replay the traffic log of ``--replay`` with its original timing."""
+    live = LiveLine() if sys.stderr.isatty() and not args.ndjson else None
+    metrics = LiveMetrics() if args.metrics_port is not None else None
+    influx = _open_influx_writer(args, {"url": args.replay}, [])
+    sample_log = timeseries = None
+    try:
+        index = ReplayIndex(args.replay, args.replay_format, url or "")
+        sample_log = _open_sample_log(args)
+        timeseries = _open_parquet_timeseries(args)
+        results = event_loop.run(
+            _serving_metrics(args, metrics, replay_tester(
+                index, args.concurrency,
+                speedup=args.speedup,
+                method=args.method,
+                headers=headers,
+                json_data=json_data,
+                samples=SampleBuffer() if args.raw_samples else None,
+                sample_log=sample_log,
+                on_interval=_interval_listener(
+                    args, live, metrics, influx, timeseries,
+                ),
+            )),
+            args.loop,
+        )
+    except (OSError, ValueError) as e:
+        if sample_log is None or sample_log.error is None:
+            print(f"Error: {e}", file=sys.stderr)
+        return
+    finally:
+        if live is not None:
+            live.finish()
+        _close_sample_log(sample_log)
+        _close_influx_writer(influx)
+        if timeseries is not None:
+            timeseries.close()
+    _handle_result(
+        results, args.replay, args.export, args.output,
+        ndjson=args.ndjson, exported=timeseries is not None,
+    )
 
 
 def _run_distributed_test(
@@ -179,84 +498,386 @@ def _run_distributed_test(
     json_data: dict | None,
     notify_format_error: Callable[[str], None],
 ) -> None:
-    """Run distributed load testing."""
-    worker_list = []
-    worker_processes = []
-
-    if args.distributed_workers > 0:
-        base_port = 8001
-        ports = list(range(base_port, base_port + args.distributed_workers))
-        worker_list = [f"http://127.0.0.1:{port}" for port in ports]
-        print(f"Spawning {args.distributed_workers} local worker servers...")
-
-        uvicorn_path = shutil.which("uvicorn")
-        if not uvicorn_path:
-            print("Error: uvicorn executable not found in PATH")
-            return
-        for port in ports:
-            proc = subprocess.Popen(  # noqa: S603
-                [
-                    uvicorn_path, "ccload.distributed.worker_server:app",
-                    "--host", "127.0.0.1",
-                    "--port", str(port),
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            worker_processes.append(proc)
-
-        time.sleep(2)  # Wait for workers to be ready
-
-    elif args.workers:
+    """Run distributed load testing.
+
+    Workers are those of ``--workers``, local workers spawned for this run
+    with ``--distributed-workers``, or else the warm pool started by
+    ``ccload workers up`` if its processes are still the recorded ones and
+    answer their health endpoint, falling back to one spawned local worker.
+    """
+    worker_list: list[str] = []
+    spawn = 0
+    if args.workers:
         worker_list = [w.strip() for w in args.workers.split(",")]
-    else:
+    elif args.distributed_workers == 0:
         notify_format_error("You must provide --workers or --distributed-workers")
         return
+    elif args.distributed_workers is None and (
+        (warm := WorkerPool.load()) is not None and warm.alive
+        and event_loop.run(warm.healthy(), args.loop)
+    ):
+        print(f"Using {len(warm.urls)} warm workers", file=sys.stderr)
+        worker_list = warm.urls
+    else:
+        spawn = args.distributed_workers or 1
+    live = LiveLine() if sys.stderr.isatty() and not args.ndjson else None
+    metrics = LiveMetrics() if args.metrics_port is not None else None
+    influx = _open_influx_writer(args, {"url": url, "worker": "all"}, [])
+
+    async def run() -> dict[str, Any]:
+        pool = None
+        if spawn:
+            print(f"Spawning {spawn} local worker servers...", file=sys.stderr)
+            pool = await WorkerPool.start(spawn, args.loop)
+        try:
+            return await run_distributed_load_test(
+                url=url,
+                n_request=args.number,
+                n_concurrency=args.concurrency,
+                method=args.method,
+                headers=headers,
+                json_data=json_data,
+                workers=pool.urls if pool is not None else worker_list,
+                duration=args.duration,
+                grace_period=args.grace_period,
+                on_interval=_interval_listener(args, live, metrics, influx),
+            )
+        finally:
+            if pool is not None:
+                pool.stop()
+
+    try:
+        results = event_loop.run(_serving_metrics(args, metrics, run()), args.loop)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    finally:
+        if live is not None:
+            live.finish()
+        _close_influx_writer(influx)
 
-    results_list = asyncio.run(
-        run_distributed_load_test(
-            url=url,
-            n_request=args.number,
-            n_concurrency=args.concurrency,
-            method=args.method,
-            headers=headers,
-            json_data=json_data,
-            workers=worker_list,
-        ),
-    )
+    if not results:
+        print("Error: no worker returned results", file=sys.stderr)
+        return
+    _handle_result(results, url, args.export, args.output, ndjson=args.ndjson)
+
+
+def _parquet_streamed(args: argparse.Namespace) -> bool:
+    """Return whether a single-process run writes its Parquet export live."""
+    return args.export == "parquet" and args.output is not None
 
-    if worker_processes:
-        for proc in worker_processes:
-            proc.terminate()
 
-    for result in results_list:
-        _handle_result(result, url, args.export, args.output)
+def _open_sample_log(args: argparse.Namespace) -> SampleLog | None:
+    """Open the ``--sample-log`` of a run, or its Parquet samples, if any."""
+    if _parquet_streamed(args):
+        path = Path(args.output).with_suffix(".samples.parquet")
+        print(f"Exporting samples to {path}", file=sys.stderr)
+        return ParquetSampleLog(path)
+    if args.sample_log is None:
+        return None
+    print(f"Logging samples to {args.sample_log}", file=sys.stderr)
+    return SampleLog(args.sample_log, compress=args.compress_samples)
 
 
 def _run_standard_test(
-    url: str,
+    url: str | UrlMix | RequestFeed,
     args: argparse.Namespace,
     headers: dict | None,
     json_data: dict | None,
 ) -> None:
-    """Run standard single-node load testing."""
-    results = asyncio.run(
-        load_tester(
-            url,
-            args.number,
-            args.concurrency,
-            method=args.method,
-            headers=headers,
-            json_data=json_data,
-        ),
+    """Run standard single-node load testing of a URL, URL mix or feed."""
+    if isinstance(url, str):
+        name = url
+    else:
+        name = args.file.name if isinstance(url, UrlMix) else args.feed
+    options = {
+        "method": args.method,
+        "headers": headers,
+        "json_data": json_data,
+        "samples": SampleBuffer() if args.raw_samples else None,
+        "duration": args.duration,
+        "grace_period": args.grace_period,
+        "rate": args.rate,
+        "arrival": args.arrival,
+        "profile": args.stages,
+        "profile_target": args.stage_target,
+        "engine": args.engine,
+        "pipeline": args.pipeline,
+    }
+    timeseries = None
+    if args.processes > 1:
+        results = run_multiprocess_load_test(
+            url, args.number, args.concurrency, args.processes,
+            loop=args.loop, **options,
+        )
+        if args.ndjson:
+            for point in results["timeseries"]:
+                print_ndjson(point)
+    else:
+        live = LiveLine() if sys.stderr.isatty() and not args.ndjson else None
+        metrics = LiveMetrics() if args.metrics_port is not None else None
+        influx = _open_influx_writer(
+            args, {"url": name}, profile_stages(args.stages),
+        )
+        sample_log = _open_sample_log(args)
+        timeseries = _open_parquet_timeseries(args)
+        try:
+            results = event_loop.run(
+                _serving_metrics(args, metrics, load_tester(
+                    url, args.number, args.concurrency,
+                    sample_log=sample_log,
+                    on_interval=_interval_listener(
+                        args, live, metrics, influx, timeseries,
+                    ),
+                    **options,
+                )),
+                args.loop,
+            )
+        finally:
+            if live is not None:
+                live.finish()
+            _close_sample_log(sample_log)
+            _close_influx_writer(influx)
+            if timeseries is not None:
+                timeseries.close()
+    _handle_result(
+        results, name, args.export, args.output,
+        ndjson=args.ndjson, exported=timeseries is not None,
     )
-    _handle_result(results, url, args.export, args.output)
+
+
+def _run_file_test(
+    args: argparse.Namespace,
+    headers: dict | None,
+    json_data: dict | None,
+    notify_format_error: Callable[[str], None],
+) -> None:
+    """Run a standard load test of the weighted URL mix of ``--file``."""
+    if args.distributed:
+        notify_format_error("--file cannot be used with --distributed")
+        return
+    if args.engine != "aiohttp":
+        notify_format_error("--file requires --engine aiohttp")
+        return
+    with args.file:
+        try:
+            mix = UrlMix.parse(args.file)
+        except ValueError as e:
+            notify_format_error(str(e))
+            return
+    _run_standard_test(mix, args, headers, json_data)
+
+
+def _run_feed_test(
+    args: argparse.Namespace,
+    headers: dict | None,
+    json_data: dict | None,
+    notify_format_error: Callable[[str], None],
+) -> None:
+    """Run a standard load test streaming the requests of ``--feed``."""
+    if args.distributed or args.processes > 1:
+        notify_format_error("--feed cannot be used with --distributed or --processes")
+        return
+    if args.engine != "aiohttp":
+        notify_format_error("--feed requires --engine aiohttp")
+        return
+    if args.feed_loop and args.number is None and args.duration is None:
+        notify_format_error("--feed-loop requires --number or --duration")
+        return
+    try:
+        _run_standard_test(
+            RequestFeed(args.feed, repeat=args.feed_loop), args, headers, json_data,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+
+
+def _samples_cli(argv: list[str]) -> None:
+    """Report the statistics of a sample log: ``ccload samples LOG``."""
+    parser = argparse.ArgumentParser(prog="ccload samples")
+    parser.add_argument("log", help="Sample log written with --sample-log")
+    parser.add_argument(
+        "--csv",
+        help="Also write every sample to this CSV file",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--parquet",
+        help="Also write every sample to this Parquet file",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--export",
+        help="Export the statistics in the specified format",
+        choices=["json", "csv"],
+        default=None,
+    )
+    parser.add_argument(
+        "--output",
+        help="Output file path for the exported statistics",
+        type=str,
+        default=None,
+    )
+    args = parser.parse_args(argv)
+    try:
+        reader = SampleLogReader(args.log)
+        results = reader.summary()
+        if args.csv:
+            count = reader.to_csv(args.csv)
+            print(f"{count} samples written to {args.csv}")
+        if args.parquet:
+            count = sample_log_to_parquet(reader, args.parquet)
+            print(f"{count} samples written to {args.parquet}")
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}")
+        return
+    _handle_result(results, args.log, args.export, args.output)
+
+
+def _compare_cli(argv: list[str]) -> None:
+    """Gate a candidate run on a baseline: ``ccload compare BASELINE CANDIDATE``.
+
+    Exits with status 1 if a metric regressed beyond its threshold, and 2
+    if the runs cannot be compared.
+    """
+    parser = argparse.ArgumentParser(prog="ccload compare")
+    parser.add_argument("baseline", help="JSON export of the baseline run")
+    parser.add_argument("candidate", help="JSON export of the candidate run")
+    parser.add_argument(
+        "--threshold",
+        help="Largest acceptable change as metric=[+-]N%%, e.g. p99=+10%%, "
+        "ttfb_mean=+5%%, rps=-5%% or errors=+1%% (percentage points); "
+        f"repeatable (default: {' '.join(DEFAULT_THRESHOLDS)})",
+        action="append",
+        default=None,
+    )
+    parser.add_argument(
+        "--alpha",
+        help="Significance level a change must reach to be a regression "
+        f"(default: {DEFAULT_ALPHA})",
+        type=float,
+        default=DEFAULT_ALPHA,
+    )
+    parser.add_argument(
+        "--json",
+        help="Print the comparison as JSON",
+        action="store_true",
+    )
+    args = parser.parse_args(argv)
+    try:
+        thresholds = [
+            Threshold.parse(text) for text in args.threshold or DEFAULT_THRESHOLDS
+        ]
+        baseline = load_run(args.baseline)
+        candidate = load_run(args.candidate)
+        results = compare_runs(baseline, candidate, thresholds, args.alpha)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    shift = distribution_shift(baseline, candidate)
+    if args.json:
+        print(json.dumps({
+            "thresholds": results,
+            "slower_probability": shift[0] if shift else None,
+            "slower_p_value": shift[1] if shift else None,
+        }, indent=2))
+    else:
+        print(format_comparison(results))
+        if shift is not None:
+            print(
+                f"\nA candidate request is slower than a baseline one with "
+                f"probability {shift[0]:.3f} (p-value {shift[1]:.4f})",
+            )
+    regressions = [result["metric"] for result in results if result["regression"]]
+    if regressions:
+        print(f"Regression in {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _workers_cli(argv: list[str]) -> None:
+    """Start or stop the warm pool of local workers: ``ccload workers up|down``."""
+    parser = argparse.ArgumentParser(prog="ccload workers")
+    parser.add_argument("action", choices=["up", "down"])
+    parser.add_argument(
+        "-n",
+        "--number",
+        help="Number of workers to start (default: 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--loop",
+        help="Event loop running the workers (default: asyncio)",
+        choices=list(event_loop.LOOP_FACTORIES),
+        default="asyncio",
+    )
+    args = parser.parse_args(argv)
+    if args.action == "down":
+        pool = workers_down()
+        print("Stopped the warm workers" if pool else "No warm workers running")
+        return
+    try:
+        pool = event_loop.run(workers_up(args.number, args.loop), args.loop)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Started {len(pool.urls)} warm workers:")
+    for url in pool.urls:
+        print(f" {url}")
+
+
+# Subcommands dispatched on the first argument, before URL parsing.
+SUBCOMMANDS = {
+    "compare": _compare_cli,
+    "samples": _samples_cli,
+    "workers": _workers_cli,
+}
+
+
+def _option_conflict(args: argparse.Namespace) -> str | None:  # noqa: PLR0911
+    """Return the error of options that cannot be used together, if any."""
+    if args.pipeline != 1 and args.engine != "raw":
+        return "--pipeline requires --engine raw"
+    if args.export == "parquet" and not PARQUET_AVAILABLE:
+        return "--export parquet requires pyarrow (pip install 'ccload[parquet]')"
+    if args.export == "parquet" and args.sample_log:
+        return "--sample-log cannot be used with --export parquet"
+    if args.export == "parquet" and (args.processes > 1 or args.distributed):
+        # Only a single-process run streams its samples to Parquet.
+        return "--export parquet cannot be used with --processes or --distributed"
+    if args.distributed and (ignored := [
+        option for option, used in (
+            ("--rate", args.rate is not None),
+            ("--stages", args.stages is not None),
+            (f"--engine {args.engine}", args.engine != "aiohttp"),
+            ("--pipeline", args.pipeline != 1),
+            ("--raw-samples", args.raw_samples),
+        ) if used
+    ]):
+        return f"{', '.join(ignored)} cannot be used with --distributed"
+    if args.sample_log and (args.processes > 1 or args.distributed):
+        return "--sample-log cannot be used with --processes or --distributed"
+    if (
+        args.metrics_port is not None or args.influxdb_url is not None
+    ) and args.processes > 1:
+        return "--metrics-port and --influxdb-url cannot be used with --processes"
+    return None
 
 
 def _cli() -> None:
     """Command-line interface for ccload."""
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
     parser = _create_argument_parser()
     args = parser.parse_args()
+    if (
+        args.number is None and args.duration is None and args.stages is None
+        and args.feed is None
+    ):
+        args.number = DEFAULT_REQUESTS
 
     if args.script:
         _run_script_test(args)
@@ -267,14 +888,23 @@ def _cli() -> None:
         print(f"Error: {msg}")
         parser.print_help()
 
+    conflict = _option_conflict(args)
+    if conflict is not None:
+        notify_format_error(conflict)
+        return
+
     result = _process_request_data(args, parser)
     if result is None:
         return
 
     url, headers, json_data = result
 
-    if url is not None:
-        if args.distributed:
-            _run_distributed_test(url, args, headers, json_data, notify_format_error)
-        else:
-            _run_standard_test(url, args, headers, json_data)
+    if args.replay is not None:
+        _run_replay_test(url, args, headers, json_data)
+    elif url is None:
+        run_input = _run_file_test if args.file is not None else _run_feed_test
+        run_input(args, headers, json_data, notify_format_error)
+    elif args.distributed:
+        _run_distributed_test(url, args, headers, json_data, notify_format_error)
+    else:
+        _run_standard_test(url, args, headers, json_data)
@@ -0,0 +1,368 @@
+"""Comparison of two load test runs, for performance regression gates."""
+import json
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.statistics import LATENCY_METRICS, percentile_key
+
+# Thresholds applied when none is given: p99 request time up by more than
+# 10%, or throughput down by more than 5%.
+DEFAULT_THRESHOLDS = ("p99=+10%", "rps=-5%")
+
+# Significance level below which a change beyond its threshold is a
+# regression rather than noise.
+DEFAULT_ALPHA = 0.05
+
+THRESHOLD_PATTERN = re.compile(r"^(?P<name>[\w.]+)=(?P<limit>[+-]?\d+(?:\.\d+)?)%$")
+
+# Latency statistic a threshold can name, e.g. ``p99``, ``ttfb_p99.9``,
+# ``ttfb_p99_9`` or ``ttlb_mean``; the metric defaults to the request time.
+STATISTIC_PATTERN = re.compile(
+    r"^(?:(?P<metric>\w+?)_)?(?P<statistic>mean|p\d+(?:[._]\d+)?)$",
+)
+
+# Full intervals each run needs for its throughput change to be tested;
+# with fewer, the threshold alone decides.
+MIN_THROUGHPUT_INTERVALS = 5
+
+# Aliases of the metrics a threshold can name.
+METRIC_ALIASES = {
+    "rps": "requests_per_second",
+    "throughput": "requests_per_second",
+    "errors": "error_rate",
+}
+
+
+def _metric_key(name: str) -> str:
+    """Return the statistics key of a metric name, e.g. ``p99`` or ``ttfb_p99``."""
+    name = METRIC_ALIASES.get(name, name)
+    if name in ("requests_per_second", "error_rate"):
+        return name
+    match = STATISTIC_PATTERN.match(name)
+    metric = (match["metric"] or "request_time") if match else None
+    if metric not in LATENCY_METRICS:
+        msg = f"Unsupported metric: {name}"
+        raise ValueError(msg)
+    statistic = match["statistic"]
+    if statistic == "mean":
+        return f"{metric}_mean"
+    return percentile_key(metric, float(statistic[1:].replace("_", ".")))
+
+
+class Threshold:
+    """Largest acceptable change of a metric between two runs.
+
+    Latency thresholds are relative increases and throughput thresholds
+    relative decreases; the error rate threshold is an absolute increase,
+    in percentage points, as the baseline rate is often zero.
+    """
+
+    def __init__(self, key: str, limit: float) -> None:
+        """Initialize a threshold.
+
+        Args:
+            key: Statistics key of the metric, e.g. ``request_time_p99``.
+            limit: Largest acceptable change, a fraction: positive for an
+                increase, negative for a decrease.
+
+        """
+        self.key = key
+        self.limit = limit
+
+    @classmethod
+    def parse(cls, text: str) -> "Threshold":
+        """Parse ``metric=[+-]N%``, e.g. ``p99=+10%`` or ``rps=-5%``.
+
+        Without a sign, the change is the one that makes the metric worse.
+        """
+        match = THRESHOLD_PATTERN.match(text.strip())
+        if match is None:
+            msg = f"Invalid threshold {text!r}, expected metric=[+-]N%"
+            raise ValueError(msg)
+        key = _metric_key(match["name"])
+        limit = float(match["limit"]) / 100
+        if key == "requests_per_second" and match["limit"][0] not in "+-":
+            limit = -limit
+        return cls(key, limit)
+
+    @property
+    def higher_is_worse(self) -> bool:
+        """Whether an increase of the metric is the regression."""
+        return self.limit >= 0
+
+    @property
+    def absolute(self) -> bool:
+        """Whether the change is a difference rather than a ratio."""
+        return self.key == "error_rate"
+
+
+def load_run(path: str | Path) -> dict[str, Any]:
+    """Load the statistics of a run from a JSON export.
+
+    Args:
+        path: File written by ``--export json``, or a bare statistics
+            dictionary.
+
+    """
+    with Path(path).open() as f:
+        data = json.load(f)
+    statistics = data.get("metrics", data) if isinstance(data, dict) else None
+    if not isinstance(statistics, dict) or "total_requests" not in statistics:
+        msg = f"{path} is not a ccload JSON export"
+        raise ValueError(msg)
+    return statistics
+
+
+def _normal_sf(z: float) -> float:
+    """Return the probability that a standard normal variable exceeds ``z``."""
+    return math.erfc(z / math.sqrt(2)) / 2
+
+
+def mann_whitney(
+    baseline: Iterable[tuple[float, int]], candidate: Iterable[tuple[float, int]],
+) -> tuple[float, float]:
+    """Test whether candidate values tend to be larger than baseline values.
+
+    The Mann-Whitney U test runs on binned values, such as the buckets of
+    two histograms: every bin is a group of tied values, given their mean
+    rank, and the variance is corrected for the ties. With millions of
+    requests in a few thousand bins it costs one pass over the bins.
+
+    Args:
+        baseline: Values of the baseline and how often each one occurred.
+        candidate: Values of the candidate and how often each one occurred.
+
+    Returns:
+        The one-sided p-value of the normal approximation, and the
+        probability that a candidate value is larger than a baseline one,
+        counting ties as half.
+
+    """
+    counts: dict[float, list[int]] = {}
+    for side, values in enumerate((baseline, candidate)):
+        for value, count in values:
+            counts.setdefault(value, [0, 0])[side] += count
+    n_baseline = sum(pair[0] for pair in counts.values())
+    n_candidate = sum(pair[1] for pair in counts.values())
+    if not n_baseline or not n_candidate:
+        return 1.0, 0.5
+    total = n_baseline + n_candidate
+    rank_sum = 0.0
+    ties = 0
+    seen = 0
+    for value in sorted(counts):
+        in_baseline, in_candidate = counts[value]
+        tied = in_baseline + in_candidate
+        rank_sum += in_candidate * (seen + (tied + 1) / 2)
+        ties += tied**3 - tied
+        seen += tied
+    u = rank_sum - n_candidate * (n_candidate + 1) / 2
+    pairs = n_baseline * n_candidate
+    variance = pairs / 12 * ((total + 1) - ties / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0, u / pairs
+    return _normal_sf((u - pairs / 2) / math.sqrt(variance)), u / pairs
+
+
+def proportion_test(
+    baseline: int, n_baseline: int, candidate: int, n_candidate: int,
+) -> float:
+    """Return the one-sided p-value that the candidate proportion is larger.
+
+    A two-proportion z-test with a pooled proportion and Yates' continuity
+    correction, which keeps a handful of requests in the tail of a small
+    run from passing for a significant change.
+    """
+    if not n_baseline or not n_candidate:
+        return 1.0
+    pooled = (baseline + candidate) / (n_baseline + n_candidate)
+    variance = pooled * (1 - pooled) * (1 / n_baseline + 1 / n_candidate)
+    if variance <= 0:
+        return 1.0
+    difference = candidate / n_candidate - baseline / n_baseline
+    correction = (1 / n_baseline + 1 / n_candidate) / 2
+    difference -= math.copysign(min(correction, abs(difference)), difference)
+    return _normal_sf(difference / math.sqrt(variance))
+
+
+def _above(histogram: LatencyHistogram, value: float) -> int:
+    """Return the number of samples in buckets above ``value``."""
+    return sum(count for upper, count in histogram.buckets() if upper > value)
+
+
+def _histogram(statistics: dict[str, Any], metric: str) -> LatencyHistogram | None:
+    """Return the histogram of a latency metric of a run, if it was exported."""
+    data = statistics.get("histograms", {}).get(metric)
+    return LatencyHistogram.from_dict(data) if data else None
+
+
+def _interval_throughput(statistics: dict[str, Any]) -> Counter[float]:
+    """Return the throughput of every full interval of a run's time series."""
+    points = statistics.get("timeseries", [])
+    full = max((point["duration"] for point in points), default=0)
+    return Counter(
+        point["requests_per_second"] for point in points
+        if point["duration"] >= full
+    )
+
+
+def _error_rate(statistics: dict[str, Any]) -> float:
+    """Return the fraction of requests of a run that failed."""
+    total = statistics["total_requests"]
+    return statistics["failed_requests"] / total if total else 0
+
+
+def _p_value(
+    threshold: Threshold, baseline: dict[str, Any], candidate: dict[str, Any],
+) -> float | None:
+    """Return the p-value of a change in the worse direction, if testable.
+
+    Percentiles are tested on the fraction of requests above the baseline
+    percentile, means with a Mann-Whitney test on the histograms, the
+    throughput with a Mann-Whitney test on the per-interval throughput and
+    the error rate with a proportion test. A run with fewer than
+    ``MIN_THROUGHPUT_INTERVALS`` full intervals cannot show a significant
+    throughput change, so its throughput is not tested.
+    """
+    key = threshold.key
+    if key == "error_rate":
+        return proportion_test(
+            baseline["failed_requests"], baseline["total_requests"],
+            candidate["failed_requests"], candidate["total_requests"],
+        )
+    if key == "requests_per_second":
+        before, after = _interval_throughput(baseline), _interval_throughput(candidate)
+        if min(before.total(), after.total()) < MIN_THROUGHPUT_INTERVALS:
+            return None
+        increase = (before.items(), after.items())
+        return mann_whitney(
+            *(increase if threshold.higher_is_worse else increase[::-1]),
+        )[0]
+    metric, _, statistic = key.partition("_p")
+    if not statistic:
+        metric = key.removesuffix("_mean")
+    before, after = _histogram(baseline, metric), _histogram(candidate, metric)
+    if before is None or after is None:
+        return None
+    if not statistic:
+        increase = (before.buckets(), after.buckets())
+        return mann_whitney(
+            *(increase if threshold.higher_is_worse else increase[::-1]),
+        )[0]
+    limit = baseline[key]
+    above = proportion_test(
+        _above(before, limit), before.count, _above(after, limit), after.count,
+    )
+    return above if threshold.higher_is_worse else 1 - above
+
+
+def compare_runs(
+    baseline: dict[str, Any],
+    candidate: dict[str, Any],
+    thresholds: list[Threshold],
+    alpha: float = DEFAULT_ALPHA,
+) -> list[dict[str, Any]]:
+    """Check every threshold between a baseline run and a candidate run.
+
+    A metric regresses when its change goes beyond its threshold and the
+    change is significant at ``alpha``; when the runs lack the histograms
+    or time series to test it, the threshold alone decides.
+
+    Args:
+        baseline: Statistics of the baseline run.
+        candidate: Statistics of the candidate run.
+        thresholds: Thresholds to check.
+        alpha: Significance level.
+
+    Returns:
+        One dictionary per threshold with the ``metric``, its ``baseline``
+        and ``candidate`` values, the ``change`` (relative, or absolute for
+        the error rate), the ``threshold``, the ``p_value`` (None when not
+        testable) and whether it is a ``regression``.
+
+    """
+    results = []
+    for threshold in thresholds:
+        key = threshold.key
+        if key == "error_rate":
+            before, after = _error_rate(baseline), _error_rate(candidate)
+        else:
+            before, after = baseline.get(key), candidate.get(key)
+            if before is None or after is None:
+                msg = f"{key} is missing from the runs"
+                raise ValueError(msg)
+        if threshold.absolute:
+            change = after - before
+        elif before:
+            change = after / before - 1
+        else:
+            change = math.inf if after else 0.0
+        beyond = (
+            change > threshold.limit if threshold.higher_is_worse
+            else change < threshold.limit
+        )
+        p_value = _p_value(threshold, baseline, candidate)
+        results.append({
+            "metric": key,
+            "baseline": before,
+            "candidate": after,
+            "change": change,
+            "threshold": threshold.limit,
+            "p_value": p_value,
+            "regression": beyond and (p_value is None or p_value < alpha),
+        })
+    return results
+
+
+def distribution_shift(
+    baseline: dict[str, Any], candidate: dict[str, Any], metric: str = "request_time",
+) -> tuple[float, float] | None:
+    """Compare the whole latency distributions of two runs.
+
+    Returns:
+        The probability that a candidate request is slower than a baseline
+        one and the one-sided p-value of a Mann-Whitney test, or None if
+        the runs have no histograms.
+
+    """
+    before, after = _histogram(baseline, metric), _histogram(candidate, metric)
+    if before is None or after is None:
+        return None
+    p_value, slower = mann_whitney(before.buckets(), after.buckets())
+    return slower, p_value
+
+
+def _format_value(key: str, value: float) -> str:
+    """Format a metric value with its unit."""
+    if key == "requests_per_second":
+        return f"{value:.1f}/s"
+    if key == "error_rate":
+        return f"{value:.2%}"
+    return f"{value * 1000:.2f} ms"
+
+
+def format_comparison(results: list[dict[str, Any]]) -> str:
+    """Format the results of ``compare_runs`` as a table."""
+    lines = [(
+        f"{'Metric':<24}{'Baseline':>14}{'Candidate':>14}{'Change':>10}"
+        f"{'Limit':>9}{'p-value':>9}  Result"
+    )]
+    for result in results:
+        key = result["metric"]
+        unit = "pt" if key == "error_rate" else "%"
+        p_value = result["p_value"]
+        lines.append(
+            f"{key:<24}"
+            f"{_format_value(key, result['baseline']):>14}"
+            f"{_format_value(key, result['candidate']):>14}"
+            f"{result['change'] * 100:>+8.1f}{unit:<2}"
+            f"{result['threshold'] * 100:>+7.1f}{unit:<2}"
+            f"{'-' if p_value is None else f'{p_value:.4f}':>9}  "
+            f"{'REGRESSION' if result['regression'] else 'ok'}",
+        )
+    return "\n".join(lines)
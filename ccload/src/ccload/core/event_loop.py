@@ -0,0 +1,90 @@
+"""Event-loop backends and event-loop lag monitoring."""
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any, TypeVar
+
+from ccload.core.histogram import LatencyHistogram
+
+T = TypeVar("T")
+
+# Seconds between two samples of the event-loop lag.
+LAG_SAMPLE_INTERVAL = 0.01
+
+
+def _uvloop_factory() -> asyncio.AbstractEventLoop:
+    """Create a uvloop event loop."""
+    try:
+        import uvloop  # noqa: PLC0415
+    except ImportError as e:
+        msg = "The uvloop backend requires uvloop: pip install 'ccload[uvloop]'"
+        raise RuntimeError(msg) from e
+    return uvloop.new_event_loop()
+
+
+# Event-loop factories by backend name; register new backends here.
+LOOP_FACTORIES: dict[str, Callable[[], asyncio.AbstractEventLoop]] = {
+    "asyncio": asyncio.new_event_loop,
+    "uvloop": _uvloop_factory,
+}
+
+
+def run(coro: Coroutine[Any, Any, T], loop: str = "asyncio") -> T:
+    """Run a coroutine to completion on the selected event-loop backend.
+
+    Args:
+        coro: Coroutine to run.
+        loop: Name of a backend in ``LOOP_FACTORIES``.
+
+    Returns:
+        The result of the coroutine.
+
+    """
+    if loop not in LOOP_FACTORIES:
+        coro.close()
+        msg = f"Unsupported event loop: {loop}"
+        raise ValueError(msg)
+    with asyncio.Runner(loop_factory=LOOP_FACTORIES[loop]) as runner:
+        return runner.run(coro)
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs scheduled callbacks.
+
+    A background task sleeps for ``interval`` seconds in a loop and records
+    by how much every wake-up overshoots. When the load generator itself is
+    saturated this lag grows, and every latency measured on the same loop
+    is inflated by it.
+    """
+
+    def __init__(
+        self, histogram: LatencyHistogram, interval: float = LAG_SAMPLE_INTERVAL,
+    ) -> None:
+        """Initialize the monitor.
+
+        Args:
+            histogram: Histogram receiving the lag samples, in seconds.
+            interval: Seconds between two samples.
+
+        """
+        self.histogram = histogram
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self) -> None:
+        """Record the lag of every wake-up until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.histogram.record(max(loop.time() - expected, 0))
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,150 @@
+"""Streaming feeds of request definitions read from JSONL files."""
+import asyncio
+import json
+from collections import deque
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO
+
+# Bytes buffered by every read of the feed file.
+FEED_BUFFER_SIZE = 1 << 20
+
+# Requests parsed per read; one batch is handed out while the next one is
+# read ahead, so memory stays at two batches whatever the size of the feed.
+FEED_BATCH_SIZE = 4096
+
+# A request of a feed: its URL and the ``read_url`` arguments it sets.
+FeedRequest = tuple[str, dict[str, Any]]
+
+
+def parse_feed_line(line: bytes, number: int) -> FeedRequest:
+    """Parse one JSON line of a feed.
+
+    Args:
+        line: Object with a ``url`` and optional ``method``, ``headers``,
+            ``json`` (a JSON body) or ``body`` (a raw body).
+        number: Line number, for error messages.
+
+    """
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        msg = f"Invalid JSON on feed line {number}"
+        raise ValueError(msg) from None
+    if not isinstance(entry, dict) or "url" not in entry:
+        msg = f"Feed line {number} has no URL"
+        raise ValueError(msg)
+    fields: dict[str, Any] = {}
+    if "method" in entry:
+        fields["method"] = entry["method"]
+    if "headers" in entry:
+        fields["headers"] = entry["headers"]
+    if "json" in entry:
+        fields["json_data"] = entry["json"]
+    if "body" in entry:
+        fields["data"] = entry["body"]
+    return entry["url"], fields
+
+
+class RequestFeed:
+    """Requests streamed from a JSONL file, one request definition per line.
+
+    The file is read through a large buffer, ``FEED_BATCH_SIZE`` lines at a
+    time, in a thread so that the event loop never waits on the disk; the
+    next batch is read ahead while the current one is handed out. Blank
+    lines are skipped. With ``repeat``, the feed starts over at the end of
+    the file instead of ending.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        repeat: bool = False,
+        batch_size: int = FEED_BATCH_SIZE,
+    ) -> None:
+        """Initialize the feed; the file is opened by ``open``.
+
+        Args:
+            path: Path to the JSONL file.
+            repeat: Start over at the end of the file.
+            batch_size: Number of requests parsed per read.
+
+        """
+        self.path = Path(path)
+        self.repeat = repeat
+        self.batch_size = batch_size
+        self._file: BinaryIO | None = None
+        # Lines read, and requests parsed, since the start of the file.
+        self._line = 0
+        self._parsed = 0
+        self._batch: deque[FeedRequest] = deque()
+        self._reading: asyncio.Future[list[FeedRequest]] | None = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "RequestFeed":
+        """Open the feed."""
+        self.open()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Close the feed."""
+        await self.close()
+
+    def open(self) -> None:
+        """Open the file and start reading the first batch."""
+        self._file = self.path.open("rb", buffering=FEED_BUFFER_SIZE)
+        self._reading = asyncio.ensure_future(asyncio.to_thread(self._read_batch))
+
+    async def close(self) -> None:
+        """Wait for the batch being read, then close the file."""
+        if self._reading is not None:
+            await asyncio.gather(self._reading, return_exceptions=True)
+            self._reading = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_batch(self) -> list[FeedRequest]:
+        """Read and parse the next batch of requests.
+
+        Returns:
+            Up to ``batch_size`` requests, none once the file is exhausted.
+
+        """
+        batch = []
+        while len(batch) < self.batch_size:
+            line = self._file.readline()
+            if not line:
+                if not self.repeat:
+                    break
+                if not self._parsed:
+                    msg = f"Request feed {self.path} has no request"
+                    raise ValueError(msg)
+                self._file.seek(0)
+                self._line = 0
+                self._parsed = 0
+                continue
+            self._line += 1
+            if line.strip():
+                batch.append(parse_feed_line(line, self._line))
+                self._parsed += 1
+        return batch
+
+    async def next(self) -> FeedRequest | None:
+        """Return the next request, or None once the feed has ended."""
+        if not self._batch:
+            async with self._lock:
+                if not self._batch and self._reading is not None:
+                    batch = await self._reading
+                    self._batch.extend(batch)
+                    self._reading = (
+                        asyncio.ensure_future(asyncio.to_thread(self._read_batch))
+                        if batch else None
+                    )
+        return self._batch.popleft() if self._batch else None
@@ -0,0 +1,156 @@
+"""Log-bucketed latency histogram with bounded relative error."""
+import math
+from collections.abc import Iterator
+from typing import Any
+
+# Values are stored as integer nanoseconds.
+_NANOSECONDS = 1_000_000_000
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies in seconds.
+
+    Values are grouped in buckets whose width grows with the magnitude of the
+    value: every power of two is split into ``2 ** (sub_bucket_bits - 1)``
+    linear sub-buckets. The relative error of any reported percentile is
+    therefore at most ``2 ** -sub_bucket_bits`` (0.4% with the default of 8
+    bits), memory is bounded by the number of distinct buckets rather than the
+    number of samples, and two histograms are merged by adding their counts.
+    Min, max and sum are tracked exactly.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            sub_bucket_bits: Precision of the histogram, in bits.
+
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_bucket_count = 1 << sub_bucket_bits
+        self._half_count = self._sub_bucket_count >> 1
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def _index(self, value: int) -> int:
+        """Return the bucket index of a value in nanoseconds."""
+        if value < self._sub_bucket_count:
+            return max(value, 0)
+        shift = value.bit_length() - self.sub_bucket_bits
+        return shift * self._half_count + (value >> shift)
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        """Return the lowest and highest nanosecond values of a bucket."""
+        if index < self._sub_bucket_count:
+            return index, index
+        shift = index // self._half_count - 1
+        top = index - shift * self._half_count
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, value: float) -> None:
+        """Record a latency.
+
+        Args:
+            value: Latency in seconds.
+
+        """
+        # Inlined ``_index``: this runs once per metric for every request.
+        scaled = int(value * _NANOSECONDS)
+        if scaled < self._sub_bucket_count:
+            index = max(scaled, 0)
+        else:
+            shift = scaled.bit_length() - self.sub_bucket_bits
+            index = shift * self._half_count + (scaled >> shift)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:  # noqa: PLR1730
+            self.min = value
+        if value > self.max:  # noqa: PLR1730
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the samples of another histogram to this one.
+
+        Args:
+            other: Histogram with the same precision.
+
+        """
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            msg = "Cannot merge histograms with different precision"
+            raise ValueError(msg)
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded values, or 0 if the histogram is empty."""
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, percent: float) -> float:
+        """Return the value below which ``percent`` of the samples fall.
+
+        Args:
+            percent: Percentile between 0 and 100.
+
+        Returns:
+            The percentile in seconds, or 0 if the histogram is empty.
+
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = (low + high) / 2 / _NANOSECONDS
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def buckets(self) -> Iterator[tuple[float, int]]:
+        """Iterate over non-empty buckets in increasing order.
+
+        Yields:
+            The upper bound of the bucket in seconds and its count.
+
+        """
+        for index in sorted(self.counts):
+            yield self._bounds(index)[1] / _NANOSECONDS, self.counts[index]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the histogram to a JSON-compatible dictionary."""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else 0,
+            "max": self.max if self.count else 0,
+            "buckets": {str(index): n for index, n in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LatencyHistogram":
+        """Rebuild a histogram serialized with ``to_dict``.
+
+        Args:
+            data: Dictionary produced by ``to_dict``.
+
+        """
+        histogram = cls(data["sub_bucket_bits"])
+        histogram.counts = {int(index): n for index, n in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["sum"]
+        if histogram.count:
+            histogram.min = data["min"]
+            histogram.max = data["max"]
+        return histogram
@@ -1,156 +1,377 @@
 """Core functionality for the load testing tool."""
 import asyncio
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, nullcontext
 from typing import Any
 
 import aiohttp
 
+from ccload.core.event_loop import LoopLagMonitor
+from ccload.core.feed import RequestFeed
+from ccload.core.profile import LoadProfile
+from ccload.core.raw_engine import raw_engine
+from ccload.core.sample_log import SampleLog
+from ccload.core.samples import SampleBuffer
+from ccload.core.scheduler import (
+    RequestCounter,
+    build_worker,
+    profile_slots,
+    run_worker_pool,
+)
+from ccload.core.statistics import (
+    PERCENTILES,
+    PHASE_METRICS,
+    ResultSink,
+    StageRecorder,
+    StatsRecorder,
+    UrlRecorder,
+    percentile_key,
+)
+from ccload.core.timeseries import IntervalAggregator, IntervalListener
+from ccload.core.tracing import create_trace_config, request_phases
+from ccload.core.url_mix import UrlMix
 
-async def read_url(
+# Seconds in-flight requests may take to finish after a --duration deadline.
+DEFAULT_GRACE_PERIOD = 5.0
+
+
+async def read_url(  # noqa: PLR0913
     url: str, session: aiohttp.ClientSession,
     method: str = "GET", headers: dict[str, str] | None = None,
     json_data: dict[str, Any] | None = None,
+    data: str | bytes | None = None,
 ) -> dict[str, Any]:
-    """Read a URL and return the status code and time taken."""
+    """Read a URL and return the status code and time taken.
+
+    The request body is ``json_data`` encoded as JSON, or else the raw
+    ``data``.
+
+    When the session was created with ``create_trace_config``, the result
+    also holds the duration of every phase of the request.
+    """
     start_time = time.perf_counter()
+    marks: dict[str, float] = {}
 
     async with session.request(
         method, url,
         headers=headers,
         json=json_data,
+        data=data,
+        trace_request_ctx=marks,
     ) as response:
-        await response.content.read(1)
-        ttfb = time.perf_counter() - start_time  # Time to first byte
-        await response.read()
+        head = await response.content.read(1)
+        first_byte = time.perf_counter()
+        ttfb = first_byte - start_time  # Time to first byte
+        body = await response.read()
         ttlb = time.perf_counter() - start_time  # Time to last byte
         return {
             "status": response.status,
             "ttfb": ttfb,
             "ttlb": ttlb,
             "request_time": time.perf_counter() - start_time,
+            "bytes": len(head) + len(body),
+            **request_phases(marks, start_time, first_byte),
         }
 
 
-def _calculate_statistics(
-    results: list[dict[str, Any] | Exception], total_time: float,
-) -> dict[str, Any]:
-    """Calculate statistics from the results of the load test."""
-    statistics = {
-        "total_requests": len(results),
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "request_time_min": float("inf"),
-        "request_time_max": float("-inf"),
-        "request_time_mean": 0,
-        "ttfb_min": float("inf"),
-        "ttfb_max": float("-inf"),
-        "ttfb_mean": 0,
-        "ttlb_min": float("inf"),
-        "ttlb_max": float("-inf"),
-        "ttlb_mean": 0,
-        "requests_per_second": 0,
-    }
+@asynccontextmanager
+async def aiohttp_engine(  # noqa: PLR0913
+    url: str | None,
+    n_concurrency: int,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    json_data: dict[str, Any] | None = None,
+    pipeline: int = 1,
+    *,
+    session: aiohttp.ClientSession | None = None,
+) -> AsyncIterator[Callable[..., Awaitable[dict[str, Any]]]]:
+    """Open an aiohttp session sized for ``n_concurrency`` requests in flight.
 
-    request_time_total = 0
-    ttfb_total = 0
-    ttlb_total = 0
-    for result in results:
-        if isinstance(result, Exception):
-            statistics["failed_requests"] += 1
-            continue
-
-        if 500 <= result["status"] < 600:  # noqa: PLR2004
-            statistics["failed_requests"] += 1
-        elif 200 <= result["status"] < 300:  # noqa: PLR2004
-            statistics["successful_requests"] += 1
-
-            # Total request time stats
-            statistics["request_time_min"] = min(
-                statistics["request_time_min"],
-                result["request_time"],
-            )
-            statistics["request_time_max"] = max(
-                statistics["request_time_max"],
-                result["request_time"],
-            )
-            request_time_total += result["request_time"]
+    Args:
+        url: URL to request, unless another one is passed to a send; with
+            None, every send must pass one.
+        n_concurrency: Number of requests in flight.
+        method: HTTP method.
+        headers: Request headers.
+        json_data: JSON body of the request.
+        pipeline: Must be 1, aiohttp does not pipeline requests.
+        session: Session to send the requests over instead of opening one,
+            e.g. to share a connection pool between runs; it is left open.
 
-            # TTFB stats
-            statistics["ttfb_min"] = min(
-                statistics["ttfb_min"],
-                result["ttfb"],
-            )
-            statistics["ttfb_max"] = max(
-                statistics["ttfb_max"],
-                result["ttfb"],
-            )
-            ttfb_total += result["ttfb"]
+    Yields:
+        A coroutine function sending one request with ``read_url``, traced
+        to break its latency down into phases. It takes an optional URL and
+        ``read_url`` arguments overriding those of the engine, so that every
+        URL of a mix or a feed shares the session and its connection pool.
 
-            # TTLB stats
-            statistics["ttlb_min"] = min(
-                statistics["ttlb_min"],
-                result["ttlb"],
-            )
-            statistics["ttlb_max"] = max(
-                statistics["ttlb_max"],
-                result["ttlb"],
+    """
+    if pipeline != 1:
+        msg = "The aiohttp engine does not support pipelining"
+        raise ValueError(msg)
+    context = (
+        create_session(n_concurrency) if session is None else nullcontext(session)
+    )
+    async with context as client:
+        defaults = {"method": method, "headers": headers, "json_data": json_data}
+
+        async def fetch(target: str | None = url, **fields: Any) -> dict[str, Any]:  # noqa: ANN401
+            return await read_url(
+                url=target, session=client, **{**defaults, **fields},
             )
-            ttlb_total += result["ttlb"]
 
-    statistics["request_time_mean"] = (
-        request_time_total / statistics["successful_requests"]
-        if statistics["successful_requests"] > 0 else 0
-    )
-    statistics["ttfb_mean"] = (
-        ttfb_total / statistics["successful_requests"]
-        if statistics["successful_requests"] > 0 else 0
-    )
-    statistics["ttlb_mean"] = (
-        ttlb_total / statistics["successful_requests"]
-        if statistics["successful_requests"] > 0 else 0
-    )
-    statistics["requests_per_second"] = (
-        statistics["successful_requests"] / total_time
-        if total_time > 0 else 0
+        yield fetch
+
+
+def create_session(n_concurrency: int) -> aiohttp.ClientSession:
+    """Create a session sized for ``n_concurrency`` requests in flight.
+
+    The session is traced to break the latency of requests down into phases.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=n_concurrency),
+        trace_configs=[create_trace_config()],
     )
 
-    # Reset min/max values to 0 if no successful requests
-    if statistics["successful_requests"] == 0:
-        statistics["request_time_min"] = 0
-        statistics["request_time_max"] = 0
-        statistics["ttfb_min"] = 0
-        statistics["ttfb_max"] = 0
-        statistics["ttlb_min"] = 0
-        statistics["ttlb_max"] = 0
 
-    return statistics
+# HTTP client engines by name; each one opens a pool and yields a coroutine
+# function sending one request.
+ENGINES = {
+    "aiohttp": aiohttp_engine,
+    "raw": raw_engine,
+}
+
+
+def _shift_latencies(result: dict[str, Any], lag: float) -> dict[str, Any]:
+    """Measure the latencies of a result from its intended send time."""
+    return {
+        **result,
+        "ttfb": result["ttfb"] + lag,
+        "ttlb": result["ttlb"] + lag,
+        "request_time": result["request_time"] + lag,
+    }
 
 
-async def load_tester(  # noqa: PLR0913
-    url: str, n_request: int, n_concurrency: int,
+def _calculate_statistics(
+    results: list[dict[str, Any] | Exception], total_time: float,
+) -> dict[str, Any]:
+    """Calculate statistics from the results of the load test."""
+    recorder = StatsRecorder()
+    for result in results:
+        recorder.record(result)
+    return recorder.summary(total_time)
+
+
+async def load_tester(  # noqa: C901, PLR0912, PLR0913, PLR0915
+    url: str | UrlMix | RequestFeed, n_request: int | None, n_concurrency: int,
     method: str = "GET", headers: dict[str, str] | None = None,
     json_data: dict[str, Any] | None = None,
+    *,
+    samples: SampleBuffer | None = None,
+    sample_log: SampleLog | None = None,
+    duration: float | None = None,
+    grace_period: float | None = DEFAULT_GRACE_PERIOD,
+    rate: float | None = None,
+    arrival: str = "constant",
+    profile: LoadProfile | None = None,
+    profile_target: str = "concurrency",
+    profile_share: tuple[int, int] = (0, 1),
+    engine: str = "aiohttp",
+    pipeline: int = 1,
+    on_interval: IntervalListener | None = None,
+    warmup: bool = False,
+    wait_start: Callable[[], Awaitable[None]] | None = None,
+    counter: RequestCounter | None = None,
+    session: aiohttp.ClientSession | None = None,
 ) -> dict[str, Any]:
-    """Run a load test on a URL."""
-    results: list = []
-    connector = aiohttp.TCPConnector(limit=n_concurrency)
+    """Run a load test on a URL.
 
-    start_time = time.perf_counter()
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [read_url(
-            url=url,
-            session=session,
-            method=method,
-            headers=headers,
-            json_data=json_data,
-        ) for _ in range(n_request)]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    Exactly ``n_concurrency`` worker coroutines are started and each one pulls
+    request tickets from a shared counter, so memory stays proportional to the
+    concurrency instead of to the number of requests. Results are recorded
+    into a streaming ``StatsRecorder`` as they complete. When ``samples`` is
+    given, every result is also written into it and the reported statistics
+    are computed exactly from the raw samples. When ``sample_log`` is given,
+    every result is appended to it on disk as well.
+
+    With a ``duration``, no new request is issued once it has elapsed;
+    requests still in flight get ``grace_period`` seconds to finish and are
+    then cancelled and reported as ``cancelled_requests``. Throughput is
+    always computed over the measured window, drain included. The lag of the
+    event loop is sampled throughout, so that a saturated load generator is
+    reported as such instead of as server latency.
+
+    With a ``rate``, the test runs open-loop: request start times follow an
+    ``ArrivalSchedule`` on the event loop clock instead of waiting for the
+    previous request, latencies are measured from the intended send time,
+    and requests that started late because every worker was busy are
+    reported as ``delayed_requests``; with a ``duration``, requests due
+    before it ends that were still held back at the deadline are reported
+    as ``missed_requests`` and counted as delayed.
+
+    With a ``profile``, its stages drive the concurrency (up to
+    ``profile.peak`` workers) or, with ``profile_target="rate"``, the arrival
+    rate (with ``n_concurrency`` workers) for ``profile.duration`` seconds,
+    and statistics are also broken down per stage under ``stages``. A
+    concurrency profile split between generators gives each one a
+    ``profile_share``, as described in ``profiled_worker``.
+
+    Requests go through one of the ``ENGINES``: ``aiohttp`` by default, or
+    ``raw``, which writes pre-encoded requests on asyncio protocols and can
+    pipeline ``pipeline`` requests per connection.
+
+    Results are also aggregated into one-second intervals, returned as the
+    ``timeseries`` list and handed to ``on_interval`` as each one closes.
+
+    The clock starts once the engine is open: with ``warmup``, one request
+    per worker is sent first, and discarded, to open the connection pool;
+    ``wait_start`` is then awaited, letting several generators start their
+    load together.
+
+    A ``UrlMix`` as ``url`` sends every request to one of its URLs, drawn
+    by weight from an ``AliasSampler``, over one session shared by all the
+    URLs; statistics are also broken down per URL under ``urls``. Only the
+    ``aiohttp`` engine sends a mix.
+
+    A ``RequestFeed`` as ``url`` sends the requests of the feed in turn,
+    each with its own URL, method, headers and body over defaults taken
+    from the arguments, through the ``aiohttp`` engine. The run ends with
+    the feed if its budget is not spent first.
+
+    A ``session`` created with ``create_session`` is used by the ``aiohttp``
+    engine instead of its own, so that runs side by side can share it.
+
+    A ``counter`` replaces the request budget of ``n_request`` and
+    ``duration``, e.g. a ``LeasedCounter`` granted requests by a coordinator
+    while the test runs; ``n_request`` should then be None.
+    """
+    if engine not in ENGINES:
+        msg = f"Unsupported engine: {engine}"
+        raise ValueError(msg)
+    mix = url if isinstance(url, UrlMix) else None
+    feed = url if isinstance(url, RequestFeed) else None
+    if (mix is not None or feed is not None) and engine != "aiohttp":
+        msg = f"The {engine} engine cannot send a URL mix or a request feed"
+        raise ValueError(msg)
+    if session is not None and engine != "aiohttp":
+        msg = f"The {engine} engine cannot share an aiohttp session"
+        raise ValueError(msg)
+    if profile is not None:
+        duration = profile.duration
+        if profile_target == "concurrency":
+            n_concurrency = len(profile_slots(profile, profile_share))
+    recorder = StatsRecorder()
+    stages = StageRecorder(profile) if profile is not None else None
+    targets = UrlRecorder(mix) if mix is not None else None
+    sampler = mix.sampler() if mix is not None else None
+    sinks: list[ResultSink] = [recorder.record]
+    if samples is not None:
+        sinks.append(samples.record)
+    if sample_log is not None:
+        sinks.append(sample_log.record)
+    timeseries = IntervalAggregator(
+        listeners=[on_interval] if on_interval is not None else None,
+    )
+    sinks.append(timeseries.record)
+    in_flight = 0
+
+    async def send(lag: float = 0.0) -> None:
+        nonlocal in_flight
+        if feed is not None and (request := await feed.next()) is None:
+            counter.stop()
+            return
+        sent_at = time.perf_counter()
+        target = sampler.sample() if sampler is not None else 0
+        in_flight += 1
+        try:
+            if mix is not None:
+                result = await fetch(mix.urls[target])
+            elif feed is not None:
+                result = await fetch(request[0], **request[1])
+            else:
+                result = await fetch()
+        except Exception as e:  # noqa: BLE001
+            result = e
+        else:
+            if lag > 0:
+                result = _shift_latencies(result, lag)
+        in_flight -= 1
+        for record in sinks:
+            record(result)
+        if stages is not None:
+            stages.record(result, sent_at - lag - start_time)
+        if targets is not None:
+            targets.record(result, target)
+
+    n_workers = (
+        n_concurrency if n_request is None else min(n_concurrency, n_request)
+    )
+    monitor = LoopLagMonitor(recorder.loop_lag)
+    if mix is not None:
+        url = mix.urls[0]
+    elif feed is not None:
+        url = None
+    async with ENGINES[engine](
+        url, n_concurrency,
+        method, headers, json_data, pipeline,
+        **({"session": session} if session is not None else {}),
+    ) as fetch, feed if feed is not None else nullcontext():
+        if warmup:
+            # Open every connection of the pool before the clock starts.
+            await asyncio.gather(
+                *(fetch() for _ in range(n_workers)), return_exceptions=True,
+            )
+        if wait_start is not None:
+            await wait_start()
+        started_at = time.time()
+        start_time = time.perf_counter()
+        if sample_log is not None:
+            sample_log.start(started_at, start_time)
+        deadline = start_time + duration if duration is not None else None
+        if counter is None:
+            counter = RequestCounter(n_request, deadline)
+        else:
+            counter.deadline = deadline
+        worker = build_worker(
+            counter, send, recorder.record_schedule_lag,
+            rate=rate, arrival=arrival, profile=profile,
+            profile_target=profile_target, profile_share=profile_share,
+            duration=duration, on_missed=recorder.record_missed,
+        )
+        monitor.start()
+        timeseries.start()
+        recorder.cancelled_requests = await run_worker_pool(
+            n_workers, worker, deadline, grace_period, lambda: in_flight,
+        )
+    await timeseries.stop()
+    await monitor.stop()
     total_time = time.perf_counter() - start_time
 
-    return _calculate_statistics(results, total_time)
+    statistics = recorder.summary(total_time)
+    statistics["started_at"] = started_at
+    statistics["finished_at"] = started_at + total_time
+    if samples is not None:
+        statistics.update(samples.summary(total_time))
+    if stages is not None:
+        statistics["stages"] = stages.summary()
+    if targets is not None:
+        statistics["urls"] = targets.summary(total_time)
+    statistics["timeseries"] = list(timeseries.points)
+    return statistics
+
+
+# Console titles of the request phases.
+PHASE_TITLES = {
+    "queue_wait": "Connection Pool Wait (s)",
+    "dns": "DNS Resolution (s)",
+    "connect": "Connect (s)",
+    "tls": "TLS Handshake (s)",
+    "request_sent": "Request Sent (s)",
+    "server_time": "Server Time to First Byte (s)",
+}
 
 
-def _display_results(results: dict[str, Any], name: str | None = None) -> None:
+def _display_results(results: dict[str, Any], name: str | None = None) -> None:  # noqa: C901, PLR0912
     """Print the results of the load test."""
     if name:
         print(f"-> Testing URL: {name}")
@@ -160,10 +381,40 @@ def _display_results(results: dict[str, Any], name: str | None = None) -> None:
         f"{results['successful_requests']}",
     )
     print(f" Failed Requests (5XX)......................: {results['failed_requests']}")
+    if results.get("cancelled_requests"):
+        print(
+            " Cancelled Requests (in flight at deadline).:",
+            f"{results['cancelled_requests']}",
+        )
     print(
         " Requests/second............................:",
         f"{results['requests_per_second']:.2f}",
     )
+    if "scheduled_requests" in results:
+        print(
+            " Delayed Requests (concurrency cap).........:",
+            f"{results['delayed_requests']} of {results['scheduled_requests']}"
+            + (
+                f" ({results['missed_requests']} never sent)"
+                if results.get("missed_requests") else ""
+            ),
+        )
+        print(
+            " Schedule Lag (s) (Mean, p99, Max)..........:",
+            f"{results['schedule_lag_mean']:.2f}, {results['schedule_lag_p99']:.2f}, "
+            f"{results['schedule_lag_max']:.2f}",
+        )
+    if "replay_requests" in results:
+        print(
+            " Replayed Requests (log span s, speedup)....:",
+            f"{results['replay_requests']} ({results['replay_span']:.2f}, "
+            f"x{results['speedup']:g})",
+        )
+    if "elapsed_time" in results:
+        print(
+            " Elapsed Time (s)...........................:",
+            f"{results['elapsed_time']:.2f}",
+        )
     print()
     print(
         "Total Request Time (s) (Min, Max, Mean).....: ",
@@ -180,4 +431,68 @@ def _display_results(results: dict[str, Any], name: str | None = None) -> None:
         f"{results['ttlb_min']:.2f}, {results['ttlb_max']:.2f}, "
         f"{results['ttlb_mean']:.2f}",
     )
+    if results.get("generator_saturated"):
+        print(
+            "\nWarning: the load generator's event loop lagged by "
+            f"{results['loop_lag_p99'] * 1000:.1f} ms (p99). Latencies include "
+            "client-side delay; add --processes or try --loop uvloop.",
+        )
+    print()
+    labels = ", ".join(f"p{percent:g}" for percent in PERCENTILES)
+    print(f"Percentiles ({labels})")
+    for metric, title in (
+        ("request_time", "Total Request Time (s)"),
+        ("ttfb", "Time to First Byte (s)"),
+        ("ttlb", "Time to Last Byte (s)"),
+    ):
+        values = ", ".join(
+            f"{results[percentile_key(metric, percent)]:.2f}"
+            for percent in PERCENTILES
+        )
+        print(f" {title}".ljust(44, ".") + ":", values)
+    phases = [phase for phase in PHASE_METRICS if f"{phase}_count" in results]
+    if phases:
+        print("\nRequest Phases (count, mean, p99, max)")
+    for phase in phases:
+        print(
+            f" {PHASE_TITLES[phase]}".ljust(44, ".") + ":",
+            f"{results[f'{phase}_count']}, {results[f'{phase}_mean']:.4f}, "
+            f"{results[percentile_key(phase, 99)]:.4f}, "
+            f"{results[f'{phase}_max']:.4f}",
+        )
+    for index, process in enumerate(results.get("processes", []), 1):
+        print(
+            f" Process {index} Requests (2XX), Req/s".ljust(44, ".") + ":",
+            f"{process['successful_requests']}, "
+            f"{process['requests_per_second']:.2f}",
+        )
+    for index, worker in enumerate(results.get("workers", []), 1):
+        leases = f", {worker['leases']} leases" if "leases" in worker else ""
+        print(
+            f" Worker {index} Requests (2XX), Req/s".ljust(44, ".") + ":",
+            f"{worker['successful_requests']}, "
+            f"{worker['requests_per_second']:.2f} ({worker['worker']}{leases})",
+        )
+    if results.get("urls"):
+        print("\nURLs (weight, 2XX, 5XX, Req/s, p99)")
+    for entry in results.get("urls", []):
+        print(
+            f" {entry['url']}",
+            f"{entry['weight']:g}, {entry['successful_requests']}, "
+            f"{entry['failed_requests']}, {entry['requests_per_second']:.2f}, "
+            f"{entry['request_time_p99']:.2f}",
+        )
+    for stage in results.get("stages", []):
+        print()
+        print(f"Stage: {stage['stage']} (from {stage['start']:g}s)")
+        print(
+            " Total Requests (2XX), Failed (5XX), Req/s..:",
+            f"{stage['successful_requests']}, {stage['failed_requests']}, "
+            f"{stage['requests_per_second']:.2f}",
+        )
+        print(
+            " Total Request Time (s) (p50, p99, Max).....:",
+            f"{stage['request_time_p50']:.2f}, {stage['request_time_p99']:.2f}, "
+            f"{stage['request_time_max']:.2f}",
+        )
     print("-" * 80)
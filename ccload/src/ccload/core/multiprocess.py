@@ -0,0 +1,161 @@
+"""Multi-process load generation on a single host."""
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.synchronize import Barrier
+from typing import Any
+
+from ccload.core import event_loop
+from ccload.core.load_tester_features import load_tester
+from ccload.core.profile import LoadProfile
+from ccload.core.samples import SampleBuffer
+from ccload.core.statistics import breakdown_entry, merge_statistics
+from ccload.core.timeseries import merge_timeseries
+from ccload.core.url_mix import UrlMix
+
+# Seconds the processes wait for each other to start before giving up.
+START_TIMEOUT = 60
+
+
+def partition(total: int, parts: int) -> list[int]:
+    """Split ``total`` into ``parts`` shares that differ by at most one.
+
+    Args:
+        total: Amount to split.
+        parts: Number of shares.
+
+    """
+    share, remainder = divmod(total, parts)
+    return [share + (1 if i < remainder else 0) for i in range(parts)]
+
+
+def _process_main(  # noqa: PLR0913
+    conn: Connection,
+    barrier: Barrier,
+    args: tuple[Any, ...],
+    options: dict[str, Any],
+    keep_samples: bool,  # noqa: FBT001
+    loop: str,
+) -> None:
+    """Run one share of a load test and send its results back to the parent."""
+    try:
+        samples = SampleBuffer() if keep_samples else None
+        barrier.wait()
+        statistics = event_loop.run(
+            load_tester(*args, samples=samples, **options), loop,
+        )
+        conn.send((statistics, samples))
+    except Exception as e:  # noqa: BLE001
+        conn.send(e)
+    finally:
+        conn.close()
+
+
+def _collect(
+    processes: list[tuple[multiprocessing.Process, Connection]],
+) -> list[tuple[dict[str, Any], SampleBuffer | None]]:
+    """Receive the results of every process, raising the first failure."""
+    replies = []
+    for process, conn in processes:
+        try:
+            replies.append(conn.recv())
+        except EOFError:
+            replies.append(
+                RuntimeError(f"Load test process exited with {process.exitcode}"),
+            )
+        process.join()
+    for reply in replies:
+        if isinstance(reply, Exception):
+            raise reply
+    return replies
+
+
+def run_multiprocess_load_test(  # noqa: PLR0913
+    url: str | UrlMix,
+    n_request: int | None,
+    n_concurrency: int,
+    n_processes: int,
+    *,
+    samples: SampleBuffer | None = None,
+    rate: float | None = None,
+    profile: LoadProfile | None = None,
+    loop: str = "asyncio",
+    **options: Any,  # noqa: ANN401
+) -> dict[str, Any]:
+    """Run a load test split across ``n_processes`` event-loop processes.
+
+    The request budget, the concurrency, the arrival rate and the profile
+    levels are divided between the processes, which start together behind a
+    barrier. No more processes are started than there are concurrent
+    requests, and a concurrency profile is split by slot rather than
+    scaled, so that the processes never run more requests at once than
+    asked for. Each process sends its statistics (and its raw samples, when
+    ``samples`` is given) back through a pipe, and they are merged into one
+    report with a per-process breakdown under ``processes``. Interval
+    listeners cannot cross process boundaries, so the time series is only
+    available once every process has finished.
+
+    Args:
+        url: URL or URL mix to test.
+        n_request: Total number of requests, or None for no limit.
+        n_concurrency: Total number of concurrent requests.
+        n_processes: Number of processes to spawn.
+        samples: Buffer receiving the raw samples of every process.
+        rate: Total open-loop arrival rate.
+        profile: Load profile of the whole run.
+        loop: Event-loop backend of the processes.
+        **options: Other keyword arguments of ``load_tester``.
+
+    Returns:
+        The merged statistics.
+
+    """
+    split_slots = (
+        profile is not None
+        and options.get("profile_target", "concurrency") == "concurrency"
+    )
+    limit = profile.peak if split_slots else n_concurrency
+    if n_request is not None:
+        limit = min(limit, n_request)
+    n_processes = max(1, min(n_processes, limit))
+    requests = (
+        partition(n_request, n_processes) if n_request is not None
+        else [None] * n_processes
+    )
+    concurrency = [max(share, 1) for share in partition(n_concurrency, n_processes)]
+    if rate is not None:
+        options["rate"] = rate / n_processes
+    if profile is not None:
+        options["profile"] = profile if split_slots else profile.scaled(1 / n_processes)
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_processes, timeout=START_TIMEOUT)
+    processes = []
+    for index, (share, workers) in enumerate(zip(requests, concurrency, strict=True)):
+        process_options = (
+            {**options, "profile_share": (index, n_processes)} if split_slots
+            else options
+        )
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_process_main,
+            args=(
+                child_conn, barrier, (url, share, workers), process_options,
+                samples is not None, loop,
+            ),
+        )
+        process.start()
+        child_conn.close()
+        processes.append((process, parent_conn))
+
+    replies = _collect(processes)
+    results = [statistics for statistics, _ in replies]
+    merged = merge_statistics(results)
+    merged["timeseries"] = merge_timeseries(
+        [result["timeseries"] for result in results],
+    )
+    if samples is not None:
+        for _, process_samples in replies:
+            samples.extend(process_samples)
+        merged.update(samples.summary(merged["elapsed_time"]))
+    merged["processes"] = [breakdown_entry(result) for result in results]
+    return merged
@@ -0,0 +1,212 @@
+"""Staged load profiles: ramp, hold, step and spike shapes."""
+import math
+from typing import Any
+
+
+class Stage:
+    """A single stage of a load profile.
+
+    Shapes:
+        ramp: move linearly from the previous level to ``target``.
+        hold: keep the previous level; ``target`` is ignored.
+        step: jump to ``target`` and hold it.
+        spike: jump to ``target`` for the stage, then return to the previous
+            level when the stage ends.
+    """
+
+    SHAPES = ("ramp", "hold", "step", "spike")
+
+    def __init__(
+        self, shape: str, duration: float, target: float | None = None,
+    ) -> None:
+        """Initialize a stage.
+
+        Args:
+            shape: One of ``SHAPES``.
+            duration: Length of the stage in seconds.
+            target: Concurrency or arrival rate the stage moves to.
+
+        """
+        if shape not in self.SHAPES:
+            msg = f"Unsupported stage shape: {shape}"
+            raise ValueError(msg)
+        if duration <= 0:
+            msg = "Stage duration must be positive"
+            raise ValueError(msg)
+        if shape != "hold" and (target is None or target < 0):
+            msg = f"A {shape} stage needs a non-negative target"
+            raise ValueError(msg)
+        self.shape = shape
+        self.duration = duration
+        self.target = target
+        # Filled in by LoadProfile.
+        self.start = 0.0
+        self.from_level = 0.0
+        self.to_level = 0.0
+
+    @property
+    def end(self) -> float:
+        """Offset of the end of the stage, in seconds from the start."""
+        return self.start + self.duration
+
+    @property
+    def name(self) -> str:
+        """Human-readable description of the stage."""
+        if self.shape == "hold":
+            return f"hold {self.duration:g}s at {self.from_level:g}"
+        return f"{self.shape} {self.duration:g}s to {self.target:g}"
+
+    def level_at(self, offset: float) -> float:
+        """Return the level at ``offset`` seconds from the start of the run."""
+        fraction = min(max((offset - self.start) / self.duration, 0), 1)
+        return self.from_level + (self.to_level - self.from_level) * fraction
+
+
+class LoadProfile:
+    """Sequence of stages driving the concurrency or arrival rate of a run."""
+
+    def __init__(self, stages: list[Stage], start_level: float = 0) -> None:
+        """Initialize the profile and lay the stages out on a timeline.
+
+        Args:
+            stages: Stages in the order they run.
+            start_level: Level before the first stage.
+
+        """
+        if not stages:
+            msg = "A load profile needs at least one stage"
+            raise ValueError(msg)
+        self.stages = stages
+        self.start_level = start_level
+        level = start_level
+        offset = 0.0
+        for stage in stages:
+            stage.start = offset
+            if stage.shape == "ramp":
+                stage.from_level, stage.to_level = level, stage.target
+                level = stage.target
+            elif stage.shape == "hold":
+                stage.from_level = stage.to_level = level
+            else:
+                stage.from_level = stage.to_level = stage.target
+                if stage.shape == "step":
+                    level = stage.target
+            offset = stage.end
+
+    @classmethod
+    def parse(cls, spec: str) -> "LoadProfile":
+        """Parse a profile such as ``ramp:30:100,hold:60,spike:5:500``.
+
+        Each comma-separated stage is ``shape:duration[:target]``, with the
+        duration in seconds.
+
+        Args:
+            spec: Profile specification.
+
+        """
+        stages = []
+        for item in spec.split(","):
+            parts = item.strip().split(":")
+            if len(parts) not in {2, 3}:
+                msg = f"Invalid stage {item!r}, expected shape:duration[:target]"
+                raise ValueError(msg)
+            target = float(parts[2]) if len(parts) == 3 else None  # noqa: PLR2004
+            stages.append(Stage(parts[0], float(parts[1]), target))
+        return cls(stages)
+
+    @classmethod
+    def from_list(cls, stages: list[dict[str, Any]]) -> "LoadProfile":
+        """Build a profile from the ``stages`` list of a script entry.
+
+        Args:
+            stages: Dictionaries with ``duration``, an optional ``target`` and
+                an optional ``shape`` (``ramp`` by default).
+
+        """
+        return cls([
+            Stage(
+                stage.get("shape", "ramp"),
+                float(stage["duration"]),
+                stage.get("target"),
+            )
+            for stage in stages
+        ])
+
+    def scaled(self, factor: float) -> "LoadProfile":
+        """Return a copy of the profile with every level multiplied by ``factor``.
+
+        Args:
+            factor: Scale of the levels, e.g. ``1 / n`` to split the load
+                between ``n`` generators.
+
+        """
+        return LoadProfile(
+            [
+                Stage(
+                    stage.shape,
+                    stage.duration,
+                    None if stage.target is None else stage.target * factor,
+                )
+                for stage in self.stages
+            ],
+            self.start_level * factor,
+        )
+
+    @property
+    def duration(self) -> float:
+        """Total length of the profile in seconds."""
+        return self.stages[-1].end
+
+    @property
+    def peak(self) -> int:
+        """Highest level reached by the profile, rounded up."""
+        return math.ceil(max(
+            max(stage.from_level, stage.to_level) for stage in self.stages
+        ))
+
+    def stage_index(self, offset: float) -> int:
+        """Return the index of the stage running at ``offset`` seconds."""
+        for index, stage in enumerate(self.stages):
+            if offset < stage.end:
+                return index
+        return len(self.stages) - 1
+
+    def level_at(self, offset: float) -> float:
+        """Return the level at ``offset`` seconds, or 0 after the profile."""
+        if offset >= self.duration:
+            return 0
+        return self.stages[self.stage_index(offset)].level_at(offset)
+
+    def advance(self, offset: float, amount: float) -> float:
+        """Return the offset at which the integral of the level grows by ``amount``.
+
+        Used to schedule arrivals when the profile drives an arrival rate:
+        the next request is due when the expected number of arrivals since
+        the previous one reaches ``amount``.
+
+        Args:
+            offset: Starting offset in seconds.
+            amount: Area to accumulate, in level-seconds.
+
+        Returns:
+            The offset in seconds, or ``math.inf`` past the end of the profile.
+
+        """
+        for stage in self.stages[self.stage_index(offset):]:
+            start = max(offset, stage.start)
+            if start >= stage.end:
+                continue
+            level = stage.level_at(start)
+            slope = (stage.to_level - stage.from_level) / stage.duration
+            span = stage.end - start
+            area = level * span + slope * span * span / 2
+            if area < amount:
+                amount -= area
+                continue
+            if slope == 0:
+                return start + amount / level
+            # Solve level * x + slope / 2 * x**2 = amount for x.
+            return start + (
+                math.sqrt(level * level + 2 * slope * amount) - level
+            ) / slope
+        return math.inf
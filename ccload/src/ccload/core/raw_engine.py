@@ -0,0 +1,537 @@
+"""Low-overhead HTTP/1.1 engine built directly on asyncio protocols."""
+import asyncio
+import json
+import math
+import socket
+import ssl
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+from urllib.parse import urlsplit
+
+# Seconds a request may take, connection setup included, before it fails;
+# the default total timeout of aiohttp.
+REQUEST_TIMEOUT = 300.0
+
+# Statuses whose responses never carry a body.
+NO_BODY_STATUSES = frozenset({204, 304})
+
+# Parser states.
+_HEAD = 0
+_BODY = 1
+_CHUNK_SIZE = 2
+_CHUNK_DATA = 3
+_TRAILER = 4
+_UNTIL_CLOSE = 5
+
+
+def encode_request(
+    url: str,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    json_data: dict[str, Any] | None = None,
+) -> bytes:
+    """Encode an HTTP/1.1 request once, to be written as-is on every send.
+
+    Args:
+        url: URL to request.
+        method: HTTP method.
+        headers: Extra request headers.
+        json_data: JSON body of the request.
+
+    Returns:
+        The request line, headers and body.
+
+    """
+    parts = urlsplit(url)
+    target = parts.path or "/"
+    if parts.query:
+        target += f"?{parts.query}"
+    fields = {
+        "Host": parts.netloc,
+        "User-Agent": "ccload",
+        "Accept": "*/*",
+    }
+    body = b""
+    if json_data is not None:
+        body = json.dumps(json_data).encode()
+        fields["Content-Type"] = "application/json"
+    if body or method.upper() in {"POST", "PUT", "PATCH"}:
+        fields["Content-Length"] = str(len(body))
+    fields.update(headers or {})
+    head = f"{method.upper()} {target} HTTP/1.1\r\n" + "".join(
+        f"{name}: {value}\r\n" for name, value in fields.items()
+    )
+    return f"{head}\r\n".encode("latin-1") + body
+
+
+class ResponseParser:
+    """Incremental parser for a stream of HTTP/1.1 responses.
+
+    Only the status line and the framing headers (``Content-Length``,
+    ``Transfer-Encoding`` and ``Connection``) are looked at; bodies are
+    skipped without being copied out of the buffer, only their size is
+    counted.
+    """
+
+    def __init__(self, head_request: bool = False) -> None:  # noqa: FBT001, FBT002
+        """Initialize the parser.
+
+        Args:
+            head_request: Whether the responses answer HEAD requests, which
+                have no body whatever their headers say.
+
+        """
+        self.head_request = head_request
+        self._buffer = bytearray()
+        self._state = _HEAD
+        self._remaining = 0
+        self._status = 0
+        self._size = 0
+        self.keep_alive = True
+
+    @property
+    def in_progress(self) -> bool:
+        """Whether part of a response has been received."""
+        return self._state != _HEAD or bool(self._buffer)
+
+    def feed(self, data: bytes) -> list[tuple[int, int]]:
+        """Feed received bytes.
+
+        Args:
+            data: Bytes received from the server.
+
+        Returns:
+            The status and body size in bytes of the responses completed by
+            ``data``.
+
+        """
+        self._buffer += data
+        completed = []
+        while True:
+            status = self._step()
+            if status is None:
+                return completed
+            if status:
+                completed.append((status, self._size))
+
+    def feed_eof(self) -> tuple[int, int] | None:
+        """Signal that the server closed the connection.
+
+        Returns:
+            The status and body size of a response delimited by the close,
+            if any.
+
+        """
+        if self._state == _UNTIL_CLOSE:
+            self._state = _HEAD
+            return self._status, self._size
+        return None
+
+    def _step(self) -> int | None:  # noqa: C901, PLR0911, PLR0912
+        """Advance by one parsing step.
+
+        Returns:
+            The status of a completed response, 0 if progress was made
+            without completing one, or None if more data is needed.
+
+        """
+        buffer = self._buffer
+        if self._state == _HEAD:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                return None
+            self._parse_head(bytes(buffer[:end]))
+            del buffer[:end + 4]
+            return 0
+        if self._state == _BODY:
+            taken = min(self._remaining, len(buffer))
+            del buffer[:taken]
+            self._remaining -= taken
+            self._size += taken
+            if self._remaining:
+                return None
+            self._state = _HEAD
+            return self._status
+        if self._state == _UNTIL_CLOSE:
+            self._size += len(buffer)
+            buffer.clear()
+            return None
+        if self._state == _CHUNK_DATA:
+            # Chunk data is followed by CRLF, skipped with it.
+            taken = min(self._remaining, len(buffer))
+            del buffer[:taken]
+            self._remaining -= taken
+            self._size += taken
+            if self._remaining:
+                return None
+            self._state = _CHUNK_SIZE
+            return 0
+        end = buffer.find(b"\r\n")
+        if end < 0:
+            return None
+        line = bytes(buffer[:end])
+        del buffer[:end + 2]
+        if self._state == _TRAILER:
+            if line:
+                return 0
+            self._state = _HEAD
+            return self._status
+        if not line:
+            # CRLF closing the previous chunk.
+            return 0
+        size = int(line.split(b";", 1)[0], 16)
+        if size == 0:
+            self._state = _TRAILER
+        else:
+            self._state = _CHUNK_DATA
+            self._remaining = size
+        return 0
+
+    def _parse_head(self, head: bytes) -> None:
+        """Read the status and the framing of a response head."""
+        lines = head.split(b"\r\n")
+        status_line = lines[0]
+        self._status = int(status_line[9:12])
+        self._size = 0
+        length = None
+        chunked = False
+        close = status_line.startswith(b"HTTP/1.0")
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value.lower()
+            elif name == b"connection":
+                close = b"close" in value.lower()
+        self.keep_alive = not close
+
+        if self._status < 200:  # noqa: PLR2004
+            # Interim response, the final one follows.
+            self._state = _HEAD
+            self._status = 0
+        elif self.head_request or self._status in NO_BODY_STATUSES:
+            self._state, self._remaining = _BODY, 0
+        elif chunked:
+            self._state = _CHUNK_SIZE
+        elif length is not None:
+            self._state, self._remaining = _BODY, length
+        else:
+            self._state = _UNTIL_CLOSE
+            self.keep_alive = False
+
+
+class UnansweredRequestError(ConnectionResetError):
+    """The server closed the connection before answering a request."""
+
+
+class _Pending:
+    """Timing of a request waiting for its response."""
+
+    __slots__ = ("first_byte", "future", "ready", "sent", "start")
+
+    def __init__(
+        self, future: asyncio.Future, start: float, ready: float, sent: float,
+    ) -> None:
+        self.future = future
+        self.start = start
+        self.ready = ready
+        self.sent = sent
+        self.first_byte: float | None = None
+
+
+class RawHttpProtocol(asyncio.Protocol):
+    """Connection sending pre-encoded requests and timing their responses.
+
+    Requests may be pipelined: responses arrive in request order, so each
+    one completes the oldest pending request.
+    """
+
+    def __init__(self, head_request: bool = False) -> None:  # noqa: FBT001, FBT002
+        """Initialize the protocol.
+
+        Args:
+            head_request: Whether the requests sent are HEAD requests.
+
+        """
+        self._parser = ResponseParser(head_request)
+        self._pending: deque[_Pending] = deque()
+        self._transport: asyncio.Transport | None = None
+        self.closed = False
+        self.answered = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport."""
+        self._transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        """Complete the pending requests whose responses have arrived."""
+        now = time.perf_counter()
+        pending = self._pending
+        if pending and pending[0].first_byte is None:
+            pending[0].first_byte = now
+        for status, size in self._parser.feed(data):
+            self._complete(status, size, now)
+        if pending and pending[0].first_byte is None and self._parser.in_progress:
+            pending[0].first_byte = now
+        if not self._parser.keep_alive and not self._parser.in_progress:
+            self.close()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Fail the requests still waiting for a response."""
+        self.closed = True
+        completed = self._parser.feed_eof()
+        if completed is not None:
+            self._complete(*completed, time.perf_counter())
+        while self._pending:
+            future = self._pending.popleft().future
+            if not future.done():
+                error = UnansweredRequestError(
+                    "Connection closed before the request was answered",
+                )
+                error.__cause__ = exc
+                future.set_exception(error)
+
+    def send(self, payload: bytes, start: float) -> asyncio.Future:
+        """Write a request.
+
+        Args:
+            payload: Encoded request.
+            start: ``time.perf_counter`` value the timings are measured from.
+
+        Returns:
+            A future resolved with the result of the request.
+
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            future.set_exception(UnansweredRequestError("Connection closed"))
+            return future
+        ready = time.perf_counter()
+        self._transport.write(payload)
+        self._pending.append(_Pending(future, start, ready, time.perf_counter()))
+        return future
+
+    def _complete(self, status: int, size: int, now: float) -> None:
+        """Resolve the oldest pending request."""
+        if not self._pending:
+            return
+        pending = self._pending.popleft()
+        self.answered += 1
+        first_byte = now if pending.first_byte is None else pending.first_byte
+        if not pending.future.done():
+            pending.future.set_result({
+                "status": status,
+                "bytes": size,
+                "ttfb": first_byte - pending.start,
+                "ttlb": now - pending.start,
+                "request_time": now - pending.start,
+                "request_sent": pending.sent - pending.ready,
+                "server_time": first_byte - pending.sent,
+            })
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.closed = True
+        if self._transport is not None:
+            self._transport.close()
+
+
+class _Connection:
+    """Lazily (re)opened connection shared by ``pipeline`` request slots."""
+
+    def __init__(self) -> None:
+        self.protocol: RawHttpProtocol | None = None
+        self.lock = asyncio.Lock()
+
+
+class RawHttpClient:
+    """Send one pre-encoded request repeatedly over a pool of connections.
+
+    Every connection carries up to ``pipeline`` requests in flight at once.
+    Results have the same ``status``, ``ttfb``, ``ttlb`` and
+    ``request_time`` fields as ``read_url``, measured from before waiting
+    for a free slot as with aiohttp, and the same request phases, with the
+    TLS handshake timed separately from the TCP connect. Pipelined requests
+    left unanswered by a server closing the connection are resent on a new
+    one. A request taking longer than ``timeout`` seconds fails with
+    ``TimeoutError`` and its connection is closed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        url: str,
+        method: str = "GET",
+        headers: dict[str, str] | None = None,
+        json_data: dict[str, Any] | None = None,
+        *,
+        connections: int = 1,
+        pipeline: int = 1,
+        timeout: float | None = REQUEST_TIMEOUT,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            url: URL to request.
+            method: HTTP method.
+            headers: Extra request headers.
+            json_data: JSON body of the request.
+            connections: Number of connections to open.
+            pipeline: Number of requests in flight on each connection.
+            timeout: Seconds a request may take, or None for no limit.
+
+        """
+        if pipeline < 1:
+            msg = "Pipeline depth must be at least 1"
+            raise ValueError(msg)
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"}:
+            msg = f"Unsupported URL scheme: {parts.scheme}"
+            raise ValueError(msg)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.head_request = method.upper() == "HEAD"
+        self.payload = encode_request(url, method, headers, json_data)
+        self.timeout = timeout
+        self._connections = [_Connection() for _ in range(max(connections, 1))]
+        self._slots: asyncio.Queue[_Connection] = asyncio.Queue()
+        for _ in range(pipeline):
+            for connection in self._connections:
+                self._slots.put_nowait(connection)
+
+    async def request(self) -> dict[str, Any]:
+        """Send the request and wait for its response.
+
+        Returns:
+            The status code, the timings and the phases of the request.
+
+        """
+        start = time.perf_counter()
+        queued = self._slots.empty()
+        connection = await self._slots.get()
+        phases = {"queue_wait": time.perf_counter() - start} if queued else {}
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await self._send(connection, start, phases)
+        except TimeoutError:
+            # Do not leave the next requests queued behind a stuck one.
+            if connection.protocol is not None:
+                connection.protocol.close()
+            raise
+        finally:
+            self._slots.put_nowait(connection)
+
+    async def _send(
+        self, connection: _Connection, start: float, phases: dict[str, float],
+    ) -> dict[str, Any]:
+        """Send the request on a connection, resending it if left unanswered."""
+        while True:
+            protocol = await self._connect(connection, phases)
+            try:
+                result = await protocol.send(self.payload, start)
+            except UnansweredRequestError:
+                # A server closing a connection after answering earlier
+                # requests never saw the pipelined ones; resend them on a new
+                # connection.
+                if not protocol.answered:
+                    raise
+            else:
+                result.update(phases)
+                return result
+
+    async def _connect(
+        self, connection: _Connection, phases: dict[str, float],
+    ) -> RawHttpProtocol:
+        """Return the open protocol of a connection, reopening it if needed.
+
+        The setup phases are added to ``phases`` when this call opens the
+        connection.
+        """
+        protocol = connection.protocol
+        if protocol is not None and not protocol.closed:
+            return protocol
+        async with connection.lock:
+            if connection.protocol is None or connection.protocol.closed:
+                connection.protocol = await self._open(phases)
+            return connection.protocol
+
+    async def _open(self, phases: dict[str, float]) -> RawHttpProtocol:
+        """Resolve the host, connect and run the TLS handshake, timing each."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        addresses = await loop.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM,
+        )
+        resolved = time.perf_counter()
+        error: OSError | None = None
+        for *_, address in addresses:
+            try:
+                transport, protocol = await loop.create_connection(
+                    lambda: RawHttpProtocol(self.head_request),
+                    address[0], self.port,
+                )
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError(f"Could not resolve {self.host}")
+        connected = time.perf_counter()
+        phases["dns"] = resolved - start
+        phases["connect"] = connected - resolved
+        if self.ssl is not None:
+            try:
+                tls_transport = await loop.start_tls(
+                    transport, protocol, self.ssl, server_hostname=self.host,
+                )
+            except BaseException:
+                transport.close()
+                raise
+            # start_tls leaves it to the caller to hand the new transport to
+            # the protocol.
+            protocol.connection_made(tls_transport)
+            phases["tls"] = time.perf_counter() - connected
+        return protocol
+
+    def close(self) -> None:
+        """Close every connection."""
+        for connection in self._connections:
+            if connection.protocol is not None:
+                connection.protocol.close()
+
+
+@asynccontextmanager
+async def raw_engine(  # noqa: PLR0913
+    url: str,
+    n_concurrency: int,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    json_data: dict[str, Any] | None = None,
+    pipeline: int = 1,
+) -> AsyncIterator[Callable[[], Awaitable[dict[str, Any]]]]:
+    """Open a ``RawHttpClient`` sized for ``n_concurrency`` requests in flight.
+
+    Args:
+        url: URL to request.
+        n_concurrency: Number of requests in flight.
+        method: HTTP method.
+        headers: Extra request headers.
+        json_data: JSON body of the request.
+        pipeline: Number of requests in flight on each connection.
+
+    Yields:
+        A coroutine function sending one request.
+
+    """
+    client = RawHttpClient(
+        url, method, headers, json_data,
+        connections=math.ceil(n_concurrency / pipeline), pipeline=pipeline,
+    )
+    try:
+        yield client.request
+    finally:
+        client.close()
@@ -0,0 +1,253 @@
+"""Time-faithful replay of recorded traffic."""
+import asyncio
+import json
+import mmap
+import re
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ccload.core.event_loop import LoopLagMonitor
+from ccload.core.feed import FeedRequest, parse_feed_line
+from ccload.core.load_tester_features import _shift_latencies, aiohttp_engine
+from ccload.core.sample_log import SampleLog
+from ccload.core.samples import SampleBuffer
+from ccload.core.scheduler import OVERDUE_TOLERANCE
+from ccload.core.statistics import ResultSink, StatsRecorder
+from ccload.core.timeseries import IntervalAggregator, IntervalListener
+
+# Seconds before a send time at which the dispatcher stops sleeping and
+# yields to the event loop until the send time, as sleeps overshoot by up to
+# a millisecond.
+REPLAY_SPIN = 0.002
+
+# Request line and timestamp of the common and combined access log formats.
+ACCESS_LOG_LINE = re.compile(
+    rb'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*"',
+)
+ACCESS_LOG_TIME = "%d/%b/%Y:%H:%M:%S %z"
+
+FORMATS = ("jsonl", "access")
+
+
+def _jsonl_timestamp(line: bytes, number: int) -> float:
+    """Return the ``timestamp`` of a JSONL line, in epoch seconds or ISO 8601."""
+    try:
+        timestamp = json.loads(line)["timestamp"]
+    except (ValueError, KeyError, TypeError):
+        msg = f"Replay line {number} has no timestamp"
+        raise ValueError(msg) from None
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp()
+    return float(timestamp)
+
+
+def _access_log_timestamp(line: bytes, number: int) -> float:
+    """Return the timestamp of an access log line."""
+    match = ACCESS_LOG_LINE.match(line)
+    if match is None:
+        msg = f"Replay line {number} is not in the common log format"
+        raise ValueError(msg)
+    return datetime.strptime(  # noqa: DTZ007
+        match["time"].decode(), ACCESS_LOG_TIME,
+    ).timestamp()
+
+
+class ReplayIndex:
+    """Sorted time index of a traffic log, for replaying it in order.
+
+    Only the send offset and the position of every line in the file are
+    kept, 16 bytes per request, and the log is memory-mapped: a request is
+    parsed from its line when it is replayed.
+    """
+
+    def __init__(
+        self, path: str | Path, log_format: str | None = None, base_url: str = "",
+    ) -> None:
+        """Index a traffic log.
+
+        Args:
+            path: Path to the log: JSONL lines as in a ``RequestFeed``, with
+                a ``timestamp``, or a common/combined access log.
+            log_format: ``jsonl`` or ``access``, guessed from the first line
+                by default.
+            base_url: Scheme and host prefixed to the paths of an access log.
+
+        """
+        self.path = Path(path)
+        self.base_url = base_url.rstrip("/")
+        with self.path.open("rb") as f:
+            first = next((line for line in f if line.strip()), b"")
+            self.log_format = log_format or (
+                "jsonl" if first.lstrip().startswith(b"{") else "access"
+            )
+            if self.log_format not in FORMATS:
+                msg = f"Unsupported replay format: {self.log_format}"
+                raise ValueError(msg)
+            if self.log_format == "access" and not self.base_url:
+                msg = "Replaying an access log needs a base URL"
+                raise ValueError(msg)
+            timestamp = (
+                _jsonl_timestamp if self.log_format == "jsonl"
+                else _access_log_timestamp
+            )
+            f.seek(0)
+            times = array("d")
+            positions = array("q")
+            position = 0
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    times.append(timestamp(line, number))
+                    positions.append(position)
+                position += len(line)
+        if not times:
+            msg = f"Replay log {self.path} has no request"
+            raise ValueError(msg)
+        if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+            order = sorted(range(len(times)), key=times.__getitem__)
+            times = array("d", (times[i] for i in order))
+            positions = array("q", (positions[i] for i in order))
+        origin = times[0]
+        self.offsets = array("d", (t - origin for t in times))
+        self.positions = positions
+
+    def __len__(self) -> int:
+        """Return the number of requests of the log."""
+        return len(self.offsets)
+
+    @property
+    def span(self) -> float:
+        """Seconds between the first and the last request of the log."""
+        return self.offsets[-1]
+
+    def request(self, log: mmap.mmap, index: int) -> FeedRequest:
+        """Parse the request at ``index`` in time order from the mapped log."""
+        start = self.positions[index]
+        end = log.find(b"\n", start)
+        line = log[start:end if end != -1 else len(log)]
+        if self.log_format == "jsonl":
+            return parse_feed_line(line, index + 1)
+        match = ACCESS_LOG_LINE.match(line)
+        return f"{self.base_url}{match['path'].decode()}", {
+            "method": match["method"].decode(),
+        }
+
+
+async def _wait_until(loop: asyncio.AbstractEventLoop, due: float) -> None:
+    """Wait until ``due`` on the event loop clock, to within a fraction of a ms."""
+    while (delay := due - loop.time()) > 0:  # noqa: ASYNC110
+        await asyncio.sleep(delay - REPLAY_SPIN if delay > REPLAY_SPIN else 0)
+
+
+async def replay_tester(  # noqa: C901, PLR0913, PLR0915
+    index: ReplayIndex,
+    n_concurrency: int,
+    *,
+    speedup: float = 1.0,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    json_data: dict[str, Any] | None = None,
+    samples: SampleBuffer | None = None,
+    sample_log: SampleLog | None = None,
+    on_interval: IntervalListener | None = None,
+) -> dict[str, Any]:
+    """Replay a traffic log open-loop, keeping its inter-arrival times.
+
+    A dispatcher sends every request at its offset in the log divided by
+    ``speedup``, without waiting for the previous ones, so that the server
+    sees the recorded arrival pattern whatever its response times. At most
+    ``n_concurrency`` requests are in flight; a request that cannot start
+    because all of them are busy is sent late and counted as delayed. How
+    late each request started is reported as the schedule lag, and
+    latencies are measured from the intended send time, as in an open-loop
+    ``load_tester`` run.
+
+    Args:
+        index: Time index of the log.
+        n_concurrency: Maximum number of requests in flight.
+        speedup: Factor compressing (above 1) or stretching (below 1) the
+            timeline of the log.
+        method: Default HTTP method of the requests.
+        headers: Default request headers.
+        json_data: Default JSON body.
+        samples: Buffer receiving every raw sample.
+        sample_log: Log every raw sample is appended to.
+        on_interval: Called with every point of the time series.
+
+    Returns:
+        The statistics of the run, as returned by ``load_tester``, with the
+        number of requests, span and ``speedup`` of the log.
+
+    """
+    if speedup <= 0:
+        msg = "Replay speedup must be positive"
+        raise ValueError(msg)
+    recorder = StatsRecorder()
+    sinks: list[ResultSink] = [recorder.record]
+    if samples is not None:
+        sinks.append(samples.record)
+    if sample_log is not None:
+        sinks.append(sample_log.record)
+    timeseries = IntervalAggregator(
+        listeners=[on_interval] if on_interval is not None else None,
+    )
+    sinks.append(timeseries.record)
+    monitor = LoopLagMonitor(recorder.loop_lag)
+    slots = asyncio.Semaphore(n_concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def send(request: FeedRequest, lag: float) -> None:
+        try:
+            result = await fetch(request[0], **request[1])
+        except Exception as e:  # noqa: BLE001
+            result = e
+        else:
+            result = _shift_latencies(result, lag)
+        finally:
+            slots.release()
+        for record in sinks:
+            record(result)
+
+    in_flight: set[asyncio.Task] = set()
+    with index.path.open("rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ,
+    ) as log:
+        async with aiohttp_engine(
+            None, n_concurrency, method, headers, json_data,
+        ) as fetch:
+            started_at = time.time()
+            start_time = time.perf_counter()
+            if sample_log is not None:
+                sample_log.start(started_at, start_time)
+            monitor.start()
+            timeseries.start()
+            start = loop.time()
+            for position, offset in enumerate(index.offsets):
+                due = start + offset / speedup
+                await _wait_until(loop, due)
+                busy = slots.locked()
+                await slots.acquire()
+                lag = max(loop.time() - due, 0)
+                recorder.record_schedule_lag(
+                    lag, delayed=busy and lag > OVERDUE_TOLERANCE,
+                )
+                task = asyncio.create_task(send(index.request(log, position), lag))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            await asyncio.gather(*in_flight)
+    await timeseries.stop()
+    await monitor.stop()
+    total_time = time.perf_counter() - start_time
+
+    statistics = recorder.summary(total_time)
+    statistics["started_at"] = started_at
+    statistics["finished_at"] = started_at + total_time
+    statistics["replay_requests"] = len(index)
+    statistics["replay_span"] = index.span
+    statistics["speedup"] = speedup
+    if samples is not None:
+        statistics.update(samples.summary(total_time))
+    statistics["timeseries"] = list(timeseries.points)
+    return statistics
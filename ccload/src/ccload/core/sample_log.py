@@ -0,0 +1,293 @@
+"""Binary log of raw per-request samples, written to disk during the run."""
+import contextlib
+import csv
+import math
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any
+
+import aiohttp
+
+from ccload.core.samples import ERROR_STATUS
+from ccload.core.statistics import LATENCY_METRICS, PHASE_METRICS, StatsRecorder
+
+# File signature and version, followed by the ``time.time`` of the start of
+# the log as a float64.
+MAGIC = b"CCLSAMP1"
+HEADER = struct.Struct("<8sd")
+
+# One sample: completion offset in seconds from the start of the log
+# (float64), the latency metrics and request phases in seconds (float32,
+# NaN for a phase that did not happen), the status, the error kind and the
+# body size in bytes; 52 bytes.
+RECORD = struct.Struct(f"<d{len(LATENCY_METRICS) + len(PHASE_METRICS)}fHBxI")
+
+# Chunk header: size of the records of the chunk, and of the chunk as
+# stored, smaller when it is compressed.
+CHUNK = struct.Struct("<II")
+
+# Samples per chunk handed to the writer thread.
+CHUNK_RECORDS = 8192
+
+# Chunks waiting for the writer thread before recording blocks.
+MAX_PENDING_CHUNKS = 64
+
+# Seconds between checks that the writer thread has not failed while
+# recording is blocked on a full queue.
+WRITER_POLL_INTERVAL = 0.1
+
+# Kind of the exception of a failed request, by error code; code 0 is a
+# response.
+ERROR_KINDS = ("", "timeout", "connection", "http", "other")
+
+# Latency metrics and request phases of a record, in order.
+SAMPLE_FIELDS = (*LATENCY_METRICS, *PHASE_METRICS)
+
+
+def error_code(error: Exception) -> int:
+    """Return the code of the kind of exception a request raised."""
+    if isinstance(error, TimeoutError):
+        kind = "timeout"
+    elif isinstance(error, ConnectionError | aiohttp.ClientConnectionError):
+        kind = "connection"
+    elif isinstance(error, aiohttp.ClientError):
+        kind = "http"
+    else:
+        kind = "other"
+    return ERROR_KINDS.index(kind)
+
+
+class SampleLog:
+    """Append-only binary log of every request result.
+
+    Results are packed into fixed-width records in a preallocated chunk on
+    the event loop; full chunks are handed to a writer thread, which
+    optionally compresses them with zlib and appends them to the file, so
+    the event loop never waits on the disk unless ``MAX_PENDING_CHUNKS``
+    chunks are waiting. Memory stays flat however many requests are logged.
+
+    Offsets count from the creation of the log, or from the start of the
+    load once ``start`` is called. If writing fails, e.g. on a full disk,
+    the writer thread closes the file and the error is raised as an
+    ``OSError`` by the next ``record`` handing over a chunk, and by
+    ``close``.
+
+    Subclasses store the chunks in another format by overriding ``_open``,
+    ``_begin``, ``_write_chunk`` and ``_finish``, which run on the writer
+    thread except for ``_open``.
+    """
+
+    def __init__(self, path: str | Path, *, compress: bool = False) -> None:
+        """Open the log and start its writer thread.
+
+        Args:
+            path: Path of the log file, overwritten.
+            compress: Compress every chunk with zlib.
+
+        """
+        self.path = Path(path)
+        self.compress = compress
+        self.count = 0
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.error: Exception | None = None
+        self._open()
+        self._chunk = bytearray(CHUNK_RECORDS * RECORD.size)
+        self._used = 0
+        self._queue: queue.Queue[bytes | None] = queue.Queue(MAX_PENDING_CHUNKS)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def start(self, started_at: float, start_time: float) -> None:
+        """Count the offsets of the samples from the start of the load.
+
+        Args:
+            started_at: ``time.time`` at the start of the load.
+            start_time: ``time.perf_counter`` at the same instant.
+
+        """
+        self.started_at = started_at
+        self._start = start_time
+
+    def _open(self) -> None:
+        """Create the file."""
+        self._file: IO[bytes] = self.path.open("wb")
+
+    def _begin(self) -> None:
+        """Write the header, once the start of the offsets is known."""
+        self._file.write(HEADER.pack(MAGIC, self.started_at))
+
+    def record(self, result: dict[str, Any] | Exception) -> None:
+        """Append the result of a single request.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+
+        """
+        offset = time.perf_counter() - self._start
+        if isinstance(result, Exception):
+            RECORD.pack_into(
+                self._chunk, self._used, offset, *(0.0,) * len(LATENCY_METRICS),
+                *(math.nan,) * len(PHASE_METRICS), ERROR_STATUS,
+                error_code(result), 0,
+            )
+        else:
+            RECORD.pack_into(
+                self._chunk, self._used, offset,
+                *(result.get(field, math.nan) for field in SAMPLE_FIELDS),
+                result["status"], 0, result.get("bytes", 0),
+            )
+        self._used += RECORD.size
+        self.count += 1
+        if self._used == len(self._chunk):
+            self._flush()
+
+    def _flush(self) -> None:
+        """Hand the records of the current chunk to the writer thread."""
+        if self._used:
+            self._put(bytes(self._chunk[:self._used]))
+            self._used = 0
+
+    def _put(self, chunk: bytes | None) -> None:
+        """Queue a chunk, or the end of the log, unless the writer failed."""
+        while True:
+            self._raise_error()
+            try:
+                self._queue.put(chunk, timeout=WRITER_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return
+
+    def _raise_error(self) -> None:
+        """Raise the error the writer thread failed with, if any."""
+        if self.error is not None:
+            msg = f"Failed to write the sample log {self.path}: {self.error}"
+            raise OSError(msg) from self.error
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        """Append the records of a chunk to the file."""
+        stored = zlib.compress(chunk, 1) if self.compress else chunk
+        self._file.write(CHUNK.pack(len(chunk), len(stored)))
+        self._file.write(stored)
+
+    def _finish(self) -> None:
+        """Close the file once every chunk is written."""
+        self._file.close()
+
+    def _write(self) -> None:
+        """Write the chunks of the queue until the log closes or a write fails."""
+        try:
+            chunk = self._queue.get()
+            self._begin()
+            while chunk is not None:
+                self._write_chunk(chunk)
+                chunk = self._queue.get()
+            self._finish()
+        except Exception as e:  # noqa: BLE001 - raised by record and close
+            with contextlib.suppress(Exception):
+                self._finish()
+            self.error = e
+
+    def close(self) -> None:
+        """Write the pending records, stop the writer thread and close the file.
+
+        Raises:
+            OSError: Writing the log failed.
+
+        """
+        if self._writer.is_alive():
+            self._flush()
+            self._put(None)
+            self._writer.join()
+        self._raise_error()
+
+
+class SampleLogReader:
+    """Read back the samples of a ``SampleLog``."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open a log and check its header.
+
+        Args:
+            path: Path of the log file.
+
+        """
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            msg = f"{self.path} is not a ccload sample log"
+            raise ValueError(msg)
+        _, self.started_at = HEADER.unpack(header)
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yield the records of every chunk, decompressed."""
+        with self.path.open("rb") as f:
+            f.seek(HEADER.size)
+            while header := f.read(CHUNK.size):
+                size, stored = CHUNK.unpack(header)
+                data = f.read(stored)
+                yield zlib.decompress(data) if stored != size else data
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Yield every sample as a dictionary, in completion order.
+
+        Samples have the completion ``offset``, ``status``, ``error``
+        (empty for a response), ``bytes``, the latency metrics and the
+        request phases that happened.
+        """
+        for chunk in self.chunks():
+            for offset, *values, status, code, size in RECORD.iter_unpack(chunk):
+                sample = {
+                    "offset": offset, "status": status,
+                    "error": ERROR_KINDS[code], "bytes": size,
+                }
+                sample.update(
+                    (field, value)
+                    for field, value in zip(SAMPLE_FIELDS, values, strict=True)
+                    if not math.isnan(value)
+                )
+                yield sample
+
+    def summary(self) -> dict[str, Any]:
+        """Compute the statistics of the logged samples in constant memory.
+
+        Returns:
+            The statistics of ``StatsRecorder.summary`` over the time from
+            the start of the log to the last completion, and ``started_at``.
+
+        """
+        recorder = StatsRecorder()
+        last = 0.0
+        for sample in self:
+            last = sample["offset"]
+            if sample["error"]:
+                recorder.record(RuntimeError(sample["error"]))
+            else:
+                recorder.record(sample)
+        statistics = recorder.summary(last)
+        statistics["started_at"] = self.started_at
+        statistics["finished_at"] = self.started_at + last
+        return statistics
+
+    def to_csv(self, output_path: str | Path) -> int:
+        """Write one CSV row per sample.
+
+        Returns:
+            The number of samples written.
+
+        """
+        columns = ["offset", "status", "error", "bytes", *SAMPLE_FIELDS]
+        count = 0
+        with Path(output_path).open("w", newline="") as f:
+            writer = csv.DictWriter(f, columns, restval="")
+            writer.writeheader()
+            for sample in self:
+                writer.writerow(sample)
+                count += 1
+        return count
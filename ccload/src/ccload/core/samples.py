@@ -0,0 +1,182 @@
+"""Columnar buffer of raw per-request samples."""
+import math
+from array import array
+from itertools import compress
+from typing import Any
+
+from ccload.core.statistics import LATENCY_METRICS, PERCENTILES, percentile_key
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+# Status recorded for requests that raised instead of returning a response.
+ERROR_STATUS = 0
+
+
+class SampleBuffer:
+    """Preallocated columnar buffer of raw request samples.
+
+    Every sample takes 26 bytes: a ``uint16`` status and three ``float64``
+    latency columns. Columns are preallocated and grow in chunks, so
+    recording a sample never allocates a Python object that outlives it.
+    Statistics are computed with vectorized reductions, using NumPy when it
+    is installed.
+    """
+
+    def __init__(self, chunk_size: int = 65536) -> None:
+        """Initialize an empty buffer.
+
+        Args:
+            chunk_size: Number of samples added to the capacity on each growth.
+
+        """
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.capacity = 0
+        self.status = array("H")
+        self.columns = {metric: array("d") for metric in LATENCY_METRICS}
+
+    def _grow(self) -> None:
+        """Extend every column by one chunk."""
+        self.status.frombytes(bytes(self.chunk_size * self.status.itemsize))
+        for column in self.columns.values():
+            column.frombytes(bytes(self.chunk_size * column.itemsize))
+        self.capacity += self.chunk_size
+
+    def record(self, result: dict[str, Any] | Exception) -> None:
+        """Record the result of a single request.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+
+        """
+        if self.size == self.capacity:
+            self._grow()
+        index = self.size
+        if isinstance(result, Exception):
+            self.status[index] = ERROR_STATUS
+            for column in self.columns.values():
+                column[index] = 0.0
+        else:
+            self.status[index] = result["status"]
+            for metric, column in self.columns.items():
+                column[index] = result[metric]
+        self.size += 1
+
+    def extend(self, other: "SampleBuffer") -> None:
+        """Append the samples recorded by another buffer.
+
+        Args:
+            other: Buffer to copy samples from.
+
+        """
+        while self.capacity - self.size < other.size:
+            self._grow()
+        end = self.size + other.size
+        self.status[self.size:end] = other.status[:other.size]
+        for metric, column in self.columns.items():
+            column[self.size:end] = other.columns[metric][:other.size]
+        self.size = end
+
+    def __len__(self) -> int:
+        """Return the number of recorded samples."""
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the recorded samples."""
+        return self.size * (
+            self.status.itemsize
+            + sum(column.itemsize for column in self.columns.values())
+        )
+
+    def summary(self, total_time: float) -> dict[str, Any]:
+        """Compute exact statistics over the recorded samples.
+
+        Args:
+            total_time: Wall-clock duration of the run in seconds.
+
+        Returns:
+            The scalar keys of ``StatsRecorder.summary``, with exact
+            percentiles instead of histogram estimates.
+
+        """
+        if np is not None:
+            successful, failed, latencies = self._split_numpy()
+        else:
+            successful, failed, latencies = self._split_python()
+        ranks = [
+            max(1, math.ceil(percent / 100 * successful)) - 1
+            for percent in PERCENTILES
+        ]
+
+        statistics: dict[str, Any] = {
+            "total_requests": self.size,
+            "successful_requests": successful,
+            "failed_requests": failed,
+        }
+        for metric in LATENCY_METRICS:
+            if successful:
+                lowest, highest, total, picked = _order_statistics(
+                    latencies[metric], ranks,
+                )
+            else:
+                lowest, highest, total, picked = 0, 0, 0, [0] * len(ranks)
+            statistics[f"{metric}_min"] = lowest
+            statistics[f"{metric}_max"] = highest
+            statistics[f"{metric}_mean"] = total / successful if successful else 0
+            for percent, value in zip(PERCENTILES, picked, strict=True):
+                statistics[percentile_key(metric, percent)] = value
+        statistics["requests_per_second"] = (
+            successful / total_time if total_time > 0 else 0
+        )
+        return statistics
+
+    def _split_numpy(self) -> tuple[int, int, dict[str, Any]]:
+        """Count outcomes and select successful latencies with NumPy."""
+        status = np.frombuffer(self.status, dtype=np.uint16)[:self.size]
+        ok = (status >= 200) & (status < 300)  # noqa: PLR2004
+        failed = (status == ERROR_STATUS) | ((status >= 500) & (status < 600))  # noqa: PLR2004
+        latencies = {
+            metric: np.frombuffer(column, dtype=np.float64)[:self.size][ok]
+            for metric, column in self.columns.items()
+        }
+        return int(ok.sum()), int(failed.sum()), latencies
+
+    def _split_python(self) -> tuple[int, int, dict[str, Any]]:
+        """Count outcomes and select successful latencies without NumPy."""
+        status = self.status[:self.size]
+        ok = bytes(200 <= s < 300 for s in status)  # noqa: PLR2004
+        failed = sum(
+            s == ERROR_STATUS or 500 <= s < 600 for s in status  # noqa: PLR2004
+        )
+        latencies = {
+            metric: list(compress(column[:self.size], ok))
+            for metric, column in self.columns.items()
+        }
+        return sum(ok), failed, latencies
+
+
+def _order_statistics(
+    values: Any, ranks: list[int],  # noqa: ANN401
+) -> tuple[float, float, float, list[float]]:
+    """Return min, max, sum and the values at the given 0-based ranks.
+
+    NumPy input is partitioned around the requested ranks in linear time
+    instead of being fully sorted.
+    """
+    last = len(values) - 1
+    if np is not None:
+        ordered = np.partition(values, sorted({0, last, *ranks}))
+        total = float(values.sum())
+    else:
+        ordered = sorted(values)
+        total = math.fsum(ordered)
+    return (
+        float(ordered[0]),
+        float(ordered[last]),
+        total,
+        [float(ordered[rank]) for rank in ranks],
+    )
@@ -0,0 +1,455 @@
+"""Worker-pool scheduling for the load tester."""
+import asyncio
+import itertools
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from ccload.core.profile import LoadProfile
+
+# A request picked up this many seconds after its start time was already
+# overdue, i.e. no worker was free when it was due.
+OVERDUE_TOLERANCE = 0.001
+
+# Seconds between checks of an idle worker whether its profile slot is active.
+PROFILE_POLL_INTERVAL = 0.05
+
+
+class RequestCounter:
+    """Hand out request tickets to pool workers until the budget is spent.
+
+    All workers share a single counter, so the number of requests in flight
+    is bounded by the number of workers rather than by the request budget.
+    The budget is a number of requests, a ``time.perf_counter`` deadline, or
+    both, whichever runs out first.
+    """
+
+    def __init__(self, n_request: int | None, deadline: float | None = None) -> None:
+        """Initialize the request counter.
+
+        Args:
+            n_request: Total number of requests to hand out, or None for no
+                limit.
+            deadline: ``time.perf_counter`` value after which no more tickets
+                are handed out, or None for no deadline.
+
+        """
+        self.n_request = n_request
+        self.deadline = deadline
+        self.issued = 0
+
+    def take(self) -> int | None:
+        """Take the next request ticket.
+
+        Returns:
+            The index of the next request, or None once the budget is spent.
+
+        """
+        if self.n_request is not None and self.issued >= self.n_request:
+            return None
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return None
+        ticket = self.issued
+        self.issued += 1
+        return ticket
+
+    def stop(self) -> None:
+        """End the budget: no more tickets are handed out."""
+        self.n_request = self.issued
+
+
+class LeasedCounter(RequestCounter):
+    """Request counter whose budget is granted in leases during the run.
+
+    Workers pull tickets from the budget granted so far. When it runs low,
+    ``on_low`` is called once to ask for another lease; workers finding it
+    spent wait for the next ``grant`` until the counter is closed.
+    """
+
+    def __init__(
+        self, n_request: int, on_low: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize the counter with its first lease.
+
+        Args:
+            n_request: Number of requests of the first lease.
+            on_low: Called when less than half of the last lease is left.
+
+        """
+        super().__init__(0)
+        self.on_low = on_low
+        self.closed = False
+        self._low_watermark = 0
+        self._requested = False
+        self._granted = asyncio.Event()
+        self.grant(n_request)
+
+    def grant(self, n_request: int) -> None:
+        """Add a lease of ``n_request`` requests to the budget."""
+        self.n_request += n_request
+        self._low_watermark = n_request // 2
+        self._requested = False
+        self._granted.set()
+
+    def close(self) -> None:
+        """Stop the workers once the granted budget is spent."""
+        self.closed = True
+        self._granted.set()
+
+    def take(self) -> int | None:
+        """Take the next ticket of the granted budget, asking for more if low.
+
+        Returns:
+            The index of the next request, or None while the budget is spent.
+
+        """
+        ticket = super().take()
+        if (
+            not self._requested and not self.closed
+            and self.n_request - self.issued <= self._low_watermark
+        ):
+            self._requested = True
+            if self.on_low is not None:
+                self.on_low()
+        return ticket
+
+    async def acquire(self) -> int | None:
+        """Take the next ticket, waiting for a lease if the budget is spent.
+
+        Returns:
+            The index of the next request, or None once the counter is closed
+            and its budget spent, or past the deadline.
+
+        """
+        while (ticket := self.take()) is None:
+            if self.closed or (
+                self.deadline is not None and time.perf_counter() >= self.deadline
+            ):
+                return None
+            self._granted.clear()
+            await self._granted.wait()
+        return ticket
+
+
+class ArrivalSchedule:
+    """Intended start times of the requests of an open-loop run.
+
+    Requests arrive at a fixed rate, or at the rate given over time by a
+    ``LoadProfile``, either evenly spaced (``constant``) or as a Poisson
+    process (``poisson``). Offsets are handed out in ticket order, so the
+    schedule takes constant memory however long the run is.
+    """
+
+    DISTRIBUTIONS = ("constant", "poisson")
+
+    def __init__(
+        self,
+        rate: float | None,
+        distribution: str = "constant",
+        seed: int | None = None,
+        profile: LoadProfile | None = None,
+    ) -> None:
+        """Initialize the arrival schedule.
+
+        Args:
+            rate: Target arrival rate in requests per second. Ignored when a
+                profile is given.
+            distribution: ``constant`` or ``poisson``.
+            seed: Seed of the Poisson inter-arrival generator.
+            profile: Load profile whose level is the arrival rate over time.
+
+        """
+        if profile is None and (rate is None or rate <= 0):
+            msg = "Arrival rate must be positive"
+            raise ValueError(msg)
+        if distribution not in self.DISTRIBUTIONS:
+            msg = f"Unsupported arrival distribution: {distribution}"
+            raise ValueError(msg)
+        self.rate = rate
+        self.distribution = distribution
+        self.profile = profile
+        self._random = random.Random(seed)  # noqa: S311
+        self._scheduled = 0
+        self._offset = 0.0
+
+    def next_offset(self) -> float:
+        """Return the intended start of the next request.
+
+        Returns:
+            Seconds since the start of the run, or ``math.inf`` once a
+            profile has ended.
+
+        """
+        gap = self._random.expovariate(1) if self.distribution == "poisson" else 1
+        if self.profile is not None:
+            # Constant arrivals sit in the middle of each unit of expected
+            # arrivals, so they never fall on a stage boundary.
+            if self._scheduled == 0 and self.distribution == "constant":
+                gap = 0.5
+            self._offset = self.profile.advance(self._offset, gap)
+        elif self.distribution == "poisson":
+            self._offset += gap / self.rate
+        else:
+            self._offset = self._scheduled / self.rate
+        self._scheduled += 1
+        return self._offset
+
+    def remaining(self, duration: float, limit: int | None = None) -> int:
+        """Count the arrivals still due before ``duration``, consuming them.
+
+        Args:
+            duration: Seconds since the start of the run.
+            limit: Largest count to return, or None for no limit.
+
+        Returns:
+            The number of arrivals scheduled before ``duration`` that were
+            not handed out yet, at most ``limit``.
+
+        """
+        if self.profile is None and self.distribution == "constant":
+            count = max(math.ceil(duration * self.rate) - self._scheduled, 0)
+            count = count if limit is None else min(count, limit)
+            self._scheduled += count
+            return count
+        count = 0
+        while (limit is None or count < limit) and self.next_offset() < duration:
+            count += 1
+        return count
+
+
+def closed_loop_worker(
+    counter: RequestCounter, send: Callable[[float], Awaitable[None]],
+) -> Callable[[], Awaitable[None]]:
+    """Build a worker that sends the next request as soon as one completes.
+
+    Args:
+        counter: Shared request counter.
+        send: Coroutine function sending one request, given its schedule lag.
+
+    """
+    async def worker() -> None:
+        while counter.take() is not None:
+            await send(0.0)
+
+    return worker
+
+
+def leased_worker(
+    counter: LeasedCounter, send: Callable[[float], Awaitable[None]],
+) -> Callable[[], Awaitable[None]]:
+    """Build a closed-loop worker waiting for leases when the budget is spent.
+
+    Args:
+        counter: Shared leased counter.
+        send: Coroutine function sending one request, given its schedule lag.
+
+    """
+    async def worker() -> None:
+        while await counter.acquire() is not None:
+            await send(0.0)
+
+    return worker
+
+
+def open_loop_worker(  # noqa: PLR0913
+    counter: RequestCounter,
+    schedule: ArrivalSchedule,
+    send: Callable[[float], Awaitable[None]],
+    on_lag: Callable[..., None],
+    duration: float | None = None,
+    on_missed: Callable[[int], None] | None = None,
+) -> Callable[[], Awaitable[None]]:
+    """Build a worker that sends requests at their scheduled start times.
+
+    The schedule starts when the first worker runs. A worker that picks up a
+    request whose start time has already passed (by more than
+    ``OVERDUE_TOLERANCE``) was busy with a previous one, so the request is
+    reported as delayed by the concurrency cap. Requests due before the end
+    of the ``duration`` that no worker was free to send before the deadline
+    are missed: the first worker to stop counts them for ``on_missed``.
+
+    Args:
+        counter: Shared request counter.
+        schedule: Shared arrival schedule.
+        send: Coroutine function sending one request, given its schedule lag.
+        on_lag: Called with the lag of every request and ``delayed=``.
+        duration: Seconds after which no more requests are scheduled.
+        on_missed: Called once with the number of missed requests.
+
+    """
+    loop = asyncio.get_running_loop()
+    start: float | None = None
+    stopped = False
+
+    async def worker() -> None:
+        nonlocal start, stopped
+        if start is None:
+            start = loop.time()
+        while counter.take() is not None:
+            offset = schedule.next_offset()
+            if duration is not None and offset >= duration:
+                break
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = loop.time() - start - offset
+            on_lag(lag, delayed=delay < -OVERDUE_TOLERANCE)
+            await send(lag)
+        if not stopped and duration is not None and on_missed is not None:
+            stopped = True
+            left = (
+                None if counter.n_request is None
+                else counter.n_request - counter.issued
+            )
+            if missed := schedule.remaining(duration, left):
+                on_missed(missed)
+
+    return worker
+
+
+def profiled_worker(
+    counter: RequestCounter,
+    profile: LoadProfile,
+    send: Callable[[float], Awaitable[None]],
+    share: tuple[int, int] = (0, 1),
+) -> Callable[[], Awaitable[None]]:
+    """Build workers whose number of active copies follows a load profile.
+
+    Every worker built from the returned function takes the next slot
+    number; slot ``i`` sends requests closed-loop while the profile level is
+    above ``i`` and idles otherwise, so the pool should hold
+    ``profile.peak`` workers.
+
+    When the profile is split between ``n`` generators, generator ``k`` of
+    ``share=(k, n)`` takes slots ``k``, ``k + n``, ``k + 2n``... and should
+    hold ``len(profile_slots(profile, share))`` workers, so that the active
+    workers of all generators add up to the profile level.
+
+    Args:
+        counter: Shared request counter.
+        profile: Profile whose level is the concurrency over time.
+        send: Coroutine function sending one request, given its schedule lag.
+        share: Index of this generator and number of generators.
+
+    """
+    loop = asyncio.get_running_loop()
+    slots = itertools.count(*share)
+    start: float | None = None
+
+    async def worker() -> None:
+        nonlocal start
+        if start is None:
+            start = loop.time()
+        slot = next(slots)
+        while (elapsed := loop.time() - start) < profile.duration:
+            if slot >= profile.level_at(elapsed):
+                await asyncio.sleep(PROFILE_POLL_INTERVAL)
+            elif counter.take() is None:
+                return
+            else:
+                await send(0.0)
+
+    return worker
+
+
+def profile_slots(profile: LoadProfile, share: tuple[int, int] = (0, 1)) -> range:
+    """Return the slots a generator runs for its share of a concurrency profile.
+
+    Args:
+        profile: Profile whose level is the concurrency over time.
+        share: Index of the generator and number of generators.
+
+    """
+    index, count = share
+    return range(index, profile.peak, count)
+
+
+def build_worker(  # noqa: PLR0913
+    counter: RequestCounter,
+    send: Callable[[float], Awaitable[None]],
+    on_lag: Callable[..., None],
+    *,
+    rate: float | None = None,
+    arrival: str = "constant",
+    profile: LoadProfile | None = None,
+    profile_target: str = "concurrency",
+    profile_share: tuple[int, int] = (0, 1),
+    duration: float | None = None,
+    on_missed: Callable[[int], None] | None = None,
+) -> Callable[[], Awaitable[None]]:
+    """Build the worker matching the pacing options of a run.
+
+    Args:
+        counter: Shared request counter; a ``LeasedCounter`` runs the
+            requests closed-loop as leases come in.
+        send: Coroutine function sending one request, given its schedule lag.
+        on_lag: Called with the lag of every open-loop request.
+        rate: Open-loop arrival rate, or None for a closed-loop run.
+        arrival: Distribution of open-loop arrivals.
+        profile: Load profile driving the concurrency or the arrival rate.
+        profile_target: ``concurrency`` or ``rate``.
+        profile_share: Share of a concurrency profile run by this generator,
+            see ``profiled_worker``.
+        duration: Seconds after which no more requests are scheduled.
+        on_missed: Called with the number of open-loop requests due before
+            the end of the ``duration`` but never sent.
+
+    """
+    if isinstance(counter, LeasedCounter):
+        return leased_worker(counter, send)
+    if profile is not None and profile_target == "concurrency":
+        return profiled_worker(counter, profile, send, profile_share)
+    if profile is not None or rate is not None:
+        schedule = ArrivalSchedule(rate, arrival, profile=profile)
+        return open_loop_worker(
+            counter, schedule, send, on_lag, duration, on_missed,
+        )
+    return closed_loop_worker(counter, send)
+
+
+async def run_worker_pool(
+    n_workers: int,
+    worker: Callable[[], Awaitable[None]],
+    deadline: float | None = None,
+    grace_period: float | None = None,
+    in_flight: Callable[[], int] | None = None,
+) -> int:
+    """Run ``n_workers`` long-lived copies of ``worker`` until all return.
+
+    Workers are expected to stop taking tickets once ``deadline`` passes.
+    Requests still in flight at the deadline are given ``grace_period``
+    seconds to complete and are cancelled afterwards.
+
+    Args:
+        n_workers: Number of worker coroutines to run concurrently.
+        worker: Coroutine function executed by every worker.
+        deadline: ``time.perf_counter`` value at which the run ends, or None
+            to wait for every worker.
+        grace_period: Seconds to wait for in-flight requests after the
+            deadline, or None to wait indefinitely.
+        in_flight: Returns the number of requests in flight; without it,
+            every worker still running is counted as one.
+
+    Returns:
+        The number of requests in flight when the workers were cancelled.
+
+    """
+    tasks = [asyncio.create_task(worker()) for _ in range(max(n_workers, 1))]
+    if deadline is None:
+        await asyncio.gather(*tasks)
+        return 0
+
+    _, pending = await asyncio.wait(
+        tasks, timeout=max(deadline - time.perf_counter(), 0),
+    )
+    if pending:
+        _, pending = await asyncio.wait(pending, timeout=grace_period)
+    cancelled = len(pending) if in_flight is None or not pending else in_flight()
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for task in tasks:
+        if task not in pending:
+            task.result()
+    return cancelled
@@ -0,0 +1,398 @@
+"""Streaming statistics for load test results."""
+import math
+from collections.abc import Callable
+from typing import Any
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.profile import LoadProfile
+from ccload.core.url_mix import UrlMix
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+LATENCY_METRICS = ("request_time", "ttfb", "ttlb")
+# Phases of the time to first byte, recorded when an engine reports them.
+PHASE_METRICS = (
+    "queue_wait", "dns", "connect", "tls", "request_sent", "server_time",
+)
+
+# Event-loop lag p99 in seconds above which the load generator itself is
+# considered saturated.
+SATURATION_LOOP_LAG = 0.01
+
+# Callable receiving every request result as it completes.
+ResultSink = Callable[[dict[str, Any] | Exception], None]
+
+
+def percentile_key(metric: str, percent: float) -> str:
+    """Return the statistics key of a percentile, e.g. ``ttfb_p99_9``."""
+    return f"{metric}_p{percent:g}".replace(".", "_")
+
+
+class StatsRecorder:
+    """Record request results as they complete.
+
+    Only counters and one latency histogram per metric and per request
+    phase are kept, so memory does not grow with the number of requests and
+    recorders from separate runs can be merged.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty recorder."""
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.cancelled_requests = 0
+        self.delayed_requests = 0
+        self.missed_requests = 0
+        self.schedule_lag = LatencyHistogram()
+        self.loop_lag = LatencyHistogram()
+        self.histograms = {
+            metric: LatencyHistogram() for metric in LATENCY_METRICS
+        }
+        self.phases = {phase: LatencyHistogram() for phase in PHASE_METRICS}
+
+    @classmethod
+    def from_summary(cls, statistics: dict[str, Any]) -> "StatsRecorder":
+        """Rebuild a recorder from the statistics dictionary it produced.
+
+        Args:
+            statistics: Dictionary returned by ``summary``, possibly after a
+                JSON round-trip.
+
+        """
+        recorder = cls()
+        recorder.total_requests = statistics["total_requests"]
+        recorder.successful_requests = statistics["successful_requests"]
+        recorder.failed_requests = statistics["failed_requests"]
+        recorder.cancelled_requests = statistics.get("cancelled_requests", 0)
+        recorder.missed_requests = statistics.get("missed_requests", 0)
+        recorder.delayed_requests = (
+            statistics.get("delayed_requests", 0) - recorder.missed_requests
+        )
+        histograms = statistics.get("histograms", {})
+        for metric in LATENCY_METRICS:
+            if metric in histograms:
+                recorder.histograms[metric] = LatencyHistogram.from_dict(
+                    histograms[metric],
+                )
+        for phase in PHASE_METRICS:
+            if phase in histograms:
+                recorder.phases[phase] = LatencyHistogram.from_dict(
+                    histograms[phase],
+                )
+        if "schedule_lag" in histograms:
+            recorder.schedule_lag = LatencyHistogram.from_dict(
+                histograms["schedule_lag"],
+            )
+        if "loop_lag" in histograms:
+            recorder.loop_lag = LatencyHistogram.from_dict(histograms["loop_lag"])
+        return recorder
+
+    def record(self, result: dict[str, Any] | Exception) -> None:
+        """Record the result of a single request.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+
+        """
+        self.total_requests += 1
+        if isinstance(result, Exception):
+            self.failed_requests += 1
+            return
+
+        if 500 <= result["status"] < 600:  # noqa: PLR2004
+            self.failed_requests += 1
+        elif 200 <= result["status"] < 300:  # noqa: PLR2004
+            self.successful_requests += 1
+            for metric, histogram in self.histograms.items():
+                histogram.record(result[metric])
+            for phase, histogram in self.phases.items():
+                if phase in result:
+                    histogram.record(result[phase])
+
+    def record_schedule_lag(self, lag: float, *, delayed: bool) -> None:
+        """Record how late an open-loop request started.
+
+        Args:
+            lag: Seconds between the intended and the actual send time.
+            delayed: Whether the request could not start on time because every
+                worker was busy, i.e. because of the concurrency cap.
+
+        """
+        self.schedule_lag.record(max(lag, 0))
+        if delayed:
+            self.delayed_requests += 1
+
+    def record_missed(self, count: int) -> None:
+        """Record open-loop requests that were due but never sent.
+
+        Args:
+            count: Number of requests due before the deadline that no worker
+                was free to send, because of the concurrency cap.
+
+        """
+        self.missed_requests += count
+
+    def merge(self, other: "StatsRecorder") -> None:
+        """Add the results recorded by another recorder to this one.
+
+        Args:
+            other: Recorder to merge.
+
+        """
+        self.total_requests += other.total_requests
+        self.successful_requests += other.successful_requests
+        self.failed_requests += other.failed_requests
+        self.cancelled_requests += other.cancelled_requests
+        self.delayed_requests += other.delayed_requests
+        self.missed_requests += other.missed_requests
+        self.schedule_lag.merge(other.schedule_lag)
+        self.loop_lag.merge(other.loop_lag)
+        for metric, histogram in self.histograms.items():
+            histogram.merge(other.histograms[metric])
+        for phase, histogram in self.phases.items():
+            histogram.merge(other.phases[phase])
+
+    def summary(self, total_time: float) -> dict[str, Any]:
+        """Build the statistics dictionary of the recorded results.
+
+        Args:
+            total_time: Wall-clock duration of the run in seconds.
+
+        Returns:
+            Request counts, min/max/mean and percentiles of every latency
+            metric and of every request phase that occurred, the measured
+            window and throughput over it, the lag of
+            the load generator's event loop, the serialized histograms and,
+            for open-loop runs, how late requests started compared to their
+            schedule. Requests that were due but never sent count as
+            scheduled and delayed, and as ``missed_requests``.
+
+        """
+        statistics: dict[str, Any] = {
+            "total_requests": self.total_requests,
+            "successful_requests": self.successful_requests,
+            "failed_requests": self.failed_requests,
+            "cancelled_requests": self.cancelled_requests,
+        }
+        for metric, histogram in self.histograms.items():
+            statistics[f"{metric}_min"] = histogram.min if histogram.count else 0
+            statistics[f"{metric}_max"] = histogram.max if histogram.count else 0
+            statistics[f"{metric}_mean"] = histogram.mean
+            for percent in PERCENTILES:
+                statistics[percentile_key(metric, percent)] = (
+                    histogram.percentile(percent)
+                )
+        for phase, histogram in self.phases.items():
+            if histogram.count:
+                statistics[f"{phase}_count"] = histogram.count
+                statistics[f"{phase}_max"] = histogram.max
+                statistics[f"{phase}_mean"] = histogram.mean
+                for percent in PERCENTILES:
+                    statistics[percentile_key(phase, percent)] = (
+                        histogram.percentile(percent)
+                    )
+        statistics["elapsed_time"] = total_time
+        statistics["requests_per_second"] = (
+            self.successful_requests / total_time
+            if total_time > 0 else 0
+        )
+        statistics["loop_lag_mean"] = self.loop_lag.mean
+        statistics["loop_lag_p99"] = self.loop_lag.percentile(99)
+        statistics["loop_lag_max"] = self.loop_lag.max if self.loop_lag.count else 0
+        statistics["generator_saturated"] = (
+            statistics["loop_lag_p99"] > SATURATION_LOOP_LAG
+        )
+        statistics["histograms"] = {
+            metric: histogram.to_dict()
+            for metric, histogram in self.histograms.items()
+        }
+        statistics["histograms"].update(
+            (phase, histogram.to_dict())
+            for phase, histogram in self.phases.items() if histogram.count
+        )
+        statistics["histograms"]["loop_lag"] = self.loop_lag.to_dict()
+        if self.schedule_lag.count or self.missed_requests:
+            statistics["scheduled_requests"] = (
+                self.schedule_lag.count + self.missed_requests
+            )
+            statistics["delayed_requests"] = (
+                self.delayed_requests + self.missed_requests
+            )
+            statistics["missed_requests"] = self.missed_requests
+            statistics["schedule_lag_mean"] = self.schedule_lag.mean
+            statistics["schedule_lag_p99"] = self.schedule_lag.percentile(99)
+            statistics["schedule_lag_max"] = (
+                self.schedule_lag.max if self.schedule_lag.count else 0
+            )
+            statistics["histograms"]["schedule_lag"] = self.schedule_lag.to_dict()
+        return statistics
+
+
+class StageRecorder:
+    """Record results separately for every stage of a load profile."""
+
+    def __init__(self, profile: LoadProfile) -> None:
+        """Initialize one recorder per stage.
+
+        Args:
+            profile: Load profile of the run.
+
+        """
+        self.profile = profile
+        self.recorders = [StatsRecorder() for _ in profile.stages]
+
+    def record(self, result: dict[str, Any] | Exception, offset: float) -> None:
+        """Record a result into the stage running when it was sent.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+            offset: Seconds between the start of the run and the (intended)
+                send time of the request.
+
+        """
+        self.recorders[self.profile.stage_index(offset)].record(result)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Summarize every stage, with throughput over the stage duration."""
+        return [
+            _stage_summary(stage.name, stage.start, stage.duration, recorder)
+            for stage, recorder in zip(
+                self.profile.stages, self.recorders, strict=True,
+            )
+        ]
+
+
+class UrlRecorder:
+    """Record results separately for every URL of a mix."""
+
+    def __init__(self, mix: UrlMix) -> None:
+        """Initialize one recorder per URL.
+
+        Args:
+            mix: URL mix of the run.
+
+        """
+        self.mix = mix
+        self.recorders = [StatsRecorder() for _ in mix.urls]
+
+    def record(self, result: dict[str, Any] | Exception, index: int) -> None:
+        """Record a result into the recorder of the URL it was sent to.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+            index: Index of the URL in the mix.
+
+        """
+        self.recorders[index].record(result)
+
+    def summary(self, total_time: float) -> list[dict[str, Any]]:
+        """Summarize every URL, with throughput over the whole run."""
+        return [
+            _url_summary(url, weight, total_time, recorder)
+            for url, weight, recorder in zip(
+                self.mix.urls, self.mix.weights, self.recorders, strict=True,
+            )
+        ]
+
+
+def _url_summary(
+    url: str, weight: float, total_time: float, recorder: StatsRecorder,
+) -> dict[str, Any]:
+    """Summarize one URL of a mix."""
+    summary = recorder.summary(total_time)
+    del summary["elapsed_time"]
+    return {"url": url, "weight": weight, **summary}
+
+
+def _stage_summary(
+    name: str, start: float, duration: float, recorder: StatsRecorder,
+) -> dict[str, Any]:
+    """Summarize one stage of a load profile."""
+    summary = recorder.summary(duration)
+    del summary["elapsed_time"]
+    return {"stage": name, "start": start, "duration": duration, **summary}
+
+
+def breakdown_entry(statistics: dict[str, Any]) -> dict[str, Any]:
+    """Return the headline figures of one part of a merged run.
+
+    Args:
+        statistics: Statistics of a process or worker.
+
+    """
+    return {
+        key: statistics[key]
+        for key in (
+            "total_requests", "successful_requests", "failed_requests",
+            "elapsed_time", "requests_per_second",
+            "request_time_p50", "request_time_p99",
+        )
+    }
+
+
+def covered_time(windows: list[tuple[float, float]]) -> float:
+    """Return the length of the union of ``(start, end)`` time windows.
+
+    Gaps between windows that do not overlap, such as successive rounds of
+    a distributed run, are not counted.
+    """
+    total = 0.0
+    end = -math.inf
+    for window_start, window_end in sorted(windows):
+        if window_end > end:
+            total += window_end - max(window_start, end)
+            end = window_end
+    return total
+
+
+def merge_statistics(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Merge the statistics of runs executed side by side into one report.
+
+    Counts and histograms are added, so the merged percentiles are as exact
+    as those of a single run. Throughput is computed over the union of the
+    time windows of the runs, from their ``started_at``/``finished_at``
+    wall-clock timestamps, which is also the merged ``elapsed_time``;
+    ``started_at`` and ``finished_at`` span all the runs. Per-stage and
+    per-URL breakdowns are merged too when every run has them.
+
+    Args:
+        results: Statistics dictionaries returned by ``load_tester``.
+
+    Returns:
+        The statistics of all runs together.
+
+    """
+    recorder = StatsRecorder()
+    for result in results:
+        recorder.merge(StatsRecorder.from_summary(result))
+
+    started_at = min(result["started_at"] for result in results)
+    finished_at = max(result["finished_at"] for result in results)
+    merged = recorder.summary(covered_time(
+        [(result["started_at"], result["finished_at"]) for result in results],
+    ))
+    merged["started_at"] = started_at
+    merged["finished_at"] = finished_at
+
+    if all("stages" in result for result in results):
+        merged["stages"] = []
+        for stages in zip(*(result["stages"] for result in results), strict=True):
+            stage_recorder = StatsRecorder()
+            for stage in stages:
+                stage_recorder.merge(StatsRecorder.from_summary(stage))
+            first = stages[0]
+            merged["stages"].append(_stage_summary(
+                first["stage"], first["start"], first["duration"], stage_recorder,
+            ))
+
+    if all("urls" in result for result in results):
+        merged["urls"] = []
+        for entries in zip(*(result["urls"] for result in results), strict=True):
+            url_recorder = StatsRecorder()
+            for entry in entries:
+                url_recorder.merge(StatsRecorder.from_summary(entry))
+            merged["urls"].append(_url_summary(
+                entries[0]["url"], entries[0]["weight"],
+                merged["elapsed_time"], url_recorder,
+            ))
+    return merged
@@ -0,0 +1,211 @@
+"""Per-interval time series of load test results."""
+import asyncio
+import json
+import sys
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.statistics import percentile_key
+
+# Seconds covered by one point of the time series.
+DEFAULT_INTERVAL = 1.0
+
+# Points kept in the ring buffer; older ones are dropped (one hour of 1s
+# points by default).
+MAX_INTERVALS = 3600
+
+# Percentiles of the request time reported for every interval.
+INTERVAL_PERCENTILES = (50, 90, 99)
+
+# Callable receiving every point of the time series as its interval closes.
+IntervalListener = Callable[[dict[str, Any]], None]
+
+
+def _latency_fields(histogram: LatencyHistogram) -> dict[str, Any]:
+    """Return the request time fields of a point, histogram included."""
+    fields: dict[str, Any] = {
+        "request_time_mean": histogram.mean,
+        "request_time_max": histogram.max if histogram.count else 0,
+    }
+    for percent in INTERVAL_PERCENTILES:
+        fields[percentile_key("request_time", percent)] = (
+            histogram.percentile(percent)
+        )
+    fields["histogram"] = histogram.to_dict()
+    return fields
+
+
+class IntervalAggregator:
+    """Aggregate request results into fixed-length time intervals.
+
+    Results are counted into the interval in which they complete. A
+    background task closes the current interval every ``interval`` seconds,
+    idle ones included, turns it into a point (counts, throughput and
+    request time percentiles), appends it to a bounded ring buffer and hands
+    it to every listener. Every point carries the serialized request time
+    histogram of its interval under ``histogram``, so that points of runs
+    executed side by side can be merged exactly.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        capacity: int = MAX_INTERVALS,
+        listeners: list[IntervalListener] | None = None,
+    ) -> None:
+        """Initialize the aggregator.
+
+        Args:
+            interval: Length of an interval in seconds.
+            capacity: Maximum number of points kept.
+            listeners: Called with every point as its interval closes.
+
+        """
+        self.interval = interval
+        self.points: deque[dict[str, Any]] = deque(maxlen=capacity)
+        self.listeners = listeners or []
+        self._index = 0
+        self._start = 0.0
+        self._task: asyncio.Task | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start a new, empty interval."""
+        self._total = 0
+        self._successful = 0
+        self._failed = 0
+        self._latency = LatencyHistogram()
+
+    def record(self, result: dict[str, Any] | Exception) -> None:
+        """Record the result of a single request into the current interval.
+
+        Args:
+            result: Dictionary returned by ``read_url`` or the exception raised.
+
+        """
+        self._total += 1
+        if isinstance(result, Exception) or 500 <= result["status"] < 600:  # noqa: PLR2004
+            self._failed += 1
+        elif 200 <= result["status"] < 300:  # noqa: PLR2004
+            self._successful += 1
+            self._latency.record(result["request_time"])
+
+    def _close_interval(self, duration: float) -> None:
+        """Turn the current interval into a point and start the next one."""
+        point: dict[str, Any] = {
+            "offset": self._index * self.interval,
+            "duration": duration,
+            "total_requests": self._total,
+            "successful_requests": self._successful,
+            "failed_requests": self._failed,
+            "requests_per_second": self._successful / duration,
+            **_latency_fields(self._latency),
+        }
+        self.points.append(point)
+        self._index += 1
+        self._reset()
+        for listener in self.listeners:
+            listener(point)
+
+    async def _tick(self) -> None:
+        """Close an interval every ``interval`` seconds until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            end = self._start + (self._index + 1) * self.interval
+            await asyncio.sleep(end - loop.time())
+            self._close_interval(self.interval)
+
+    def start(self) -> None:
+        """Start the first interval on the running event loop."""
+        loop = asyncio.get_running_loop()
+        self._start = loop.time()
+        self._task = loop.create_task(self._tick())
+
+    async def stop(self) -> None:
+        """Stop the background task and close the last, partial interval."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        loop = asyncio.get_running_loop()
+        duration = loop.time() - self._start - self._index * self.interval
+        if duration > 0 and (self._total or not self.points):
+            self._close_interval(duration)
+
+
+def merge_timeseries(series: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Merge the time series of runs executed side by side.
+
+    Points are aligned on their offset from the start of each run. Counts
+    and throughput are added, and the request time histograms of every
+    interval are merged, so that the mean and percentiles of a merged point
+    are those of all its requests together.
+
+    Args:
+        series: Time series of every run.
+
+    Returns:
+        The merged time series, ordered by offset.
+
+    """
+    merged: dict[float, dict[str, Any]] = {}
+    histograms: dict[float, LatencyHistogram] = {}
+    for points in series:
+        for point in points:
+            offset = point["offset"]
+            histogram = LatencyHistogram.from_dict(point["histogram"])
+            target = merged.get(offset)
+            if target is None:
+                merged[offset] = dict(point)
+                histograms[offset] = histogram
+                continue
+            for key in (
+                "total_requests", "successful_requests", "failed_requests",
+                "requests_per_second",
+            ):
+                target[key] += point[key]
+            target["duration"] = max(target["duration"], point["duration"])
+            histograms[offset].merge(histogram)
+    return [
+        {**merged[offset], **_latency_fields(histograms[offset])}
+        for offset in sorted(merged)
+    ]
+
+
+def format_interval(point: dict[str, Any]) -> str:
+    """Format a point of the time series as a one-line summary."""
+    return (
+        f"[{point['offset'] + point['duration']:7.1f}s] "
+        f"{point['requests_per_second']:9.1f} req/s, "
+        f"{point['failed_requests']} failed, "
+        f"p50 {point['request_time_p50'] * 1000:.1f} ms, "
+        f"p99 {point['request_time_p99'] * 1000:.1f} ms"
+    )
+
+
+class LiveLine:
+    """Listener rewriting a single status line on stderr for every interval."""
+
+    def __init__(self) -> None:
+        """Initialize the live line."""
+        self._width = 0
+
+    def __call__(self, point: dict[str, Any]) -> None:
+        """Replace the status line with the summary of ``point``."""
+        line = format_interval(point)
+        print(f"\r{line.ljust(self._width)}", end="", file=sys.stderr, flush=True)
+        self._width = len(line)
+
+    def finish(self) -> None:
+        """End the status line, if one was written."""
+        if self._width:
+            print(file=sys.stderr)
+            self._width = 0
+
+
+def print_ndjson(point: dict[str, Any]) -> None:
+    """Write a point of the time series as one JSON line on stdout."""
+    print(json.dumps({"type": "interval", **point}), flush=True)
@@ -0,0 +1,76 @@
+"""Per-phase request timings from aiohttp client tracing."""
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import aiohttp
+
+
+def _mark(name: str) -> Callable[..., Awaitable[None]]:
+    """Build a trace callback storing the time of an event under ``name``."""
+    async def on_event(
+        _session: aiohttp.ClientSession, context: Any, _params: Any,  # noqa: ANN401
+    ) -> None:
+        context.trace_request_ctx[name] = time.perf_counter()
+
+    return on_event
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Create a trace config marking the phases of every request.
+
+    The marks are stored in the dictionary passed to ``session.request`` as
+    ``trace_request_ctx``; ``request_phases`` turns them into durations.
+    """
+    trace_config = aiohttp.TraceConfig()
+    for signal, name in (
+        (trace_config.on_connection_queued_start, "queued_start"),
+        (trace_config.on_connection_queued_end, "queued_end"),
+        (trace_config.on_dns_resolvehost_start, "dns_start"),
+        (trace_config.on_dns_resolvehost_end, "dns_end"),
+        (trace_config.on_connection_create_start, "connect_start"),
+        (trace_config.on_connection_create_end, "connect_end"),
+        (trace_config.on_request_headers_sent, "sent"),
+        (trace_config.on_request_chunk_sent, "sent"),
+    ):
+        signal.append(_mark(name))
+    trace_config.freeze()
+    return trace_config
+
+
+def request_phases(
+    marks: dict[str, float], start: float, first_byte: float,
+) -> dict[str, float]:
+    """Split the time to first byte of a request into phases.
+
+    aiohttp resolves DNS inside the connection setup and has no TLS event,
+    so ``connect`` excludes ``dns`` but includes the TLS handshake. Phases
+    that did not happen, such as connecting on a reused connection, are left
+    out.
+
+    Args:
+        marks: ``time.perf_counter`` values recorded by the trace callbacks.
+        start: ``time.perf_counter`` value when the request started.
+        first_byte: ``time.perf_counter`` value when the first byte arrived.
+
+    Returns:
+        Durations in seconds of ``queue_wait``, ``dns``, ``connect``,
+        ``request_sent`` and ``server_time``.
+
+    """
+    phases = {}
+    ready = start
+    if "queued_end" in marks:
+        phases["queue_wait"] = marks["queued_end"] - marks["queued_start"]
+        ready = marks["queued_end"]
+    if "dns_end" in marks:
+        phases["dns"] = marks["dns_end"] - marks["dns_start"]
+    if "connect_end" in marks:
+        phases["connect"] = (
+            marks["connect_end"] - marks["connect_start"] - phases.get("dns", 0)
+        )
+        ready = marks["connect_end"]
+    if "sent" in marks:
+        phases["request_sent"] = marks["sent"] - ready
+        phases["server_time"] = first_byte - marks["sent"]
+    return phases
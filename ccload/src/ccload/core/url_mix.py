@@ -0,0 +1,108 @@
+"""Weighted mixes of URLs sent by a single run."""
+import random
+from collections.abc import Iterable
+
+
+class AliasSampler:
+    """Draw indices from a discrete distribution in constant time.
+
+    Walker's alias method, as laid out by Vose: the weights are spread over
+    one column per index, each column holding its own index with some
+    probability and an alias index otherwise. A draw picks a column and
+    flips one biased coin, whatever the number of weights.
+    """
+
+    def __init__(self, weights: list[float], seed: int | None = None) -> None:
+        """Build the probability and alias tables.
+
+        Args:
+            weights: Positive relative weights of the indices.
+            seed: Seed of the random generator.
+
+        """
+        if not weights or any(weight <= 0 for weight in weights):
+            msg = "Weights must be positive"
+            raise ValueError(msg)
+        count = len(weights)
+        total = sum(weights)
+        scaled = [weight * count / total for weight in weights]
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1]
+        large = [index for index, value in enumerate(scaled) if value >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        self._count = count
+        self._random = random.Random(seed)  # noqa: S311
+
+    def sample(self) -> int:
+        """Return a random index, drawn with the probability of its weight."""
+        column, coin = divmod(self._random.random() * self._count, 1)
+        index = int(column)
+        return index if coin < self._probability[index] else self._alias[index]
+
+
+class UrlMix:
+    """URLs sent by one run, each picked with a relative weight."""
+
+    def __init__(self, urls: list[str], weights: list[float] | None = None) -> None:
+        """Initialize the mix.
+
+        Args:
+            urls: URLs to request.
+            weights: Relative weight of every URL, equal weights by default.
+
+        """
+        if not urls:
+            msg = "A URL mix needs at least one URL"
+            raise ValueError(msg)
+        weights = weights if weights is not None else [1.0] * len(urls)
+        if len(weights) != len(urls) or any(weight <= 0 for weight in weights):
+            msg = "Every URL needs a positive weight"
+            raise ValueError(msg)
+        self.urls = urls
+        self.weights = weights
+
+    @classmethod
+    def parse(cls, lines: Iterable[str]) -> "UrlMix":
+        """Parse a URL list with one ``url [weight]`` per line.
+
+        Blank lines and lines starting with ``#`` are skipped; URLs without
+        a weight have weight 1.
+
+        Args:
+            lines: Lines of the URL list, e.g. an open file.
+
+        """
+        urls = []
+        weights = []
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            if len(fields) > 2:  # noqa: PLR2004
+                msg = f"Invalid URL line {line.strip()!r}, expected url [weight]"
+                raise ValueError(msg)
+            urls.append(fields[0])
+            try:
+                weights.append(float(fields[1]) if len(fields) == 2 else 1.0)  # noqa: PLR2004
+            except ValueError:
+                msg = f"Invalid weight in URL line {line.strip()!r}"
+                raise ValueError(msg) from None
+        return cls(urls, weights)
+
+    def sampler(self, seed: int | None = None) -> AliasSampler:
+        """Return a sampler drawing URL indices with the weights of the mix.
+
+        Every run builds its own sampler, so that processes sharing a pickled
+        mix do not draw the same sequence.
+
+        Args:
+            seed: Seed of the random generator.
+
+        """
+        return AliasSampler(self.weights, seed)
@@ -0,0 +1,57 @@
+"""NTP-style clock offset estimation between the coordinator and workers."""
+import time
+
+import aiohttp
+
+# Round trips measured per worker; the one with the shortest round trip
+# gives the offset estimate.
+CLOCK_SAMPLES = 8
+
+
+def clock_offset(samples: list[tuple[float, float, float]]) -> tuple[float, float]:
+    """Estimate the offset of a remote clock from request/response timestamps.
+
+    Each sample is ``(sent, remote, received)``: the local time the request
+    left, the remote time in the response and the local time the response
+    arrived. Assuming the remote time was read halfway through the round
+    trip, the offset is ``remote - (sent + received) / 2``, with an error of
+    at most half the round trip, so the sample with the shortest round trip
+    is used.
+
+    Args:
+        samples: Timestamps of every round trip.
+
+    Returns:
+        The offset to add to a local time to get the remote time, and the
+        round trip of the sample it was computed from, both in seconds.
+
+    """
+    sent, remote, received = min(samples, key=lambda sample: sample[2] - sample[0])
+    return remote - (sent + received) / 2, received - sent
+
+
+async def estimate_clock_offset(
+    session: aiohttp.ClientSession,
+    worker_url: str,
+    n_samples: int = CLOCK_SAMPLES,
+) -> tuple[float, float]:
+    """Estimate the clock offset of a worker through its ``/clock`` endpoint.
+
+    Args:
+        session: Session of the coordinator.
+        worker_url: Base URL of the worker.
+        n_samples: Number of round trips to measure.
+
+    Returns:
+        The offset of the worker clock and the round trip it was measured
+        with, as returned by ``clock_offset``.
+
+    """
+    samples = []
+    for _ in range(n_samples):
+        sent = time.time()
+        async with session.get(f"{worker_url}/clock") as response:
+            response.raise_for_status()
+            remote = (await response.json())["time"]
+        samples.append((sent, remote, time.time()))
+    return clock_offset(samples)
@@ -1,57 +1,452 @@
 """Distributed load test module."""
 import asyncio
+import sys
+import time
+import uuid
+from collections.abc import Callable
 from typing import Any
 
 import aiohttp
 
+from ccload.core.load_tester_features import DEFAULT_GRACE_PERIOD
+from ccload.core.statistics import breakdown_entry, merge_statistics
+from ccload.core.timeseries import (
+    DEFAULT_INTERVAL,
+    IntervalListener,
+    merge_timeseries,
+)
+from ccload.distributed.clock import estimate_clock_offset
+from ccload.distributed.leases import LeasePool, lease_size
+from ccload.distributed.streaming import HEARTBEAT_TIMEOUT, iter_ndjson
 
-async def send_task(
+# Seconds between the moment every worker is prepared and the start of the
+# load, on top of the longest clock round trip, for the start messages to
+# reach the workers.
+START_MARGIN = 0.5
+
+
+class IntervalMerger:
+    """Merge the live time series of several workers.
+
+    A merged point is handed to the listener once every worker still
+    running has reported the same interval, in interval order.
+    """
+
+    def __init__(
+        self,
+        workers: list[str],
+        listener: IntervalListener | None,
+        shift: float = 0.0,
+    ) -> None:
+        """Initialize the merger.
+
+        Args:
+            workers: URLs of the workers taking part in the test.
+            listener: Called with every merged point.
+            shift: Seconds added to the offset of every merged point, for
+                workers started after the beginning of the test.
+
+        """
+        self.active = set(workers)
+        self.listener = listener
+        self.shift = shift
+        self._received: dict[float, dict[str, dict[str, Any]]] = {}
+
+    def add(self, worker: str, point: dict[str, Any]) -> None:
+        """Add a point reported by a worker."""
+        self._received.setdefault(point["offset"], {})[worker] = point
+        self._flush()
+
+    def finish(self, worker: str) -> None:
+        """Stop waiting for points from a worker that finished or failed."""
+        self.active.discard(worker)
+        self._flush()
+
+    def _flush(self) -> None:
+        """Hand out the merged points every running worker has reported."""
+        for offset in sorted(self._received):
+            points = self._received[offset]
+            if not self.active <= points.keys():
+                return
+            del self._received[offset]
+            if self.listener is not None:
+                merged = merge_timeseries([[point] for point in points.values()])
+                self.listener({**merged[0], "offset": offset + self.shift})
+
+
+async def send_task(  # noqa: PLR0913
     session: aiohttp.ClientSession,
     worker_url: str,
     payload: dict[str, Any],
+    merger: IntervalMerger | None = None,
+    heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+    on_message: Callable[[dict[str, Any]], None] | None = None,
 ) -> dict[str, Any]:
-    """Send a task to a worker."""
+    """Send a task to a worker and follow its progress until it finishes.
+
+    The worker streams NDJSON messages while the test runs. The task only
+    times out when no message, heartbeats included, arrived for
+    ``heartbeat_timeout`` seconds, however long the test itself is.
+    Control messages, such as ``prepared`` or ``lease``, are handed to
+    ``on_message``. Progress and failures are reported on stderr, leaving
+    stdout to the results.
+    """
+    timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=heartbeat_timeout, sock_read=heartbeat_timeout,
+    )
     try:
-        print(f"Sending to {worker_url} with {payload['n_request']} requests")
-        async with session.post(f"{worker_url}/run-test", json=payload) as response:
+        print(
+            f"Sending to {worker_url} with {payload['n_request']} requests",
+            file=sys.stderr,
+        )
+        async with session.post(
+            f"{worker_url}/run-test/stream", json=payload, timeout=timeout,
+        ) as response:
             response.raise_for_status()
-            return await response.json()
+            async for message in iter_ndjson(response.content.iter_any()):
+                if message["type"] == "interval" and merger is not None:
+                    del message["type"]
+                    merger.add(worker_url, message)
+                elif message["type"] == "result":
+                    return message["statistics"]
+                elif message["type"] == "error":
+                    print(
+                        f"Worker {worker_url} failed: {message['message']}",
+                        file=sys.stderr,
+                    )
+                    return {}
+                elif on_message is not None:
+                    on_message(message)
+        print(f"Worker {worker_url} closed the stream without results", file=sys.stderr)
+    except TimeoutError:
+        print(
+            f"No heartbeat from {worker_url} for {heartbeat_timeout}s",
+            file=sys.stderr,
+        )
     except aiohttp.ClientError as e:
-        print(f"Failed to contact {worker_url}: {e}")
-        return {}
+        print(f"Failed to contact {worker_url}: {e}", file=sys.stderr)
+    finally:
+        if merger is not None:
+            merger.finish(worker_url)
+    return {}
+
+
+async def _sync_clock(
+    session: aiohttp.ClientSession, worker_url: str,
+) -> tuple[float, float] | None:
+    """Estimate the clock offset of a worker, or None if it cannot be reached."""
+    try:
+        return await estimate_clock_offset(session, worker_url)
+    except (aiohttp.ClientError, TimeoutError) as e:
+        print(f"Failed to read the clock of {worker_url}: {e}", file=sys.stderr)
+        return None
+
+
+async def _control(
+    session: aiohttp.ClientSession,
+    worker_url: str,
+    path: str,
+    payload: dict[str, Any],
+    key: str,
+) -> bool:
+    """Send a control request to a worker about one of its tests.
+
+    Args:
+        session: Session of the coordinator.
+        worker_url: Base URL of the worker.
+        path: Path of the control endpoint, such as ``/start``.
+        payload: JSON body, with the ``test_id``.
+        key: Boolean field of the response telling whether it was applied.
+
+    Returns:
+        Whether the worker applied the request.
+
+    """
+    try:
+        async with session.post(f"{worker_url}{path}", json=payload) as response:
+            response.raise_for_status()
+            applied = (await response.json())[key]
+    except aiohttp.ClientError as e:
+        print(f"Failed to reach {worker_url}{path}: {e}", file=sys.stderr)
+        return False
+    if not applied:
+        print(
+            f"Worker {worker_url} is not running test {payload['test_id']}",
+            file=sys.stderr,
+        )
+    return applied
+
+
+async def _run_synchronized(  # noqa: PLR0913
+    session: aiohttp.ClientSession,
+    tasks: dict[str, dict[str, Any]],
+    clocks: dict[str, tuple[float, float]],
+    merger: IntervalMerger,
+    heartbeat_timeout: float,
+    pool: LeasePool | None = None,
+) -> list[dict[str, Any]]:
+    """Prepare every worker, then start them all at the same instant.
+
+    With a ``pool``, workers ask for leases while they run; the leases of a
+    worker that fails go back to the pool as soon as it does.
+
+    Args:
+        session: Session of the coordinator.
+        tasks: Payload of every worker, by worker URL.
+        clocks: Clock offset and round trip of every worker.
+        merger: Merger of the live time series.
+        heartbeat_timeout: Seconds without messages before giving up on a
+            worker.
+        pool: Request budget leased to the workers, if any.
+
+    Returns:
+        The results of every worker, empty for those that failed or were not
+        started.
+
+    """
+    run_id = uuid.uuid4().hex
+    test_ids = {
+        worker_url: f"{run_id}-{index}" for index, worker_url in enumerate(tasks)
+    }
+    prepared = {worker_url: asyncio.Event() for worker_url in tasks}
+    grants: set[asyncio.Task] = set()
+
+    async def grant(worker_url: str) -> None:
+        lease = {"test_id": test_ids[worker_url], "n_request": pool.take(worker_url)}
+        if not await _control(session, worker_url, "/lease", lease, "granted"):
+            running[worker_url].cancel()
+
+    def handler(worker_url: str) -> Callable[[dict[str, Any]], None]:
+        def on_message(message: dict[str, Any]) -> None:
+            if message["type"] == "prepared":
+                prepared[worker_url].set()
+            elif message["type"] == "lease" and pool is not None:
+                task = asyncio.create_task(grant(worker_url))
+                grants.add(task)
+                task.add_done_callback(grants.discard)
+
+        return on_message
+
+    async def follow(worker_url: str, payload: dict[str, Any]) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        try:
+            result = await send_task(
+                session, worker_url,
+                {**payload, "test_id": test_ids[worker_url], "warmup": True},
+                merger, heartbeat_timeout, handler(worker_url),
+            )
+        finally:
+            if pool is not None:
+                (pool.done if result else pool.fail)(worker_url)
+        return result
+
+    running = {
+        worker_url: asyncio.create_task(follow(worker_url, payload))
+        for worker_url, payload in tasks.items()
+    }
+    await _start_prepared(session, running, prepared, test_ids, clocks)
+    results = await asyncio.gather(*running.values(), return_exceptions=True)
+    return [result if isinstance(result, dict) else {} for result in results]
+
+
+async def _start_prepared(
+    session: aiohttp.ClientSession,
+    running: dict[str, asyncio.Task],
+    prepared: dict[str, asyncio.Event],
+    test_ids: dict[str, str],
+    clocks: dict[str, tuple[float, float]],
+) -> None:
+    """Wait for every worker to be prepared, then start them together.
+
+    Args:
+        session: Session of the coordinator.
+        running: Task following each worker.
+        prepared: Event set once each worker is prepared.
+        test_ids: Id of the test of each worker.
+        clocks: Clock offset and round trip of every worker.
+
+    """
+    for worker_url, task in running.items():
+        waiter = asyncio.ensure_future(prepared[worker_url].wait())
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+
+    round_trip = max(round_trip for _, round_trip in clocks.values())
+    start_at = time.time() + START_MARGIN + round_trip
+    ready = [worker_url for worker_url, event in prepared.items() if event.is_set()]
+    accepted = await asyncio.gather(*(
+        _control(
+            session, worker_url, "/start",
+            {
+                "test_id": test_ids[worker_url],
+                "start_at": start_at + clocks[worker_url][0],
+            },
+            "started",
+        )
+        for worker_url in ready
+    ))
+    started = {
+        worker_url for worker_url, ok in zip(ready, accepted, strict=True) if ok
+    }
+    # A worker that was not started would wait, heartbeating, until its
+    # prepare timeout: stop following it right away.
+    for worker_url, task in running.items():
+        if worker_url not in started:
+            task.cancel()
+
+
+async def _run_rounds(  # noqa: PLR0913
+    session: aiohttp.ClientSession,
+    payload: dict[str, Any],
+    clocks: dict[str, tuple[float, float]],
+    pool: LeasePool | None,
+    on_interval: IntervalListener | None,
+    heartbeat_timeout: float,
+) -> dict[str, list[dict[str, Any]]]:
+    """Run synchronized rounds until the leased budget is spent.
+
+    Requests leased to a worker that failed after the others were told
+    there was no work left are run in another round, by the workers still
+    alive. Results are brought onto the coordinator clock, and the time
+    series of later rounds are shifted to their start.
+
+    Returns:
+        The results of every round, by worker URL.
+
+    """
+    results: dict[str, list[dict[str, Any]]] = {}
+    alive = list(clocks)
+    first_start = time.time()
+    while alive:
+        tasks = {}
+        for worker_url in alive:
+            if pool is None:
+                tasks[worker_url] = payload
+            elif n_request := pool.take(worker_url):
+                tasks[worker_url] = {**payload, "n_request": n_request, "leased": True}
+        if not tasks:
+            break
+        shift = (
+            round((time.time() - first_start) / DEFAULT_INTERVAL) * DEFAULT_INTERVAL
+        )
+        merger = IntervalMerger(list(tasks), on_interval, shift)
+        round_results = await _run_synchronized(
+            session, tasks, clocks, merger, heartbeat_timeout, pool,
+        )
+        for worker_url, result in zip(tasks, round_results, strict=True):
+            if not result:
+                alive.remove(worker_url)
+                continue
+            # Bring the worker time window onto the coordinator clock.
+            offset = clocks[worker_url][0]
+            result["started_at"] -= offset
+            result["finished_at"] -= offset
+            for point in result.get("timeseries", []):
+                point["offset"] += shift
+            results.setdefault(worker_url, []).append(result)
+        if pool is None or not pool.remaining:
+            break
+        print(
+            f"Reassigning {pool.remaining} requests of failed workers",
+            file=sys.stderr,
+        )
+    return results
+
 
 async def run_distributed_load_test(  # noqa: PLR0913
-    url: str, n_request: int, n_concurrency: int,
+    url: str, n_request: int | None, n_concurrency: int,
     method: str = "GET", headers: dict[str, str] | None = None,
     json_data: dict[str, Any] | None = None,
     workers: list[str] | None = None,
-) -> list[dict[str, Any]]:
-    """Run a distributed load test."""
+    *,
+    duration: float | None = None,
+    grace_period: float | None = DEFAULT_GRACE_PERIOD,
+    on_interval: IntervalListener | None = None,
+    heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+) -> dict[str, Any]:
+    """Run a distributed load test.
+
+    Workers stream their time series while the test runs; the points of
+    every interval are merged and handed to ``on_interval`` live. Workers
+    return their histograms, counts and time window, so their results are
+    merged into one exact report: percentiles are those of all requests
+    together and throughput is computed over the union of the worker time
+    windows. A per-worker breakdown, with the time series of every worker,
+    is kept under ``workers``.
+
+    The workers start together: the clock offset of each one is estimated
+    over the control channel, every worker opens and warms up its connection
+    pool, and once all are prepared they are told to start at the same
+    instant, converted to their own clocks. Worker time windows are brought
+    back onto the coordinator clock before merging.
+
+    Every worker runs ``n_concurrency`` concurrent requests. A number of
+    requests is handed out in leases from a ``LeasePool``, so faster workers
+    send more of them and the requests of a failed worker are sent by the
+    others. With only a ``duration``, every worker runs for that long.
+
+    Returns:
+        The merged statistics, or an empty dictionary if no worker returned
+        results.
+
+    """
     if not workers:
-        print("No workers specified")
-        return []
-
-    num_workers = len(workers)
-    reqs_per_worker = n_request // num_workers
-    remainder = n_request % num_workers
-
-    payloads = []
-    for i in range(num_workers):
-        payload = {
-            "url": url,
-            "n_request": reqs_per_worker + (1 if i < remainder else 0),
-            "n_concurrency": n_concurrency,
-            "method": method,
-            "headers": headers,
-            "json_data": json_data,
+        print("No workers specified", file=sys.stderr)
+        return {}
+
+    payload = {
+        "url": url,
+        "n_request": None,
+        "n_concurrency": n_concurrency,
+        "method": method,
+        "headers": headers,
+        "json_data": json_data,
+        "duration": duration,
+        "grace_period": grace_period,
+    }
+    pool = (
+        LeasePool(n_request, lease_size(n_request, len(workers), n_concurrency))
+        if n_request is not None else None
+    )
+
+    async with aiohttp.ClientSession() as session:
+        offsets = await asyncio.gather(
+            *(_sync_clock(session, worker_url) for worker_url in workers),
+        )
+        clocks = {
+            worker_url: clock
+            for worker_url, clock in zip(workers, offsets, strict=True)
+            if clock is not None
         }
-        payloads.append(payload)
-
-    timeout = aiohttp.ClientTimeout(total=60)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        tasks = [
-            send_task(session, worker_url, payload)
-            for worker_url, payload in zip(workers, payloads, strict=False)
-        ]
-        results = await asyncio.gather(*tasks)
-        return [result for result in results if result]
+        if not clocks:
+            return {}
+        results = await _run_rounds(
+            session, payload, clocks, pool, on_interval, heartbeat_timeout,
+        )
+
+    if not results:
+        return {}
+    merged = merge_statistics(
+        [result for worker_results in results.values() for result in worker_results],
+    )
+    merged["timeseries"] = merge_timeseries([
+        result.get("timeseries", [])
+        for worker_results in results.values() for result in worker_results
+    ])
+    merged["workers"] = []
+    for worker_url, worker_results in results.items():
+        worker = merge_statistics(worker_results)
+        merged["workers"].append({
+            "worker": worker_url,
+            "clock_offset": clocks[worker_url][0],
+            "clock_round_trip": clocks[worker_url][1],
+            "started_at": worker["started_at"],
+            **({"leases": pool.leases[worker_url]} if pool is not None else {}),
+            **breakdown_entry(worker),
+            "timeseries": merge_timeseries(
+                [result.get("timeseries", []) for result in worker_results],
+            ),
+        })
+    if pool is not None and pool.remaining:
+        print(f"{pool.remaining} requests could not be sent", file=sys.stderr)
+    return merged
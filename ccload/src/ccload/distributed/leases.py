@@ -0,0 +1,66 @@
+"""Lease-based distribution of a request budget between workers."""
+import math
+from collections import Counter
+
+# Leases each worker should get on average, so that fast workers can take
+# over the work of slow ones before the end of the run.
+LEASES_PER_WORKER = 8
+
+
+def lease_size(n_request: int, n_workers: int, n_concurrency: int) -> int:
+    """Return the number of requests handed out per lease.
+
+    A lease keeps every connection of a worker busy and the budget is cut
+    into about ``LEASES_PER_WORKER`` leases per worker.
+
+    Args:
+        n_request: Total number of requests.
+        n_workers: Number of workers.
+        n_concurrency: Number of concurrent requests of each worker.
+
+    """
+    return max(n_concurrency, math.ceil(n_request / (n_workers * LEASES_PER_WORKER)))
+
+
+class LeasePool:
+    """Request budget handed out to workers one lease at a time.
+
+    Workers that finish their leases early ask for more, so faster workers
+    end up sending more requests. The requests leased to a worker that fails
+    go back to the pool, as its results are lost, and are leased again.
+    """
+
+    def __init__(self, n_request: int, size: int) -> None:
+        """Initialize the pool.
+
+        Args:
+            n_request: Total number of requests.
+            size: Number of requests per lease.
+
+        """
+        self.remaining = n_request
+        self.size = size
+        self.leases: Counter[str] = Counter()
+        self._outstanding: Counter[str] = Counter()
+
+    def take(self, worker: str) -> int:
+        """Lease requests to a worker.
+
+        Returns:
+            The number of requests leased, 0 once the pool is empty.
+
+        """
+        n_request = min(self.size, self.remaining)
+        if n_request:
+            self.remaining -= n_request
+            self._outstanding[worker] += n_request
+            self.leases[worker] += 1
+        return n_request
+
+    def done(self, worker: str) -> None:
+        """Settle the leases of a worker that returned its results."""
+        del self._outstanding[worker]
+
+    def fail(self, worker: str) -> None:
+        """Put the leases of a worker that failed back into the pool."""
+        self.remaining += self._outstanding.pop(worker, 0)
@@ -0,0 +1,227 @@
+"""NDJSON result streaming between distributed workers and the coordinator."""
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from ccload.core.load_tester_features import DEFAULT_GRACE_PERIOD, load_tester
+from ccload.core.scheduler import LeasedCounter
+
+# Seconds without any other message after which a worker sends a heartbeat.
+HEARTBEAT_INTERVAL = 1.0
+
+# Seconds without any message after which the coordinator gives up on a
+# worker.
+HEARTBEAT_TIMEOUT = 10.0
+
+# Seconds a prepared test waits for its start time before giving up.
+PREPARE_TIMEOUT = 60.0
+
+# Start times of the prepared tests waiting for the coordinator, by test id.
+_start_times: dict[str, asyncio.Future[float]] = {}
+
+# Request counters of the running leased tests, by test id.
+_leases: dict[str, LeasedCounter] = {}
+
+
+def clock_reading() -> dict[str, float]:
+    """Return the current time of the worker, for clock offset estimation."""
+    return {"time": time.time()}
+
+
+def start_test(test_id: str, start_at: float) -> bool:
+    """Release a prepared test at ``start_at``, in seconds since the epoch.
+
+    Args:
+        test_id: Id the coordinator gave the test.
+        start_at: Start time of the load, on the clock of this worker.
+
+    Returns:
+        Whether a prepared test with this id was waiting.
+
+    """
+    start_time = _start_times.get(test_id)
+    if start_time is None or start_time.done():
+        return False
+    start_time.set_result(start_at)
+    return True
+
+
+def grant_lease(test_id: str, n_request: int) -> bool:
+    """Grant a running leased test more requests, or close it with 0.
+
+    Args:
+        test_id: Id the coordinator gave the test.
+        n_request: Number of requests of the lease, or 0 when there is no
+            work left.
+
+    Returns:
+        Whether a leased test with this id was running.
+
+    """
+    counter = _leases.get(test_id)
+    if counter is None:
+        return False
+    if n_request:
+        counter.grant(n_request)
+    else:
+        counter.close()
+    return True
+
+
+def _two_phase_start(
+    test_id: str, messages: asyncio.Queue[dict[str, Any]],
+) -> Callable[[], Awaitable[None]]:
+    """Build the ``wait_start`` of a test released by ``start_test``.
+
+    Args:
+        test_id: Id the coordinator gave the test.
+        messages: Queue of the messages streamed to the coordinator.
+
+    Returns:
+        A coroutine function announcing that the test is prepared, then
+        waiting for its start time, for at most ``PREPARE_TIMEOUT`` seconds.
+
+    """
+    start_time = asyncio.get_running_loop().create_future()
+    _start_times[test_id] = start_time
+
+    async def wait_start() -> None:
+        messages.put_nowait({"type": "prepared"})
+        try:
+            start_at = await asyncio.wait_for(start_time, PREPARE_TIMEOUT)
+        except TimeoutError:
+            msg = f"Not started within {PREPARE_TIMEOUT}s of being prepared"
+            raise RuntimeError(msg) from None
+        await asyncio.sleep(max(start_at - time.time(), 0))
+
+    return wait_start
+
+
+def _coordinate(
+    test_id: str,
+    payload: dict[str, Any],
+    options: dict[str, Any],
+    messages: asyncio.Queue[dict[str, Any]],
+) -> None:
+    """Let the coordinator start a test and, if leased, feed its budget.
+
+    Args:
+        test_id: Id the coordinator gave the test.
+        payload: JSON body sent by the coordinator.
+        options: ``load_tester`` arguments, updated in place.
+        messages: Queue of the messages streamed to the coordinator.
+
+    """
+    options["wait_start"] = _two_phase_start(test_id, messages)
+    if payload.get("leased"):
+        options["counter"] = _leases[test_id] = LeasedCounter(
+            options["n_request"] or 0,
+            lambda: messages.put_nowait({"type": "lease"}),
+        )
+        options["n_request"] = None
+
+
+def run_options(payload: dict[str, Any]) -> dict[str, Any]:
+    """Build the ``load_tester`` arguments of a test request.
+
+    Args:
+        payload: JSON body sent by the coordinator.
+
+    """
+    return {
+        "url": payload["url"],
+        "n_request": payload["n_request"],
+        "n_concurrency": payload["n_concurrency"],
+        "method": payload.get("method", "GET"),
+        "headers": payload.get("headers"),
+        "json_data": payload.get("json_data"),
+        "duration": payload.get("duration"),
+        "grace_period": payload.get("grace_period", DEFAULT_GRACE_PERIOD),
+        "warmup": payload.get("warmup", False),
+    }
+
+
+async def stream_load_test(payload: dict[str, Any]) -> AsyncIterator[bytes]:
+    """Run a load test and stream its progress as NDJSON lines.
+
+    Every line is a JSON object with a ``type``: ``interval`` for each
+    point of the time series as it closes, ``heartbeat`` when nothing else
+    was sent for ``HEARTBEAT_INTERVAL`` seconds, then a final ``result``
+    holding the ``statistics``, or ``error`` with a ``message``. The test
+    is cancelled if the consumer stops reading.
+
+    When the payload has a ``test_id``, the test runs in two phases: once
+    the connection pool is open (and warmed up), a ``prepared`` message is
+    sent and the load only starts at the time given to ``start_test``. Each
+    worker of a distributed test gets its own id.
+
+    A ``leased`` test treats ``n_request`` as its first lease: when less than
+    half of the last lease is left, a ``lease`` message asks for more, which
+    the coordinator grants through ``grant_lease``.
+
+    Args:
+        payload: JSON body sent by the coordinator.
+
+    Yields:
+        Encoded NDJSON lines.
+
+    """
+    messages: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    def on_interval(point: dict[str, Any]) -> None:
+        messages.put_nowait({"type": "interval", **point})
+
+    def on_done(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            messages.put_nowait({"type": "error", "message": str(task.exception())})
+        else:
+            messages.put_nowait({"type": "result", "statistics": task.result()})
+
+    options = run_options(payload)
+    test_id = payload.get("test_id")
+    if test_id is not None:
+        _coordinate(test_id, payload, options, messages)
+
+    test = asyncio.ensure_future(load_tester(**options, on_interval=on_interval))
+    test.add_done_callback(on_done)
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(messages.get(), HEARTBEAT_INTERVAL)
+            except TimeoutError:
+                message = {"type": "heartbeat"}
+            yield json.dumps(message).encode() + b"\n"
+            if message["type"] in {"result", "error"}:
+                return
+    finally:
+        test.cancel()
+        if test_id is not None:
+            _start_times.pop(test_id, None)
+            _leases.pop(test_id, None)
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict[str, Any]]:
+    """Decode a stream of NDJSON lines, whatever the size of each line.
+
+    Args:
+        chunks: Raw chunks of the stream.
+
+    Yields:
+        Decoded JSON objects.
+
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) >= 0:
+            if end > start:
+                yield json.loads(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+    if buffer.strip():
+        yield json.loads(buffer)
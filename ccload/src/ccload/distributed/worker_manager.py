@@ -0,0 +1,307 @@
+"""Lifecycle of local worker servers: spawning, readiness and reuse."""
+import asyncio
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+
+import aiohttp
+
+# Seconds spawned workers get to answer their health endpoint.
+READY_TIMEOUT = 30.0
+
+# Seconds between two health probes of a worker that is not ready yet.
+READY_POLL_INTERVAL = 0.05
+
+# Seconds a warm worker gets to answer its health endpoint before the pool
+# is not trusted.
+HEALTH_TIMEOUT = 2.0
+
+# File recording the warm worker pool started by ``ccload workers up``.
+STATE_FILE = Path(tempfile.gettempdir()) / "ccload-workers.json"
+
+
+def free_ports(count: int) -> list[int]:
+    """Return ``count`` distinct TCP ports currently free on the loopback.
+
+    Args:
+        count: Number of ports.
+
+    """
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def worker_command(port: int, loop: str = "asyncio") -> list[str]:
+    """Return the command starting a worker server on ``port``.
+
+    Args:
+        port: Port to listen on.
+        loop: Event loop of the worker, ``asyncio`` or ``uvloop``.
+
+    """
+    uvicorn_path = shutil.which("uvicorn")
+    if not uvicorn_path:
+        msg = "uvicorn executable not found in PATH"
+        raise RuntimeError(msg)
+    return [
+        uvicorn_path, "ccload.distributed.worker_server:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--loop", loop,
+    ]
+
+
+async def wait_until_ready(
+    urls: list[str], processes: list[subprocess.Popen] | None = None,
+) -> None:
+    """Poll the ``/health`` endpoint of every worker until all answer.
+
+    Callers bound the wait with ``asyncio.timeout``.
+
+    Args:
+        urls: Base URLs of the workers.
+        processes: Processes of the workers, to fail fast if one exits.
+
+    """
+    probe_timeout = aiohttp.ClientTimeout(total=READY_POLL_INTERVAL * 20)
+    async with aiohttp.ClientSession(timeout=probe_timeout) as session:
+        pending = dict(zip(urls, processes or [None] * len(urls), strict=True))
+        while pending:
+            for url, process in list(pending.items()):
+                if process is not None and process.poll() is not None:
+                    msg = f"Worker {url} exited with {process.returncode}"
+                    raise RuntimeError(msg)
+                try:
+                    async with session.get(f"{url}/health") as response:
+                        if response.status == 200:  # noqa: PLR2004
+                            del pending[url]
+                except (aiohttp.ClientError, TimeoutError):
+                    pass
+            if pending:
+                await asyncio.sleep(READY_POLL_INTERVAL)
+
+
+def _start_time(pid: int) -> str | None:
+    """Return the start time of a process, telling it from a later one with its id.
+
+    The start time is read from ``/proc`` where available and from ``ps``
+    otherwise.
+
+    Returns:
+        An opaque start time, or None if the process does not exist or its
+        start time cannot be read.
+
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        pass
+    else:
+        # Field 22, after the command name in parentheses.
+        return stat.rpartition(")")[2].split()[19]
+    ps_path = shutil.which("ps")
+    if not ps_path:
+        return None
+    try:
+        ps = subprocess.run(  # noqa: S603
+            [ps_path, "-o", "lstart=", "-p", str(pid)],
+            capture_output=True, text=True, check=False, timeout=READY_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return ps.stdout.strip() or None
+
+
+def _is_running(pid: int, started: str | None = None) -> bool:
+    """Return whether a process with this id exists and is the one recorded.
+
+    Args:
+        pid: Process id.
+        started: Start time recorded by ``_start_time`` when the process was
+            spawned; a process with the same id but another start time, e.g.
+            after a reboot, is a different process. None checks the id only.
+
+    """
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, PermissionError):
+        # A process of another user is not a worker spawned by this one.
+        return False
+    return started is None or _start_time(pid) == started
+
+
+class WorkerPool:
+    """Local worker servers started on free ports.
+
+    A pool started with ``detach`` outlives the process that started it:
+    ``save`` records it in a state file, so that later runs can ``load`` and
+    reuse the warm workers until they are stopped. The start time of every
+    worker is recorded with its process id, so that a recorded id reused by
+    an unrelated process is neither signalled nor trusted.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        pids: list[int],
+        processes: list[subprocess.Popen] | None = None,
+        started: list[str | None] | None = None,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            urls: Base URLs of the workers.
+            pids: Process ids of the workers.
+            processes: Worker processes started by this process, if any.
+            started: Start times of the workers, read now if not given.
+
+        """
+        self.urls = urls
+        self.pids = pids
+        self.processes = processes or []
+        self.started = started or [_start_time(pid) for pid in pids]
+
+    @property
+    def alive(self) -> bool:
+        """Whether every worker of the pool is still running."""
+        return all(
+            _is_running(pid, started)
+            for pid, started in zip(self.pids, self.started, strict=True)
+        )
+
+    async def healthy(self) -> bool:
+        """Return whether every worker answers its health endpoint.
+
+        Each worker gets ``HEALTH_TIMEOUT`` seconds in total to answer.
+        """
+        try:
+            async with asyncio.timeout(HEALTH_TIMEOUT):
+                await wait_until_ready(self.urls)
+        except TimeoutError:
+            return False
+        return True
+
+    @classmethod
+    async def start(
+        cls,
+        count: int,
+        loop: str = "asyncio",
+        *,
+        detach: bool = False,
+    ) -> "WorkerPool":
+        """Start ``count`` workers and wait until every one is ready.
+
+        Args:
+            count: Number of workers.
+            loop: Event loop of the workers.
+            detach: Start the workers in their own session, so that they keep
+                running after this process exits.
+
+        Returns:
+            The ready pool. If a worker is not ready within ``READY_TIMEOUT``
+            seconds, they are all stopped and ``RuntimeError`` is raised.
+
+        """
+        ports = free_ports(count)
+        processes = [
+            subprocess.Popen(  # noqa: ASYNC220, S603
+                worker_command(port, loop),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=detach,
+            )
+            for port in ports
+        ]
+        pool = cls(
+            [f"http://127.0.0.1:{port}" for port in ports],
+            [process.pid for process in processes],
+            processes,
+        )
+        try:
+            async with asyncio.timeout(READY_TIMEOUT):
+                await wait_until_ready(pool.urls, processes)
+        except TimeoutError:
+            pool.stop()
+            msg = f"Workers not ready within {READY_TIMEOUT}s"
+            raise RuntimeError(msg) from None
+        except BaseException:
+            pool.stop()
+            raise
+        return pool
+
+    def stop(self) -> None:
+        """Terminate every worker of the pool still running."""
+        for pid, started in zip(self.pids, self.started, strict=True):
+            if _is_running(pid, started):
+                os.kill(pid, signal.SIGTERM)
+        for process in self.processes:
+            try:
+                process.wait(timeout=READY_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def save(self, path: Path = STATE_FILE) -> None:
+        """Record the pool in a state file."""
+        path.write_text(json.dumps(
+            {"urls": self.urls, "pids": self.pids, "started": self.started},
+        ))
+
+    @classmethod
+    def load(cls, path: Path = STATE_FILE) -> "WorkerPool | None":
+        """Return the pool recorded in a state file, or None if there is none."""
+        try:
+            state = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if "started" not in state:
+            # Recorded before start times were: no process can be verified.
+            return None
+        return cls(state["urls"], state["pids"], started=state["started"])
+
+
+async def workers_up(
+    count: int, loop: str = "asyncio", path: Path = STATE_FILE,
+) -> WorkerPool:
+    """Start a warm pool of detached workers and record it, replacing any.
+
+    Args:
+        count: Number of workers.
+        loop: Event loop of the workers.
+        path: State file of the pool.
+
+    """
+    workers_down(path)
+    pool = await WorkerPool.start(count, loop, detach=True)
+    pool.save(path)
+    return pool
+
+
+def workers_down(path: Path = STATE_FILE) -> WorkerPool | None:
+    """Stop the warm pool recorded in the state file, if any.
+
+    Args:
+        path: State file of the pool.
+
+    Returns:
+        The pool that was stopped.
+
+    """
+    pool = WorkerPool.load(path)
+    if pool is not None:
+        pool.stop()
+    path.unlink(missing_ok=True)
+    return pool
+
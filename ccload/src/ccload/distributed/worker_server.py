@@ -3,20 +3,51 @@
 from typing import Any
 
 from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 
 from ccload.core.load_tester_features import load_tester
+from ccload.distributed.streaming import (
+    clock_reading,
+    grant_lease,
+    run_options,
+    start_test,
+    stream_load_test,
+)
 
 app = FastAPI()
 
+@app.get("/health")
+async def health() -> dict[str, str]:
+    """Tell the worker manager that the worker is ready."""
+    return {"status": "ok"}
+
 @app.post("/run-test")
 async def run_test(request: Request) -> dict[str, Any]:
     """Run a load test."""
     payload = await request.json()
-    return await load_tester(
-        url=payload["url"],
-        n_request=payload["n_request"],
-        n_concurrency=payload["n_concurrency"],
-        method=payload.get("method", "GET"),
-        headers=payload.get("headers"),
-        json_data=payload.get("json_data"),
+    return await load_tester(**run_options(payload))
+
+@app.post("/run-test/stream")
+async def run_test_stream(request: Request) -> StreamingResponse:
+    """Run a load test, streaming its progress and results as NDJSON."""
+    payload = await request.json()
+    return StreamingResponse(
+        stream_load_test(payload), media_type="application/x-ndjson",
     )
+
+@app.get("/clock")
+async def clock() -> dict[str, float]:
+    """Return the worker time, for clock offset estimation."""
+    return clock_reading()
+
+@app.post("/start")
+async def start(request: Request) -> dict[str, bool]:
+    """Release a prepared test at the given start time."""
+    payload = await request.json()
+    return {"started": start_test(payload["test_id"], payload["start_at"])}
+
+@app.post("/lease")
+async def lease(request: Request) -> dict[str, bool]:
+    """Grant a running leased test more requests, or close it."""
+    payload = await request.json()
+    return {"granted": grant_lease(payload["test_id"], payload["n_request"])}
@@ -0,0 +1,257 @@
+"""InfluxDB line protocol export of the time series of load tests."""
+import collections
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from ccload.core.profile import LoadProfile
+from ccload.core.statistics import percentile_key
+from ccload.core.timeseries import INTERVAL_PERCENTILES
+
+MEASUREMENT = "ccload"
+
+# Fields of every line: counts as integers, throughput and request time in
+# seconds as floats.
+COUNT_FIELDS = ("total_requests", "successful_requests", "failed_requests")
+VALUE_FIELDS = (
+    "requests_per_second",
+    "request_time_mean",
+    *(percentile_key("request_time", percent) for percent in INTERVAL_PERCENTILES),
+    "request_time_max",
+)
+
+# Lines sent to the server in one write request.
+INFLUX_BATCH_SIZE = 500
+
+# Seconds a partial batch waits for more lines before it is sent.
+INFLUX_FLUSH_INTERVAL = 5.0
+
+# Lines buffered while the server is slow or unreachable; the oldest ones
+# are dropped beyond it.
+MAX_PENDING_LINES = 10_000
+
+# Seconds before retrying a failed write, doubled on every failure in a row.
+INFLUX_RETRY_DELAY = 1.0
+INFLUX_MAX_RETRY_DELAY = 30.0
+
+# Seconds a write request may take.
+INFLUX_TIMEOUT = 10.0
+
+_TAG_ESCAPES = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ "})
+
+
+def _tag_set(tags: dict[str, str]) -> str:
+    """Format the tag set of a line, sorted by key as InfluxDB stores it."""
+    return "".join(
+        f",{name}={value.translate(_TAG_ESCAPES)}"
+        for name, value in sorted(tags.items()) if value
+    )
+
+
+def point_line(point: dict[str, Any], tags: dict[str, str], timestamp_ns: int) -> str:
+    """Format a point of the time series as one line of the line protocol.
+
+    Args:
+        point: Point of the time series.
+        tags: Tags of the line, e.g. ``url``, ``worker`` and ``stage``.
+        timestamp_ns: Time of the line in nanoseconds since the epoch.
+
+    """
+    fields = [f"{field}={point[field]}i" for field in COUNT_FIELDS]
+    fields.extend(f"{field}={float(point[field])!r}" for field in VALUE_FIELDS)
+    return f"{MEASUREMENT}{_tag_set(tags)} {','.join(fields)} {timestamp_ns}"
+
+
+def profile_stages(profile: LoadProfile | None) -> list[dict[str, Any]]:
+    """Return the stages of a profile as in the ``stages`` of the statistics."""
+    if profile is None:
+        return []
+    return [
+        {"stage": stage.name, "start": stage.start, "duration": stage.duration}
+        for stage in profile.stages
+    ]
+
+
+def stage_at(stages: list[dict[str, Any]], offset: float) -> str:
+    """Return the name of the stage running at ``offset``, empty if none."""
+    for stage in stages:
+        if offset < stage["start"] + stage["duration"]:
+            return stage["stage"]
+    return stages[-1]["stage"] if stages else ""
+
+
+def statistics_lines(statistics: dict[str, Any], name: str | None) -> Iterator[str]:
+    """Yield the lines of the time series of a finished run.
+
+    A distributed run has one series per worker, tagged with the worker URL;
+    other runs have a single series tagged with the host name. Every line is
+    timed at the end of its interval.
+
+    Args:
+        statistics: Statistics dictionary of a load test.
+        name: URL or name of the run, for the ``url`` tag.
+
+    """
+    stages = statistics.get("stages", [])
+    series = [
+        (worker["worker"], worker["timeseries"])
+        for worker in statistics.get("workers", []) if "timeseries" in worker
+    ] or [(socket.gethostname(), statistics.get("timeseries", []))]
+    started_at = statistics.get("started_at", time.time())
+    for worker, points in series:
+        for point in points:
+            end = point["offset"] + point["duration"]
+            yield point_line(
+                point,
+                {
+                    "url": name or "",
+                    "worker": worker,
+                    "stage": stage_at(stages, point["offset"]),
+                },
+                int((started_at + end) * 1e9),
+            )
+
+
+def write_statistics(
+    statistics: dict[str, Any], output_path: str | Path, name: str | None = None,
+) -> int:
+    """Write the time series of a finished run to a line protocol file.
+
+    Returns:
+        The number of lines written.
+
+    """
+    count = 0
+    with Path(output_path).open("w") as f:
+        for line in statistics_lines(statistics, name):
+            f.write(line + "\n")
+            count += 1
+    return count
+
+
+class InfluxWriter:
+    """Interval listener pushing the time series of a running test to InfluxDB.
+
+    Every point is formatted into a line on the event loop and appended to
+    a bounded buffer; a writer thread sends the buffered lines in batches of
+    ``batch_size``, or whatever is buffered every ``flush_interval`` seconds,
+    and waits for each write to be acknowledged before sending the next one.
+    A failed write is retried with a growing delay while new lines keep
+    buffering; once ``max_pending`` lines are waiting the oldest ones are
+    dropped, so a slow server never blocks the event loop.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        url: str,
+        *,
+        tags: dict[str, str] | None = None,
+        stages: list[dict[str, Any]] | None = None,
+        token: str | None = None,
+        batch_size: int = INFLUX_BATCH_SIZE,
+        flush_interval: float = INFLUX_FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING_LINES,
+    ) -> None:
+        """Start the writer thread.
+
+        Args:
+            url: Write endpoint, with its query string, e.g.
+                ``http://localhost:8086/api/v2/write?org=o&bucket=b``.
+            tags: Tags of every line; ``worker`` defaults to the host name.
+            stages: Stages of the load profile, tagging every line with the
+                stage its interval started in.
+            token: API token sent in the ``Authorization`` header.
+            batch_size: Lines sent in one write request.
+            flush_interval: Seconds a partial batch waits before it is sent.
+            max_pending: Lines buffered before the oldest ones are dropped.
+
+        """
+        self.url = url
+        self.tags = {"worker": socket.gethostname(), **(tags or {})}
+        self.stages = stages or []
+        self.headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if token:
+            self.headers["Authorization"] = f"Token {token}"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self._pending: collections.deque[str] = collections.deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def __call__(self, point: dict[str, Any]) -> None:
+        """Buffer a point of the time series, timed at the end of its interval."""
+        line = point_line(
+            point,
+            {**self.tags, "stage": stage_at(self.stages, point["offset"])},
+            time.time_ns(),
+        )
+        with self._ready:
+            self._pending.append(line)
+            self._trim()
+            if len(self._pending) >= self.batch_size:
+                self._ready.notify()
+
+    def _trim(self) -> None:
+        """Drop the oldest lines beyond ``max_pending``; the lock is held."""
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+
+    def _send(self, batch: list[str]) -> bool:
+        """Send a batch of lines, returning whether the server accepted it."""
+        request = urllib.request.Request(  # noqa: S310
+            self.url, data="\n".join(batch).encode(), headers=self.headers,
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=INFLUX_TIMEOUT):  # noqa: S310
+                return True
+        except (OSError, ValueError) as e:
+            print(f"Failed to write to InfluxDB: {e}", file=sys.stderr)
+            return False
+
+    def _write(self) -> None:
+        """Send batches of buffered lines until the writer is closed."""
+        delay = INFLUX_RETRY_DELAY
+        while True:
+            with self._ready:
+                self._ready.wait_for(
+                    lambda: self._closed or len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                size = min(len(self._pending), self.batch_size)
+                batch = [self._pending.popleft() for _ in range(size)]
+                closed = self._closed
+            if batch and self._send(batch):
+                self.written += len(batch)
+                delay = INFLUX_RETRY_DELAY
+                continue
+            if batch:
+                with self._ready:
+                    if self._closed:
+                        self.dropped += len(batch) + len(self._pending)
+                        self._pending.clear()
+                        return
+                    self._pending.extendleft(reversed(batch))
+                    self._trim()
+                    self._ready.wait_for(lambda: self._closed, timeout=delay)
+                delay = min(delay * 2, INFLUX_MAX_RETRY_DELAY)
+            elif closed:
+                return
+
+    def close(self) -> None:
+        """Send the buffered lines, giving up on them after a failed write."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._writer.join()
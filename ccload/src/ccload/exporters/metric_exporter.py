@@ -5,6 +5,10 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from ccload.exporters.influxdb import write_statistics
+from ccload.exporters.parquet import write_timeseries
+from ccload.exporters.prometheus import render_statistics
+
 
 class MetricsExporter:
     """Export load test metrics to various formats."""
@@ -38,22 +42,84 @@ class MetricsExporter:
             output_path: Path where the CSV file will be written.
 
         """
-        # Flatten nested metrics for CSV
-        flat_metrics = {"timestamp": self.timestamp, **self.statistics}
+        # Flatten nested metrics for CSV; histograms only fit the JSON export
+        flat_metrics = {
+            "timestamp": self.timestamp,
+            **{
+                key: value for key, value in self.statistics.items()
+                if not isinstance(value, dict | list)
+            },
+        }
 
         with Path(output_path).open("w", newline="") as f:
             writer = csv.writer(f)
             writer.writerow(flat_metrics.keys())
             writer.writerow(flat_metrics.values())
 
+    def timeseries_to_csv(self, output_path: str) -> None:
+        """Export the per-interval time series to CSV, one row per interval.
+
+        Args:
+            output_path: Path where the CSV file will be written.
+
+        """
+        points = [
+            {key: value for key, value in point.items() if key != "histogram"}
+            for point in self.statistics.get("timeseries", [])
+        ]
+        with Path(output_path).open("w", newline="") as f:
+            writer = csv.writer(f)
+            if points:
+                writer.writerow(points[0].keys())
+                writer.writerows(point.values() for point in points)
+
+    def to_prometheus(self, output_path: str) -> None:
+        """Export metrics in the Prometheus text exposition format.
+
+        Args:
+            output_path: Path where the metrics file will be written.
+
+        """
+        Path(output_path).write_text(render_statistics(self.statistics))
 
-def export_metrics(metrics: dict[str, Any], format_type: str, output_path: str) -> None:
+    def to_influxdb(self, output_path: str, name: str | None = None) -> None:
+        """Export the time series in the InfluxDB line protocol.
+
+        Args:
+            output_path: Path where the line protocol file will be written.
+            name: URL or name of the run, written as the ``url`` tag.
+
+        """
+        write_statistics(self.statistics, output_path, name)
+
+    def to_parquet(self, output_path: str) -> None:
+        """Export the per-interval time series to Parquet.
+
+        Args:
+            output_path: Path where the Parquet file will be written.
+
+        """
+        write_timeseries(self.statistics.get("timeseries", []), output_path)
+
+
+def export_metrics(
+    metrics: dict[str, Any],
+    format_type: str,
+    output_path: str,
+    name: str | None = None,
+) -> None:
     """Export metrics in specified format.
 
+    The JSON export includes the per-interval time series; the CSV export
+    writes it next to the summary, as ``<output>.timeseries.csv``; the
+    Parquet export writes only the time series.
+
     Args:
         metrics: The statistics dictionary from a load test.
-        format_type: The export format (json, csv).
+        format_type: The export format (json, csv, prometheus, influxdb,
+            parquet).
         output_path: Path where the output file will be written.
+        name: URL or name of the run, tagging the InfluxDB lines.
 
     """
     exporter = MetricsExporter(metrics)
@@ -62,6 +128,16 @@ def export_metrics(metrics: dict[str, Any], format_type: str, output_path: str)
         exporter.to_json(output_path)
     elif format_type == "csv":
         exporter.to_csv(output_path)
+        if metrics.get("timeseries"):
+            timeseries_path = str(Path(output_path).with_suffix(".timeseries.csv"))
+            exporter.timeseries_to_csv(timeseries_path)
+            print(f"Time series exported to {timeseries_path}")
+    elif format_type == "prometheus":
+        exporter.to_prometheus(output_path)
+    elif format_type == "influxdb":
+        exporter.to_influxdb(output_path, name)
+    elif format_type == "parquet":
+        exporter.to_parquet(output_path)
     else:
         msg = f"Unsupported export format: {format_type}"
         raise ValueError(msg)
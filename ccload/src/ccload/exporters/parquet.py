@@ -0,0 +1,227 @@
+"""Columnar Parquet export of raw samples and time series."""
+from pathlib import Path
+from typing import Any
+
+from ccload.core.sample_log import (
+    ERROR_KINDS,
+    RECORD,
+    SAMPLE_FIELDS,
+    SampleLog,
+    SampleLogReader,
+)
+from ccload.core.statistics import percentile_key
+from ccload.core.timeseries import INTERVAL_PERCENTILES
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    np = pa = pq = None
+
+PARQUET_AVAILABLE = pq is not None
+
+# Compression codec of the row groups.
+PARQUET_COMPRESSION = "zstd"
+
+# Intervals buffered before they are written as one row group, ten minutes
+# of 1s points.
+ROW_GROUP_INTERVALS = 600
+
+# Columns of the time series, the counts as integers.
+INTERVAL_COUNTS = ("total_requests", "successful_requests", "failed_requests")
+INTERVAL_VALUES = (
+    "offset",
+    "duration",
+    "requests_per_second",
+    "request_time_mean",
+    *(percentile_key("request_time", percent) for percent in INTERVAL_PERCENTILES),
+    "request_time_max",
+)
+
+
+def _require_pyarrow() -> None:
+    """Raise if pyarrow is not installed."""
+    if not PARQUET_AVAILABLE:
+        msg = "The Parquet export requires pyarrow: pip install 'ccload[parquet]'"
+        raise ImportError(msg)
+
+
+def sample_schema(started_at: float) -> "pa.Schema":
+    """Return the schema of the samples, with the start time as metadata."""
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("offset", pa.float64()),
+            *((field, pa.float32()) for field in SAMPLE_FIELDS),
+            ("status", pa.uint16()),
+            ("error", pa.dictionary(pa.uint8(), pa.string())),
+            ("bytes", pa.uint32()),
+        ],
+        metadata={"started_at": repr(started_at)},
+    )
+
+
+def interval_schema() -> "pa.Schema":
+    """Return the schema of the time series."""
+    _require_pyarrow()
+    return pa.schema([
+        *((column, pa.float64()) for column in INTERVAL_VALUES[:2]),
+        *((column, pa.int64()) for column in INTERVAL_COUNTS),
+        *((column, pa.float64()) for column in INTERVAL_VALUES[2:]),
+    ])
+
+
+def _record_dtype() -> "np.dtype":
+    """Return the NumPy layout of a sample log record."""
+    dtype = np.dtype([
+        ("offset", "<f8"),
+        *((field, "<f4") for field in SAMPLE_FIELDS),
+        ("status", "<u2"),
+        ("error", "u1"),
+        ("", "V1"),
+        ("bytes", "<u4"),
+    ])
+    if dtype.itemsize != RECORD.size:  # pragma: no cover - layouts out of sync
+        msg = "The NumPy record layout does not match the sample log"
+        raise RuntimeError(msg)
+    return dtype
+
+
+def chunk_table(chunk: bytes, schema: "pa.Schema") -> "pa.Table":
+    """Convert the records of a sample log chunk into an Arrow table.
+
+    Every column is a vectorized copy out of the packed records; phases that
+    did not happen are null rather than NaN.
+    """
+    records = np.frombuffer(chunk, dtype=_record_dtype())
+    columns = [
+        pa.array(records["offset"]),
+        *(pa.array(records[field], from_pandas=True) for field in SAMPLE_FIELDS),
+        pa.array(records["status"]),
+        pa.DictionaryArray.from_arrays(
+            pa.array(records["error"]), pa.array(ERROR_KINDS),
+        ),
+        pa.array(records["bytes"]),
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class ParquetSampleLog(SampleLog):
+    """Sample log stored as a Parquet file, one row group per chunk.
+
+    Results are packed on the event loop exactly as in a ``SampleLog``; the
+    writer thread turns every full chunk of ``CHUNK_RECORDS`` samples into
+    Arrow columns and appends it to the file as a compressed row group, so
+    the file is readable up to its last row group while the run goes on.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Create the file and start the writer thread.
+
+        Args:
+            path: Path of the Parquet file, overwritten.
+
+        """
+        _require_pyarrow()
+        super().__init__(path)
+
+    def _open(self) -> None:
+        """Create the file; the Parquet writer starts with the first chunk."""
+        super()._open()
+        self._parquet: pq.ParquetWriter | None = None
+
+    def _begin(self) -> None:
+        """Write the schema, with the start time of the offsets."""
+        self._schema = sample_schema(self.started_at)
+        self._parquet = pq.ParquetWriter(
+            self._file, self._schema, compression=PARQUET_COMPRESSION,
+        )
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        """Append a chunk of records as a row group."""
+        self._parquet.write_table(chunk_table(chunk, self._schema))
+
+    def _finish(self) -> None:
+        """Write the footer of the file and close it."""
+        try:
+            if self._parquet is not None:
+                self._parquet.close()
+        finally:
+            self._file.close()
+
+
+def sample_log_to_parquet(reader: SampleLogReader, output_path: str | Path) -> int:
+    """Convert a sample log to Parquet, one row group per chunk of the log.
+
+    Returns:
+        The number of samples written.
+
+    """
+    schema = sample_schema(reader.started_at)
+    count = 0
+    with pq.ParquetWriter(
+        output_path, schema, compression=PARQUET_COMPRESSION,
+    ) as writer:
+        for chunk in reader.chunks():
+            table = chunk_table(chunk, schema)
+            writer.write_table(table)
+            count += table.num_rows
+    return count
+
+
+class ParquetTimeseries:
+    """Interval listener writing the time series to a Parquet file.
+
+    Points are buffered and written every ``row_group_size`` intervals as
+    one row group, and the rest when the writer is closed, so the file of a
+    long run is not limited to the points kept by the ``IntervalAggregator``.
+    A row group of points is small enough to be written on the event loop.
+    """
+
+    def __init__(
+        self, path: str | Path, row_group_size: int = ROW_GROUP_INTERVALS,
+    ) -> None:
+        """Create the file.
+
+        Args:
+            path: Path of the Parquet file, overwritten.
+            row_group_size: Points written at once.
+
+        """
+        self.path = Path(path)
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._schema = interval_schema()
+        self._writer = pq.ParquetWriter(
+            self.path, self._schema, compression=PARQUET_COMPRESSION,
+        )
+        self._points: list[dict[str, Any]] = []
+
+    def __call__(self, point: dict[str, Any]) -> None:
+        """Buffer a point, writing a row group once enough are buffered."""
+        self._points.append(point)
+        if len(self._points) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the buffered points as a row group."""
+        if self._points:
+            self._writer.write_table(
+                pa.Table.from_pylist(self._points, schema=self._schema),
+            )
+            self.count += len(self._points)
+            self._points = []
+
+    def close(self) -> None:
+        """Write the buffered points and the footer of the file."""
+        self._flush()
+        self._writer.close()
+
+
+def write_timeseries(points: list[dict[str, Any]], output_path: str | Path) -> None:
+    """Write the time series of a finished run to a Parquet file."""
+    writer = ParquetTimeseries(output_path)
+    for point in points:
+        writer(point)
+    writer.close()
@@ -0,0 +1,205 @@
+"""Prometheus text exposition of load test metrics."""
+import bisect
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from aiohttp import web
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.statistics import LATENCY_METRICS, PHASE_METRICS
+
+# Upper bounds in seconds of the histogram buckets, those of the Prometheus
+# client libraries extended to ten seconds.
+PROMETHEUS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: dict[str, str]) -> str:
+    """Format a label set, e.g. ``{metric="ttfb"}``."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+
+class BucketCounts:
+    """Counts of a latency histogram in the fixed ``PROMETHEUS_BUCKETS``.
+
+    The buckets of a ``LatencyHistogram`` are narrower than the Prometheus
+    ones, so each one is counted in the first Prometheus bucket holding its
+    upper bound.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty counts."""
+        self.counts = [0] * (len(PROMETHEUS_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, histogram: LatencyHistogram) -> None:
+        """Add the samples of a latency histogram."""
+        for upper, count in histogram.buckets():
+            self.counts[bisect.bisect_left(PROMETHEUS_BUCKETS, upper)] += count
+        self.count += histogram.count
+        self.total += histogram.total
+
+    def render(self, name: str, labels: dict[str, str]) -> list[str]:
+        """Return the bucket, sum and count samples of the histogram."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(
+            (*(f"{bound:g}" for bound in PROMETHEUS_BUCKETS), "+Inf"),
+            self.counts,
+            strict=True,
+        ):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}",
+            )
+        lines.append(f"{name}_sum{_labels(labels)} {self.total!r}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+def _family(name: str, kind: str, description: str) -> list[str]:
+    """Return the HELP and TYPE lines of a metric family."""
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+
+def _requests(successful: int, failed: int, other: int) -> list[str]:
+    """Return the request counter, by outcome."""
+    return [
+        *_family("ccload_requests_total", "counter", "Requests completed."),
+        f'ccload_requests_total{{outcome="successful"}} {successful}',
+        f'ccload_requests_total{{outcome="failed"}} {failed}',
+        f'ccload_requests_total{{outcome="other"}} {other}',
+    ]
+
+
+def render_statistics(statistics: dict[str, Any]) -> str:
+    """Render the statistics of a finished run in the Prometheus text format.
+
+    Request counts are counters; every latency metric and request phase is
+    a histogram with ``PROMETHEUS_BUCKETS`` built from the serialized
+    histograms of the run; throughput, elapsed time and event loop lag are
+    gauges.
+
+    Args:
+        statistics: Statistics dictionary of a load test.
+
+    """
+    successful = statistics["successful_requests"]
+    failed = statistics["failed_requests"]
+    lines = _requests(
+        successful, failed, statistics["total_requests"] - successful - failed,
+    )
+    histograms = statistics.get("histograms", {})
+    for name, label, metrics, description in (
+        ("ccload_request_duration_seconds", "metric", LATENCY_METRICS,
+         "Latency of successful requests."),
+        ("ccload_request_phase_seconds", "phase", PHASE_METRICS,
+         "Duration of the phases of successful requests."),
+    ):
+        present = [metric for metric in metrics if metric in histograms]
+        if not present:
+            continue
+        lines.extend(_family(name, "histogram", description))
+        for metric in present:
+            counts = BucketCounts()
+            counts.add(LatencyHistogram.from_dict(histograms[metric]))
+            lines.extend(counts.render(name, {label: metric}))
+    for name, key, description in (
+        ("ccload_requests_per_second", "requests_per_second",
+         "Successful requests per second over the run."),
+        ("ccload_elapsed_seconds", "elapsed_time", "Duration of the run."),
+        ("ccload_loop_lag_p99_seconds", "loop_lag_p99",
+         "99th percentile of the load generator's event loop lag."),
+    ):
+        if key in statistics:
+            lines.extend(_family(name, "gauge", description))
+            lines.append(f"{name} {statistics[key]!r}")
+    return "\n".join(lines) + "\n"
+
+
+class LiveMetrics:
+    """Interval listener exposing the metrics of a running test.
+
+    Every closed interval of the time series is added to cumulative
+    counters and request time buckets, once per interval instead of once
+    per request, and the exposition is rendered again only when it is
+    scraped after a new interval, so scrapes cost the hot loop nothing.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.successful = 0
+        self.failed = 0
+        self.other = 0
+        self.requests_per_second = 0.0
+        self.latency = BucketCounts()
+        self._text: str | None = None
+
+    def __call__(self, point: dict[str, Any]) -> None:
+        """Add a point of the time series to the metrics."""
+        self.successful += point["successful_requests"]
+        self.failed += point["failed_requests"]
+        self.other += (
+            point["total_requests"] - point["successful_requests"]
+            - point["failed_requests"]
+        )
+        self.requests_per_second = point["requests_per_second"]
+        self.latency.add(LatencyHistogram.from_dict(point["histogram"]))
+        self._text = None
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text format."""
+        if self._text is None:
+            name = "ccload_request_duration_seconds"
+            lines = [
+                *_requests(self.successful, self.failed, self.other),
+                *_family(name, "histogram", "Latency of successful requests."),
+                *self.latency.render(name, {"metric": "request_time"}),
+                *_family(
+                    "ccload_requests_per_second", "gauge",
+                    "Successful requests per second over the last interval.",
+                ),
+                f"ccload_requests_per_second {self.requests_per_second!r}",
+            ]
+            self._text = "\n".join(lines) + "\n"
+        return self._text
+
+
+@asynccontextmanager
+async def serve_metrics(
+    metrics: LiveMetrics, port: int, host: str = "0.0.0.0",  # noqa: S104
+) -> AsyncIterator[str]:
+    """Serve ``GET /metrics`` from the running event loop.
+
+    Args:
+        metrics: Metrics to expose.
+        port: Port to listen on, 0 for a free one.
+        host: Address to listen on.
+
+    Yields:
+        The URL of the endpoint.
+
+    """
+    async def handler(_request: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+    try:
+        yield f"http://{host}:{bound_port}/metrics"
+    finally:
+        await runner.cleanup()
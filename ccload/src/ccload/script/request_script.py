@@ -1,13 +1,14 @@
 """Module for parsing and executing load test scripts."""
 import asyncio
 import json
-import time
+from collections import Counter
+from contextlib import AsyncExitStack
 from pathlib import Path
 from typing import Any
+from urllib.parse import urlsplit
 
-import aiohttp
-
-from ccload.core.load_tester_features import _calculate_statistics, read_url
+from ccload.core.load_tester_features import create_session, load_tester
+from ccload.core.profile import LoadProfile
 
 
 class RequestScript:
@@ -24,7 +25,7 @@ class RequestScript:
         self.requests: list[dict[str, Any]] = []
         self._parse()
 
-    def _parse(self) -> None:
+    def _parse(self) -> None:  # noqa: C901, PLR0912
         """Parse the script file."""
         with Path(self.script_path).open() as f:
             data = json.load(f)
@@ -47,13 +48,30 @@ class RequestScript:
                 request["data"] = None
             if "json" not in request:
                 request["json"] = None
+            if "duration" not in request:
+                request["duration"] = None
+            if "stages" in request:
+                request["profile"] = LoadProfile.from_list(request["stages"])
             if "number" not in request:
-                request["number"] = 1
+                # A duration or a profile sets the budget unless a number is
+                # given too.
+                timed = request["duration"] is not None or "profile" in request
+                request["number"] = None if timed else 1
             if "concurrency" not in request:
                 request["concurrency"] = 1
+            if "phase" not in request:
+                request["phase"] = None
 
             self.requests.append(request)
 
+        # Name every request by its name field or its URL, numbered from the
+        # second occurrence of a name, to report them apart.
+        seen: Counter[str] = Counter()
+        for request in self.requests:
+            name = request.get("name") or request["url"]
+            seen[name] += 1
+            request["name"] = name if seen[name] == 1 else f"{name} #{seen[name]}"
+
     def get_requests(self) -> list[dict[str, Any]]:
         """Get the parsed requests.
 
@@ -63,39 +81,91 @@ class RequestScript:
         """
         return self.requests
 
+    def get_phases(self) -> list[list[dict[str, Any]]]:
+        """Group the requests into the phases they run in.
+
+        Requests sharing a ``phase`` name run together, in the phase of the
+        first of them; every request without one runs in a phase of its own.
+
+        Returns:
+            Phases in the order they run, each a list of requests.
+
+        """
+        phases: dict[Any, list[dict[str, Any]]] = {}
+        for index, request in enumerate(self.requests):
+            key = ("phase", request["phase"]) if request["phase"] else index
+            phases.setdefault(key, []).append(request)
+        return list(phases.values())
+
+
+def _peak_concurrency(request: dict[str, Any]) -> int:
+    """Return the most requests a script entry has in flight at once."""
+    if "profile" in request and request.get("stage_target", "concurrency") == (
+        "concurrency"
+    ):
+        return max(request["profile"].peak, 1)
+    return request["concurrency"]
+
+
+async def _run_phase(requests: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Run the requests of a phase side by side.
+
+    Requests to the same scheme and host share one session, whose
+    connection pool is sized for all of them together.
+
+    Returns:
+        The statistics of every request, in order.
+
+    """
+    hosts = [urlsplit(request["url"])[:2] for request in requests]
+    limits: Counter[tuple[str, str]] = Counter()
+    for host, request in zip(hosts, requests, strict=True):
+        limits[host] += _peak_concurrency(request)
+    async with AsyncExitStack() as stack:
+        sessions = {
+            host: await stack.enter_async_context(create_session(limit))
+            for host, limit in limits.items()
+        }
+        return await asyncio.gather(*(
+            load_tester(
+                request["url"], request["number"], request["concurrency"],
+                method=request["method"],
+                headers=request["headers"],
+                json_data=request["json"],
+                duration=request["duration"],
+                profile=request.get("profile"),
+                profile_target=request.get("stage_target", "concurrency"),
+                session=sessions[host],
+            )
+            for host, request in zip(hosts, requests, strict=True)
+        ))
+
 
 async def script_load_tester(script_path: str) -> dict[str, dict[str, Any]]:
     """Run a load test using a script file.
 
+    Phases run one after another and the requests of a phase run side by
+    side, each one for its own ``number`` of requests, ``duration`` or
+    ``stages`` at its own ``concurrency``. Every request is recorded by its
+    own run, so its statistics only cover its own results.
+
     Args:
         script_path: Path to the script file.
-        n_concurrency: Number of concurrent requests.
+
+    Returns:
+        The statistics of every request by name (its ``name`` field or its
+        URL, numbered when repeated), in script order.
 
     """
     script = RequestScript(script_path)
-    requests = script.get_requests()
-
-    results: list = []
-    stats: dict[str, dict[str, Any]] = {}
-    for req in requests:
-        connector = aiohttp.TCPConnector(limit=req["concurrency"])
-        start_time = time.perf_counter()
-        async with aiohttp.ClientSession(connector=connector) as session:
-            tasks = []
-            tasks.extend([
-                read_url(
-                    url=req["url"],
-                    session=session,
-                    method=req.get("method", "GET"),
-                    headers=req.get("headers"),
-                    json_data=req.get("json"),
-                )
-                for _ in range(req.get("concurrency", 1))
-            ])
-
-            results.extend(await asyncio.gather(*tasks, return_exceptions=True))
-
-        total_time = time.perf_counter() - start_time
-        stats[req["url"]] = _calculate_statistics(results, total_time)
-
-    return stats
+    results: dict[str, dict[str, Any]] = {}
+    for phase in script.get_phases():
+        statistics = await _run_phase(phase)
+        results.update(
+            (request["name"], result)
+            for request, result in zip(phase, statistics, strict=True)
+        )
+    return {
+        request["name"]: results[request["name"]]
+        for request in script.get_requests()
+    }
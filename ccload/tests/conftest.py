@@ -1,12 +1,24 @@
 """Shared fixtures for testing."""
+import asyncio
 import json
+import socket
+import threading
+import time
 import types
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from aiohttp import StreamReader
+from aiohttp import StreamReader, web
+
+from ccload.distributed.streaming import (
+    clock_reading,
+    grant_lease,
+    start_test,
+    stream_load_test,
+)
 
 
 class MockResponse:
@@ -104,3 +116,139 @@ def mock_data() -> list[dict]:
 def test_workers() -> list[str]:
     """Fixture for the test workers."""
     return ["http://worker1", "http://worker2", "http://worker3"]
+
+def _serve(app: web.Application) -> Iterator[str]:
+    """Serve an aiohttp application from a thread and yield its base URL."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{port}"
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+@pytest.fixture
+def local_server() -> Iterator[str]:
+    """Fixture for a local HTTP server answering every path with a short body."""
+    async def handler(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    yield from _serve(app)
+
+@pytest.fixture
+def influx_receiver() -> Iterator[tuple[str, list[str], list[int]]]:
+    """Fixture for a stand-in InfluxDB write endpoint.
+
+    Yields the write URL, the bodies it accepted and a list of statuses
+    answered, in order, before it starts accepting writes.
+    """
+    bodies: list[str] = []
+    failures: list[int] = []
+
+    async def write(request: web.Request) -> web.Response:
+        body = await request.text()
+        if failures:
+            return web.Response(status=failures.pop(0))
+        bodies.append(body)
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/api/v2/write", write)
+    for url in _serve(app):
+        yield f"{url}/api/v2/write?org=test&bucket=ccload", bodies, failures
+
+@pytest.fixture
+def worker_server_factory() -> Iterator[Callable[[], str]]:
+    """Fixture starting local workers that serve the streaming test endpoint."""
+    async def run_test_stream(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        await response.prepare(request)
+        async for line in stream_load_test(await request.json()):
+            await response.write(line)
+        await response.write_eof()
+        return response
+
+    async def health(_request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def clock(_request: web.Request) -> web.Response:
+        return web.json_response(clock_reading())
+
+    async def start(request: web.Request) -> web.Response:
+        payload = await request.json()
+        return web.json_response(
+            {"started": start_test(payload["test_id"], payload["start_at"])},
+        )
+
+    async def lease(request: web.Request) -> web.Response:
+        payload = await request.json()
+        return web.json_response(
+            {"granted": grant_lease(payload["test_id"], payload["n_request"])},
+        )
+
+    servers: list[Iterator[str]] = []
+
+    def factory() -> str:
+        app = web.Application()
+        app.router.add_post("/run-test/stream", run_test_stream)
+        app.router.add_get("/health", health)
+        app.router.add_get("/clock", clock)
+        app.router.add_post("/start", start)
+        app.router.add_post("/lease", lease)
+        server = _serve(app)
+        servers.append(server)
+        return next(server)
+
+    yield factory
+
+    for server in servers:
+        next(server, None)
+
+@pytest.fixture
+def fastapi_worker_factory() -> Iterator[Callable[[], str]]:
+    """Fixture starting the FastAPI worker app under uvicorn, as deployed.
+
+    Skipped when FastAPI or uvicorn is not installed.
+    """
+    pytest.importorskip("fastapi")
+    uvicorn = pytest.importorskip("uvicorn")
+    from ccload.distributed.worker_server import app  # noqa: PLC0415
+
+    servers: list[tuple[Any, threading.Thread, socket.socket]] = []
+
+    def factory() -> str:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        thread = threading.Thread(
+            target=server.run, kwargs={"sockets": [sock]}, daemon=True,
+        )
+        thread.start()
+        servers.append((server, thread, sock))
+        deadline = time.monotonic() + 10
+        while not server.started:
+            if time.monotonic() > deadline:
+                msg = "The worker app did not start"
+                raise RuntimeError(msg)
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    yield factory
+
+    for server, thread, sock in servers:
+        server.should_exit = True
+        thread.join()
+        sock.close()
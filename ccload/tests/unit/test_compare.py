@@ -0,0 +1,134 @@
+"""Unit tests for the comparison of runs."""
+import random
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ccload.cli import _compare_cli
+from ccload.core.compare import Threshold, compare_runs, mann_whitney
+from ccload.core.statistics import StatsRecorder
+from ccload.exporters.metric_exporter import export_metrics
+from tests.unit.utils import assert_values
+
+
+def _run(scale: float, rps: float, n: int = 2000, seed: int = 1) -> dict[str, Any]:
+    """Return the statistics of a synthetic run with lognormal latencies."""
+    rng = random.Random(seed)  # noqa: S311
+    recorder = StatsRecorder()
+    for _ in range(n):
+        latency = rng.lognormvariate(0, 0.3) * scale
+        recorder.record({
+            "status": 200, "request_time": latency, "ttfb": latency / 2,
+            "ttlb": latency,
+        })
+    statistics = recorder.summary(n / rps)
+    statistics["timeseries"] = [
+        {"duration": 1.0, "requests_per_second": rps * rng.uniform(0.97, 1.03)}
+        for _ in range(20)
+    ]
+    return statistics
+
+
+def test_mann_whitney_binned() -> None:
+    """Test the U statistic and p-value on tied, binned values."""
+    p_value, larger = mann_whitney([(1, 1), (2, 1), (3, 1)], [(4, 1), (5, 1), (6, 1)])
+    assert_values(larger, 1.0, "Unexpected probability of superiority")
+    assert_values(p_value, pytest.approx(0.0248, abs=1e-4), "Unexpected p-value")
+
+    p_value, larger = mann_whitney([(1, 50), (2, 50)], [(1, 50), (2, 50)])
+    assert_values((p_value, larger), (0.5, 0.5), "Unexpected result for equal runs")
+
+
+def test_threshold_parse() -> None:
+    """Test metric names, signs and invalid thresholds."""
+    cases = {
+        "p99=+10%": ("request_time_p99", 0.1),
+        "ttfb_p99.9=+5%": ("ttfb_p99_9", 0.05),
+        "ttfb_p99_9=+5%": ("ttfb_p99_9", 0.05),
+        "request_time_p50=+5%": ("request_time_p50", 0.05),
+        "mean=2.5%": ("request_time_mean", 0.025),
+        "rps=5%": ("requests_per_second", -0.05),
+        "errors=+1%": ("error_rate", 0.01),
+    }
+    for text, expected in cases.items():
+        threshold = Threshold.parse(text)
+        assert_values(
+            (threshold.key, pytest.approx(threshold.limit)), expected,
+            f"Unexpected threshold for {text}",
+        )
+    for text in ("p99", "p99=+10", "foo_p99=+10%", "ttfb_max=+1%"):
+        with pytest.raises(ValueError, match=r"threshold|metric"):
+            Threshold.parse(text)
+
+
+def test_compare_runs() -> None:
+    """Test that only significant changes beyond their threshold regress."""
+    thresholds = [Threshold.parse(text) for text in ("p99=+10%", "rps=-5%")]
+    baseline = _run(0.01, 1000)
+
+    same = compare_runs(baseline, _run(0.01, 1000, seed=2), thresholds)
+    assert_values(
+        [result["regression"] for result in same], [False, False],
+        "Regression between equivalent runs",
+    )
+
+    worse = compare_runs(baseline, _run(0.013, 900, seed=2), thresholds)
+    assert_values(
+        [result["regression"] for result in worse], [True, True],
+        "Regressions not detected",
+    )
+    if worse[0]["p_value"] > 0.001 or worse[0]["change"] < 0.1:  # noqa: PLR2004
+        msg = "Unexpected p99 comparison"
+        raise AssertionError(msg)
+
+    noisy = compare_runs(
+        _run(0.01, 1000, n=20), _run(0.01, 1000, n=20, seed=4), thresholds[:1],
+    )
+    if noisy[0]["change"] < 0.1 or noisy[0]["regression"]:  # noqa: PLR2004
+        msg = "Noise over few samples should not be significant"
+        raise AssertionError(msg)
+
+
+def test_short_runs_fall_back_to_threshold() -> None:
+    """Test that a throughput drop regresses on runs too short to test."""
+    thresholds = [Threshold.parse("rps=-5%")]
+    baseline, candidate = _run(0.01, 1000), _run(0.01, 35)
+    for statistics in (baseline, candidate):
+        statistics["timeseries"] = statistics["timeseries"][:2]
+
+    (result,) = compare_runs(baseline, candidate, thresholds)
+    assert_values(
+        (result["p_value"], result["regression"]), (None, True),
+        "Short run tested for significance",
+    )
+
+
+def test_compare_cli_exit_status(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test that the subcommand exits non-zero on a regression only."""
+    paths = {}
+    for name, statistics in (
+        ("baseline", _run(0.01, 1000)),
+        ("same", _run(0.01, 1000, seed=2)),
+        ("slower", _run(0.015, 1000, seed=2)),
+    ):
+        paths[name] = str(tmp_path / f"{name}.json")
+        export_metrics(statistics, "json", paths[name])
+
+    _compare_cli([paths["baseline"], paths["same"]])
+    assert_values(
+        "REGRESSION" in capsys.readouterr().out, False,  # noqa: FBT003
+        "Unexpected regression",
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        _compare_cli([paths["baseline"], paths["slower"], "--threshold", "p50=+20%"])
+    assert_values(exit_info.value.code, 1, "Unexpected exit status")
+    assert_values(
+        "request_time_p50" in capsys.readouterr().out, True,  # noqa: FBT003
+        "Threshold not reported",
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        _compare_cli([paths["baseline"], str(tmp_path / "missing.json")])
+    assert_values(exit_info.value.code, 2, "Unexpected exit status")
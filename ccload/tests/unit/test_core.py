@@ -19,7 +19,15 @@ def test_structure(
         "total_requests","successful_requests","failed_requests",
         "request_time_min","request_time_max","request_time_mean",
         "ttfb_min","ttfb_max","ttfb_mean","ttlb_min","ttlb_max",
-        "ttlb_mean","requests_per_second",
+        "ttlb_mean","requests_per_second","histograms",
+        "cancelled_requests","elapsed_time","started_at","finished_at",
+        "loop_lag_mean","loop_lag_p99","loop_lag_max","generator_saturated",
+        "timeseries",
+        *(
+            f"{metric}_{percentile}"
+            for metric in ("request_time", "ttfb", "ttlb")
+            for percentile in ("p50", "p90", "p95", "p99", "p99_9")
+        ),
     ]
 
     mock_session_cls.return_value = mock_client_session_factory(200)
@@ -1,40 +1,327 @@
 """Unit tests for the distributed module."""
 import asyncio
+import json
 from collections.abc import Callable
-from unittest.mock import MagicMock, patch
+from typing import Any
 
-from ccload.distributed.distributed_load_test import run_distributed_load_test
+import pytest
+from aiohttp import web
+
+from ccload.cli import _create_argument_parser, _option_conflict
+from ccload.core.histogram import LatencyHistogram
+from ccload.distributed import streaming
+from ccload.distributed.clock import clock_offset
+from ccload.distributed.distributed_load_test import (
+    IntervalMerger,
+    run_distributed_load_test,
+)
+from ccload.distributed.leases import LeasePool
+from ccload.distributed.streaming import iter_ndjson, start_test, stream_load_test
 from tests.unit.utils import assert_values
 
 
-@patch("ccload.distributed.distributed_load_test.aiohttp.ClientSession")
 def test_run_distributed_load_test(
-    mock_session_cls: MagicMock,
-    mock_client_session_factory: Callable[[int, dict | None], MagicMock],
-    test_url: str,
-    test_workers: list[str],
+    local_server: str,
+    worker_server_factory: Callable[[], str],
 ) -> None:
-    """Test the run_distributed_load_test function."""
-    statistics = {
-        "total_requests": 1,
-        "successful_requests": 1,
-        "failed_requests": 0,
-    }
-    mock_session_cls.return_value = mock_client_session_factory(
-        200,
-        statistics,
+    """Test that workers stream their results back to the coordinator."""
+    workers = [worker_server_factory(), worker_server_factory()]
+    points: list[dict[str, Any]] = []
+
+    stats = asyncio.run(run_distributed_load_test(
+        local_server, n_request=10, n_concurrency=2, workers=workers,
+        on_interval=points.append,
+    ))
+
+    assert_values(stats["total_requests"], 10, "Unexpected merged total")
+    assert_values(
+        sorted(worker["worker"] for worker in stats["workers"]), sorted(workers),
+        "Unexpected per-worker breakdown",
+    )
+    assert_values(
+        sum(worker["total_requests"] for worker in stats["workers"]), 10,
+        "Per-worker requests do not add up",
+    )
+    assert_values(
+        stats["histograms"]["request_time"]["count"], 10,
+        "Histograms not merged",
     )
+    window = stats["finished_at"] - stats["started_at"]
+    if stats["requests_per_second"] != pytest.approx(10 / window):
+        raise AssertionError
+    assert_values(
+        sum(point["total_requests"] for point in points), 10,
+        "Live intervals do not cover every request",
+    )
+
+
+def test_workers_start_together(
+    local_server: str,
+    worker_server_factory: Callable[[], str],
+) -> None:
+    """Test that prepared workers start their load at the same instant."""
+    workers = [worker_server_factory(), worker_server_factory()]
 
     stats = asyncio.run(run_distributed_load_test(
-            test_url, n_request=1,
-            n_concurrency=1, workers=test_workers,
-        ),
+        local_server, n_request=4, n_concurrency=2, workers=workers,
+    ))
+
+    first, second = stats["workers"]
+    if abs(first["started_at"] - second["started_at"]) > 0.01:  # noqa: PLR2004
+        raise AssertionError
+    for worker in stats["workers"]:
+        if abs(worker["clock_offset"]) > worker["clock_round_trip"]:
+            raise AssertionError
+
+
+def test_failed_worker_leases_are_reassigned(
+    local_server: str,
+    worker_server_factory: Callable[[], str],
+) -> None:
+    """Test that the requests leased to a failing worker are sent by another."""
+    async def run(worker: str) -> dict[str, Any]:
+        started = asyncio.Event()
+
+        async def clock(_request: web.Request) -> web.Response:
+            return web.json_response(streaming.clock_reading())
+
+        async def failing(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(b'{"type": "prepared"}\n')
+            await started.wait()
+            await response.write(b'{"type": "error", "message": "crashed"}\n')
+            return response
+
+        async def start(_request: web.Request) -> web.Response:
+            started.set()
+            return web.json_response({"started": True})
+
+        app = web.Application()
+        app.router.add_get("/clock", clock)
+        app.router.add_post("/run-test/stream", failing)
+        app.router.add_post("/start", start)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        try:
+            return await run_distributed_load_test(
+                local_server, 40, 2, workers=[f"http://127.0.0.1:{port}", worker],
+            )
+        finally:
+            await runner.cleanup()
+
+    worker = worker_server_factory()
+    stats = asyncio.run(run(worker))
+    assert_values(stats["total_requests"], 40, "Leases of the failed worker lost")
+    assert_values(
+        [(w["worker"], w["total_requests"]) for w in stats["workers"]],
+        [(worker, 40)],
+        "Unexpected per-worker breakdown",
     )
 
-    n_workers = len(test_workers)
-    assert_values(len(stats), n_workers, "Unexpected number of results")
+
+def test_lease_pool() -> None:
+    """Test that leases are handed out and returned when a worker fails."""
+    pool = LeasePool(10, 4)
     assert_values(
-        stats[0].keys(),
-        statistics.keys(),
-        "Unexpected statistics keys",
+        [pool.take("a"), pool.take("b"), pool.take("a")], [4, 4, 2],
+        "Unexpected leases",
+    )
+    pool.done("a")
+    pool.fail("b")
+    assert_values(pool.remaining, 4, "Leases of the failed worker not returned")
+    assert_values(pool.take("a"), 4, "Returned requests not leased again")
+    assert_values(dict(pool.leases), {"a": 3, "b": 1}, "Unexpected lease counts")
+
+
+def test_clock_offset_uses_shortest_round_trip() -> None:
+    """Test the offset estimate on a remote clock 5 seconds ahead."""
+    samples = [
+        (100.0, 105.3, 100.4),  # Remote time read late in a slow round trip
+        (101.0, 106.01, 101.02),
+        (102.0, 107.1, 102.1),
+    ]
+    offset, round_trip = clock_offset(samples)
+    if offset != pytest.approx(5.0) or round_trip != pytest.approx(0.02):
+        raise AssertionError
+
+
+def test_start_test_unknown_id() -> None:
+    """Test that starting a test nobody prepared is refused."""
+    if start_test("unknown", 0.0):
+        raise AssertionError
+
+
+def test_prepared_test_times_out(
+    local_server: str, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a prepared test never started fails instead of waiting forever."""
+    monkeypatch.setattr(streaming, "PREPARE_TIMEOUT", 0.2)
+    payload = {
+        "url": local_server, "n_request": 1, "n_concurrency": 1,
+        "test_id": "never-started", "warmup": True,
+    }
+
+    async def messages() -> list[dict[str, Any]]:
+        return [json.loads(line) async for line in stream_load_test(payload)]
+
+    types = [message["type"] for message in asyncio.run(messages())]
+    assert_values(types[0], "prepared", "Test not announced as prepared")
+    assert_values(types[-1], "error", "Unstarted test did not fail")
+
+
+def test_unstarted_worker_is_dropped(local_server: str) -> None:
+    """Test that a worker refusing its start time is not awaited."""
+    async def run() -> dict[str, Any]:
+        release = asyncio.Event()
+
+        async def clock(_request: web.Request) -> web.Response:
+            return web.json_response(streaming.clock_reading())
+
+        async def prepared(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(b'{"type": "prepared"}\n')
+            while not release.is_set():
+                await response.write(b'{"type": "heartbeat"}\n')
+                await asyncio.sleep(0.05)
+            return response
+
+        async def start(_request: web.Request) -> web.Response:
+            return web.json_response({"started": False})
+
+        app = web.Application()
+        app.router.add_get("/clock", clock)
+        app.router.add_post("/run-test/stream", prepared)
+        app.router.add_post("/start", start)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        try:
+            return await asyncio.wait_for(run_distributed_load_test(
+                local_server, 1, 1, workers=[f"http://127.0.0.1:{port}"],
+            ), 5)
+        finally:
+            release.set()
+            await runner.cleanup()
+
+    assert_values(asyncio.run(run()), {}, "Unstarted worker should be dropped")
+
+
+def test_run_distributed_load_test_outlives_fixed_timeout(
+    local_server: str,
+    worker_server_factory: Callable[[], str],
+) -> None:
+    """Test that a run longer than the heartbeat timeout still completes."""
+    stats = asyncio.run(run_distributed_load_test(
+        local_server, n_request=None, n_concurrency=1,
+        workers=[worker_server_factory()], duration=2.5, heartbeat_timeout=1.5,
+    ))
+    assert_values(len(stats["workers"]), 1, "Worker result lost")
+    if stats["elapsed_time"] < 2.5:  # noqa: PLR2004
+        raise AssertionError
+
+
+def test_missing_heartbeats_time_out(local_server: str) -> None:
+    """Test that a worker that stops sending anything is given up on."""
+    async def run() -> dict[str, Any]:
+        release = asyncio.Event()
+
+        async def stalled(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(b'{"type": "heartbeat"}\n')
+            await release.wait()
+            return response
+
+        async def clock(_request: web.Request) -> web.Response:
+            return web.json_response(streaming.clock_reading())
+
+        app = web.Application()
+        app.router.add_get("/clock", clock)
+        app.router.add_post("/run-test/stream", stalled)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        try:
+            return await run_distributed_load_test(
+                local_server, 1, 1, workers=[f"http://127.0.0.1:{port}"],
+                heartbeat_timeout=0.3,
+            )
+        finally:
+            release.set()
+            await runner.cleanup()
+
+    assert_values(asyncio.run(run()), {}, "Stalled worker should time out")
+
+
+def test_interval_merger_waits_for_running_workers() -> None:
+    """Test that points are merged once every running worker reported them."""
+    merged: list[dict[str, Any]] = []
+    merger = IntervalMerger(["a", "b"], merged.append)
+
+    def point(offset: float, requests: int) -> dict[str, Any]:
+        histogram = LatencyHistogram()
+        for _ in range(requests):
+            histogram.record(0.1)
+        return {
+            "offset": offset, "duration": 1.0, "total_requests": requests,
+            "successful_requests": requests, "failed_requests": 0,
+            "requests_per_second": requests, "histogram": histogram.to_dict(),
+        }
+
+    merger.add("a", point(0, 1))
+    merger.add("a", point(1, 2))
+    assert_values(merged, [], "Merged before every worker reported")
+    merger.add("b", point(0, 3))
+    assert_values(
+        [p["total_requests"] for p in merged], [4], "Unexpected merged points",
+    )
+    merger.finish("b")
+    assert_values(
+        [p["total_requests"] for p in merged], [4, 2], "Finished worker awaited",
+    )
+
+
+def test_iter_ndjson_splits_lines_across_chunks() -> None:
+    """Test that lines split across chunks are reassembled."""
+    async def chunks() -> Any:  # noqa: ANN401
+        for chunk in (b'{"a": 1}\n{"b"', b": 2}\n\n", b'{"c": 3}'):
+            yield chunk
+
+    async def decode() -> list[dict[str, Any]]:
+        return [message async for message in iter_ndjson(chunks())]
+
+    assert_values(
+        asyncio.run(decode()), [{"a": 1}, {"b": 2}, {"c": 3}], "Unexpected lines",
+    )
+
+
+@pytest.mark.parametrize(
+    ("options", "expected"),
+    [
+        (["-r", "10"], "--rate cannot be used with --distributed"),
+        (["--stages", "ramp:5:10"], "--stages cannot be used with --distributed"),
+        (
+            ["--engine", "raw", "--pipeline", "4"],
+            "--engine raw, --pipeline cannot be used with --distributed",
+        ),
+        (["--raw-samples"], "--raw-samples cannot be used with --distributed"),
+        ([], None),
+    ],
+)
+def test_distributed_rejects_unforwarded_options(
+    options: list[str], expected: str | None,
+) -> None:
+    """Test that options the workers would ignore are rejected."""
+    args = _create_argument_parser().parse_args(
+        ["http://example.com", "--distributed", *options],
     )
+    assert_values(_option_conflict(args), expected, "Unexpected conflict")
@@ -0,0 +1,70 @@
+"""Unit tests for the event-loop backends and the loop-lag monitor."""
+import asyncio
+import time
+
+import pytest
+
+from ccload.core import event_loop
+from ccload.core.event_loop import LoopLagMonitor
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.statistics import StatsRecorder
+from tests.unit.utils import assert_values
+
+
+async def _loop_class_name() -> str:
+    return type(asyncio.get_running_loop()).__module__
+
+
+def test_run_asyncio_backend() -> None:
+    """Test that the default backend runs the coroutine on asyncio."""
+    module = event_loop.run(_loop_class_name())
+    if not module.startswith("asyncio"):
+        raise AssertionError
+
+
+def test_run_uvloop_backend() -> None:
+    """Test that the uvloop backend runs the coroutine on uvloop."""
+    pytest.importorskip("uvloop")
+    module = event_loop.run(_loop_class_name(), "uvloop")
+    if not module.startswith("uvloop"):
+        raise AssertionError
+
+
+def test_run_unknown_backend() -> None:
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError, match="Unsupported event loop"):
+        event_loop.run(_loop_class_name(), "trio")
+
+
+def test_loop_lag_monitor_detects_blocking() -> None:
+    """Test that blocking the loop shows up as lag and saturation."""
+    recorder = StatsRecorder()
+
+    async def block() -> None:
+        monitor = LoopLagMonitor(recorder.loop_lag, interval=0.001)
+        monitor.start()
+        for _ in range(5):
+            await asyncio.sleep(0.002)
+            time.sleep(0.05)  # noqa: ASYNC251
+        await monitor.stop()
+
+    event_loop.run(block())
+    stats = recorder.summary(1.0)
+    if stats["loop_lag_max"] < 0.04:  # noqa: PLR2004
+        raise AssertionError
+    assert_values(stats["generator_saturated"], True, "Saturation not reported")  # noqa: FBT003
+
+
+def test_loop_lag_monitor_idle() -> None:
+    """Test that an idle loop reports little lag."""
+    histogram = LatencyHistogram()
+
+    async def idle() -> None:
+        monitor = LoopLagMonitor(histogram, interval=0.001)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    event_loop.run(idle())
+    if histogram.count == 0:
+        raise AssertionError
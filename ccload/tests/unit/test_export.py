@@ -41,6 +41,12 @@ def test_export_metrics(tmp_path: Path) -> None:
     """Test the export_metrics function."""
     export_metrics(statistics, "json", str(tmp_path / "test.json"))
     export_metrics(statistics, "csv", str(tmp_path / "test.csv"))
+    export_metrics(statistics, "prometheus", str(tmp_path / "test.prom"))
+    assert_values(
+        "ccload_requests_total" in (tmp_path / "test.prom").read_text(),
+        value2=True,
+        msg="Prometheus file not created",
+    )
     assert_values(
         (tmp_path / "test.json").exists(),
         value2=True,
@@ -0,0 +1,90 @@
+"""Unit tests for streaming request feeds."""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from ccload.core.feed import RequestFeed, parse_feed_line
+from ccload.core.load_tester_features import load_tester
+from tests.unit.utils import assert_values
+
+
+def _write_feed(path: Path, entries: list[dict]) -> Path:
+    """Write a JSONL feed with a blank line after every third entry."""
+    with path.open("w") as f:
+        for index, entry in enumerate(entries, 1):
+            f.write(json.dumps(entry) + "\n")
+            if index % 3 == 0:
+                f.write("\n")
+    return path
+
+
+async def _drain(feed: RequestFeed, limit: int) -> list:
+    """Take up to ``limit`` requests from a feed."""
+    requests = []
+    async with feed:
+        while len(requests) < limit and (request := await feed.next()) is not None:
+            requests.append(request)
+    return requests
+
+
+def test_parse_feed_line() -> None:
+    """Test that a feed line sets the read_url arguments it holds."""
+    line = b'{"url": "http://a/", "method": "POST", "json": {"id": 1}, "body": "x"}'
+
+    assert_values(
+        parse_feed_line(line, 1),
+        ("http://a/", {"method": "POST", "json_data": {"id": 1}, "data": "x"}),
+        "Unexpected request",
+    )
+    with pytest.raises(ValueError, match="line 7"):
+        parse_feed_line(b'{"method": "GET"}', 7)
+    with pytest.raises(ValueError, match="line 8"):
+        parse_feed_line(b"{", 8)
+
+
+def test_request_feed_streams_in_batches(tmp_path: Path) -> None:
+    """Test that a feed hands out every request in order, then ends."""
+    urls = [f"http://a/{index}" for index in range(10)]
+    path = _write_feed(tmp_path / "feed.jsonl", [{"url": url} for url in urls])
+
+    requests = asyncio.run(_drain(RequestFeed(path, batch_size=3), 100))
+
+    assert_values([url for url, _ in requests], urls, "Unexpected requests")
+
+
+def test_request_feed_repeat(tmp_path: Path) -> None:
+    """Test that a repeating feed starts over and rejects an empty file."""
+    path = _write_feed(
+        tmp_path / "feed.jsonl", [{"url": "http://a/0"}, {"url": "http://a/1"}],
+    )
+
+    requests = asyncio.run(_drain(RequestFeed(path, repeat=True, batch_size=3), 7))
+
+    assert_values(
+        [url for url, _ in requests],
+        ["http://a/0", "http://a/1"] * 3 + ["http://a/0"],
+        "Unexpected requests",
+    )
+    empty = tmp_path / "empty.jsonl"
+    empty.write_text("\n")
+    with pytest.raises(ValueError, match="no request"):
+        asyncio.run(_drain(RequestFeed(empty, repeat=True), 1))
+
+
+def test_load_tester_sends_feed(local_server: str, tmp_path: Path) -> None:
+    """Test that a run sends the requests of a feed until it ends."""
+    entries = [
+        {"url": f"{local_server}/{index}", "method": "POST", "json": {"id": index}}
+        for index in range(50)
+    ]
+    path = _write_feed(tmp_path / "feed.jsonl", entries)
+
+    stats = asyncio.run(load_tester(RequestFeed(path, batch_size=8), None, 4))
+    assert_values(stats["successful_requests"], 50, "Unexpected requests")
+
+    stats = asyncio.run(
+        load_tester(RequestFeed(path, repeat=True, batch_size=8), 120, 4),
+    )
+    assert_values(stats["successful_requests"], 120, "Unexpected looped requests")
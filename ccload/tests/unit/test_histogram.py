@@ -0,0 +1,61 @@
+"""Unit tests for the latency histogram."""
+import json
+import math
+import random
+
+import pytest
+
+from ccload.core.histogram import LatencyHistogram
+from tests.unit.utils import assert_values
+
+
+def test_histogram_empty() -> None:
+    """Test that an empty histogram reports zeros."""
+    histogram = LatencyHistogram()
+    assert_values(histogram.count, 0, "Unexpected count")
+    assert_values(histogram.mean, 0, "Unexpected mean")
+    assert_values(histogram.percentile(99), 0, "Unexpected percentile")
+
+
+@pytest.mark.parametrize("percent", [50, 90, 95, 99, 99.9])
+def test_histogram_percentile_relative_error(percent: float) -> None:
+    """Test that percentiles stay within the advertised relative error."""
+    rng = random.Random(42)  # noqa: S311
+    values = sorted(rng.lognormvariate(-4, 1) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    expected = values[rank - 1]
+    if histogram.percentile(percent) != pytest.approx(expected, rel=2**-8):
+        raise AssertionError
+
+
+def test_histogram_exact_extremes() -> None:
+    """Test that min, max and mean are tracked exactly."""
+    histogram = LatencyHistogram()
+    for value in (0.1, 0.2, 0.3):
+        histogram.record(value)
+    assert_values(histogram.min, 0.1, "Unexpected min")
+    assert_values(histogram.max, 0.3, "Unexpected max")
+    if histogram.mean != pytest.approx(0.2):
+        raise AssertionError
+    assert_values(histogram.percentile(100), 0.3, "Unexpected p100")
+
+
+def test_histogram_merge_and_roundtrip() -> None:
+    """Test that merged and deserialized histograms keep every sample."""
+    first, second, combined = (LatencyHistogram() for _ in range(3))
+    for i in range(1, 1001):
+        (first if i % 2 else second).record(i / 1000)
+        combined.record(i / 1000)
+
+    first.merge(second)
+    restored = LatencyHistogram.from_dict(json.loads(json.dumps(first.to_dict())))
+
+    assert_values(restored.count, combined.count, "Unexpected count")
+    assert_values(restored.counts, combined.counts, "Unexpected buckets")
+    assert_values(
+        restored.percentile(99), combined.percentile(99), "Unexpected p99",
+    )
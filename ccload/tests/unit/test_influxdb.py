@@ -0,0 +1,137 @@
+"""Unit tests for the InfluxDB line protocol export."""
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.load_tester_features import load_tester
+from ccload.core.profile import LoadProfile
+from ccload.exporters import influxdb
+from ccload.exporters.influxdb import (
+    InfluxWriter,
+    point_line,
+    profile_stages,
+    write_statistics,
+)
+from ccload.exporters.metric_exporter import export_metrics
+from tests.unit.utils import assert_values
+
+
+def _point(offset: float, successful: int = 4) -> dict:
+    histogram = LatencyHistogram()
+    for _ in range(successful):
+        histogram.record(0.01)
+    return {
+        "offset": offset, "duration": 1.0, "total_requests": successful + 1,
+        "successful_requests": successful, "failed_requests": 1,
+        "requests_per_second": float(successful), "request_time_mean": 0.01,
+        "request_time_p50": 0.01, "request_time_p90": 0.01,
+        "request_time_p99": 0.01, "request_time_max": 0.01,
+        "histogram": histogram.to_dict(),
+    }
+
+
+def test_point_line() -> None:
+    """Test that tags are escaped and counts written as integers."""
+    line = point_line(
+        _point(0), {"url": "http://a/b c", "worker": "w=1", "stage": ""}, 1234,
+    )
+
+    assert_values(
+        line,
+        r"ccload,url=http://a/b\ c,worker=w\=1 total_requests=5i,"
+        "successful_requests=4i,failed_requests=1i,requests_per_second=4.0,"
+        "request_time_mean=0.01,request_time_p50=0.01,request_time_p90=0.01,"
+        "request_time_p99=0.01,request_time_max=0.01 1234",
+        "Unexpected line",
+    )
+
+
+def test_export_influxdb_file(local_server: str, tmp_path: Path) -> None:
+    """Test that every interval of a staged run is written, tagged by stage."""
+    profile = LoadProfile.parse("step:1:2,step:1:4")
+    statistics = asyncio.run(load_tester(local_server, None, 4, profile=profile))
+    path = tmp_path / "results.lp"
+
+    export_metrics(statistics, "influxdb", str(path), local_server)
+
+    lines = path.read_text().splitlines()
+    assert_values(len(lines), len(statistics["timeseries"]), "Unexpected lines")
+    for line, stage in zip(
+        lines[:2], (r"step\ 1s\ to\ 2", r"step\ 1s\ to\ 4"), strict=True,
+    ):
+        assert_values(f",stage={stage}," in line, True, "Unexpected stage")  # noqa: FBT003
+    timestamp = int(lines[0].rsplit(" ", 1)[1])
+    assert_values(
+        timestamp, pytest.approx((statistics["started_at"] + 1) * 1e9, abs=1e8),
+        "Unexpected timestamp",
+    )
+
+
+def test_export_influxdb_workers(tmp_path: Path) -> None:
+    """Test that a distributed run is written as one series per worker."""
+    statistics = {
+        "started_at": 100.0,
+        "timeseries": [_point(0, 8)],
+        "workers": [
+            {"worker": "http://w1", "timeseries": [_point(0)]},
+            {"worker": "http://w2", "timeseries": [_point(0)]},
+        ],
+    }
+
+    write_statistics(statistics, tmp_path / "results.lp", "http://a/")
+
+    lines = (tmp_path / "results.lp").read_text().splitlines()
+    assert_values(
+        [line.split(" ")[0] for line in lines],
+        ["ccload,url=http://a/,worker=http://w1", "ccload,url=http://a/,worker=http://w2"],
+        "Unexpected series",
+    )
+    assert_values(lines[0].endswith(" 101000000000"), True, "Unexpected time")  # noqa: FBT003
+
+
+def test_influx_writer_batches(influx_receiver: tuple) -> None:
+    """Test that points are pushed in batches and the rest on close."""
+    url, bodies, _ = influx_receiver
+    writer = InfluxWriter(
+        url, tags={"url": "http://a/"}, batch_size=3, flush_interval=60,
+        stages=profile_stages(LoadProfile.parse("step:2:1,step:5:2")),
+    )
+    for offset in range(7):
+        writer(_point(offset))
+    writer.close()
+
+    assert_values(
+        [len(body.splitlines()) for body in bodies], [3, 3, 1], "Unexpected batches",
+    )
+    assert_values(writer.written, 7, "Unexpected written points")
+    assert_values(
+        r"stage=step\ 5s\ to\ 2" in bodies[1].splitlines()[0], True,  # noqa: FBT003
+        "Unexpected stage",
+    )
+
+
+def test_influx_writer_retries_and_bounds_buffer(
+    monkeypatch: pytest.MonkeyPatch, influx_receiver: tuple,
+) -> None:
+    """Test that failed writes are retried and only the newest points kept."""
+    monkeypatch.setattr(influxdb, "INFLUX_RETRY_DELAY", 0.01)
+    url, bodies, failures = influx_receiver
+    statuses = [503] * 1000
+    failures.extend(statuses)
+    writer = InfluxWriter(url, batch_size=100, flush_interval=0.01, max_pending=4)
+    for offset in range(6):
+        writer(_point(offset))
+    while len(failures) == len(statuses):
+        time.sleep(0.01)
+    failures.clear()
+    deadline = time.monotonic() + 5
+    while not bodies and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+
+    lines = [line for body in bodies for line in body.splitlines()]
+    assert_values(len(lines), 4, "Unexpected written points")
+    assert_values(writer.dropped, 2, "Unexpected dropped points")
@@ -0,0 +1,124 @@
+"""Unit tests for the multi-process engine."""
+import asyncio
+from typing import Any
+
+import pytest
+
+from ccload.core.load_tester_features import _calculate_statistics
+from ccload.core.multiprocess import partition, run_multiprocess_load_test
+from ccload.core.profile import LoadProfile
+from ccload.core.samples import SampleBuffer
+from ccload.core.scheduler import (
+    RequestCounter,
+    profile_slots,
+    profiled_worker,
+    run_worker_pool,
+)
+from ccload.core.statistics import covered_time, merge_statistics
+from tests.unit.utils import assert_values
+
+
+def _statistics(
+    request_times: list[float], started_at: float, finished_at: float,
+) -> dict[str, Any]:
+    statistics = _calculate_statistics(
+        [
+            {"status": 200, "request_time": t, "ttfb": t, "ttlb": t}
+            for t in request_times
+        ],
+        finished_at - started_at,
+    )
+    statistics["started_at"] = started_at
+    statistics["finished_at"] = finished_at
+    return statistics
+
+
+def test_partition() -> None:
+    """Test that shares add up and differ by at most one."""
+    assert_values(partition(10, 3), [4, 3, 3], "Unexpected partition")
+    assert_values(partition(2, 4), [1, 1, 0, 0], "Unexpected partition")
+
+
+def test_merge_statistics_is_exact() -> None:
+    """Test that merged percentiles equal those of a single run."""
+    first = _statistics([i / 1000 for i in range(1, 501)], 100.0, 102.0)
+    second = _statistics([i / 1000 for i in range(501, 1001)], 101.0, 104.0)
+    single = _statistics([i / 1000 for i in range(1, 1001)], 100.0, 104.0)
+
+    merged = merge_statistics([first, second])
+    for key in ("successful_requests", "request_time_p50", "request_time_p99"):
+        assert_values(merged[key], single[key], f"Unexpected {key}")
+    # 1000 requests over the union of [100, 102] and [101, 104].
+    if merged["requests_per_second"] != pytest.approx(250):
+        raise AssertionError
+
+
+def test_run_multiprocess_load_test(local_server: str) -> None:
+    """Test that processes split the budget and their results are merged."""
+    samples = SampleBuffer()
+    stats = run_multiprocess_load_test(
+        local_server, 30, 4, 2, samples=samples,
+    )
+
+    assert_values(stats["successful_requests"], 30, "Unexpected successes")
+    assert_values(len(samples), 30, "Unexpected number of samples")
+    assert_values(
+        [process["total_requests"] for process in stats["processes"]],
+        [15, 15],
+        "Unexpected per-process requests",
+    )
+
+
+def test_split_profile_keeps_total_concurrency() -> None:
+    """Test that a concurrency profile split by slot adds up to its level."""
+    profile = LoadProfile.parse("step:0.3:5")
+    n_generators = 4
+    state = {"in_flight": 0, "peak": 0}
+
+    async def send(_lag: float) -> None:
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+
+    async def run() -> None:
+        pools = []
+        for index in range(n_generators):
+            share = (index, n_generators)
+            worker = profiled_worker(RequestCounter(None), profile, send, share)
+            pools.append(
+                run_worker_pool(len(profile_slots(profile, share)), worker),
+            )
+        await asyncio.gather(*pools)
+
+    asyncio.run(run())
+    assert_values(state["peak"], 5, "Active workers differ from the profile level")
+    assert_values(
+        [len(profile_slots(profile, (i, n_generators))) for i in range(4)],
+        [2, 1, 1, 1],
+        "Unexpected slots per generator",
+    )
+
+
+def test_processes_capped_at_concurrency(local_server: str) -> None:
+    """Test that no process is started without a concurrent request to run."""
+    stats = run_multiprocess_load_test(local_server, 6, 2, 4)
+    assert_values(len(stats["processes"]), 2, "Unexpected number of processes")
+
+
+def test_merge_statistics_skips_gaps_between_runs() -> None:
+    """Test that throughput is not diluted by time when nothing ran."""
+    first = _statistics([0.01] * 100, 100.0, 101.0)
+    second = _statistics([0.01] * 100, 110.0, 111.0)
+
+    merged = merge_statistics([first, second])
+    assert_values(merged["elapsed_time"], 2.0, "Gap counted as run time")
+    assert_values(merged["requests_per_second"], 100.0, "Unexpected throughput")
+    assert_values(
+        (merged["started_at"], merged["finished_at"]), (100.0, 111.0),
+        "Unexpected span",
+    )
+    assert_values(
+        covered_time([(0, 2), (1, 3), (1.5, 2.5), (5, 6)]), 4.0,
+        "Unexpected union length",
+    )
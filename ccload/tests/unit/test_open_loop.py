@@ -0,0 +1,113 @@
+"""Unit tests for the open-loop arrival-rate mode."""
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.scheduler import ArrivalSchedule
+from tests.unit.utils import assert_values
+
+
+def _fake_read_url(request_time: float) -> Any:  # noqa: ANN401
+    async def fake_read_url(**_kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        await asyncio.sleep(request_time)
+        return {
+            "status": 200,
+            "ttfb": request_time,
+            "ttlb": request_time,
+            "request_time": request_time,
+        }
+    return fake_read_url
+
+
+def test_constant_schedule() -> None:
+    """Test that constant arrivals are evenly spaced."""
+    schedule = ArrivalSchedule(4)
+    offsets = [schedule.next_offset() for _ in range(4)]
+    assert_values(offsets, [0.0, 0.25, 0.5, 0.75], "Unexpected offsets")
+
+
+def test_poisson_schedule_rate() -> None:
+    """Test that Poisson arrivals average the requested rate."""
+    schedule = ArrivalSchedule(100, "poisson", seed=1)
+    offsets = [schedule.next_offset() for _ in range(10000)]
+    if offsets != sorted(offsets):
+        raise AssertionError
+    if len(offsets) / offsets[-1] != pytest.approx(100, rel=0.05):
+        raise AssertionError
+
+
+def test_schedule_rejects_invalid_arguments() -> None:
+    """Test that invalid rates and distributions are rejected."""
+    with pytest.raises(ValueError, match="positive"):
+        ArrivalSchedule(0)
+    with pytest.raises(ValueError, match="distribution"):
+        ArrivalSchedule(1, "uniform")
+
+
+def test_open_loop_reports_coordinated_omission(test_url: str) -> None:
+    """Test that requests held back by the concurrency cap are reported."""
+    request_time = 0.05
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch(
+            "ccload.core.load_tester_features.read_url",
+            _fake_read_url(request_time),
+        ),
+    ):
+        # One worker, one request every 10 ms, 50 ms per request.
+        stats = asyncio.run(load_tester(test_url, 5, 1, rate=100))
+
+    assert_values(stats["scheduled_requests"], 5, "Unexpected scheduled count")
+    assert_values(stats["delayed_requests"], 4, "Unexpected delayed count")
+    # The last request was due at 40 ms but could only start at ~200 ms.
+    if stats["schedule_lag_max"] < 0.15:  # noqa: PLR2004
+        raise AssertionError
+    if stats["request_time_max"] < request_time + 0.15:
+        raise AssertionError
+
+
+def test_open_loop_keeps_schedule(test_url: str) -> None:
+    """Test that the run lasts as long as the schedule, not the requests."""
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch("ccload.core.load_tester_features.read_url", _fake_read_url(0)),
+    ):
+        stats = asyncio.run(load_tester(test_url, 10, 4, rate=50))
+
+    assert_values(stats["successful_requests"], 10, "Unexpected successes")
+    assert_values(stats["delayed_requests"], 0, "Unexpected delayed requests")
+    if stats["elapsed_time"] < 0.18:  # noqa: PLR2004
+        raise AssertionError
+
+
+@pytest.mark.parametrize("arrival", ["constant", "poisson"])
+def test_schedule_remaining(arrival: str) -> None:
+    """Test that the arrivals left before a deadline are counted."""
+    schedule = ArrivalSchedule(100, arrival, seed=1)
+    sent = [schedule.next_offset() for _ in range(10)]
+    remaining = schedule.remaining(1.0)
+    if len(sent) + remaining != pytest.approx(100, abs=25):
+        raise AssertionError
+    assert_values(schedule.remaining(1.0), 0, "Arrivals counted twice")
+    assert_values(ArrivalSchedule(100, arrival).remaining(1.0, 7), 7, "Limit ignored")
+
+
+def test_open_loop_reports_missed_requests(test_url: str) -> None:
+    """Test that arrivals held back until the deadline are reported."""
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch("ccload.core.load_tester_features.read_url", _fake_read_url(0.05)),
+    ):
+        # Two workers at 50 ms per request send ~40 of 100 arrivals.
+        stats = asyncio.run(load_tester(test_url, None, 2, rate=100, duration=1))
+
+    sent = stats["total_requests"] + stats["cancelled_requests"]
+    assert_values(stats["scheduled_requests"], 100, "Unexpected scheduled count")
+    assert_values(
+        stats["missed_requests"], 100 - sent, "Unexpected missed count",
+    )
+    if stats["delayed_requests"] < stats["missed_requests"]:
+        raise AssertionError
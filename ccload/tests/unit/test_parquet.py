@@ -0,0 +1,91 @@
+"""Unit tests for the Parquet export."""
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ccload.cli import _create_argument_parser, _option_conflict
+from ccload.core import sample_log as sample_log_module
+from ccload.core.load_tester_features import load_tester
+from ccload.core.sample_log import SampleLog, SampleLogReader
+from ccload.exporters.metric_exporter import export_metrics
+from tests.unit.utils import assert_values
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from ccload.exporters.parquet import (  # noqa: E402
+    ParquetSampleLog,
+    ParquetTimeseries,
+    sample_log_to_parquet,
+)
+
+
+def test_parquet_sample_log_row_groups(
+    monkeypatch: pytest.MonkeyPatch, local_server: str, tmp_path: Path,
+) -> None:
+    """Test that the samples of a run are written in row groups as it goes."""
+    monkeypatch.setattr(sample_log_module, "CHUNK_RECORDS", 16)
+    path = tmp_path / "run.samples.parquet"
+    log = ParquetSampleLog(path)
+    stats = asyncio.run(load_tester(local_server, 50, 5, sample_log=log))
+    log.close()
+
+    parquet = pq.ParquetFile(path)
+    assert_values(parquet.metadata.num_rows, stats["total_requests"], "Unexpected rows")
+    assert_values(parquet.metadata.num_row_groups, 4, "Unexpected row groups")
+    table = parquet.read(columns=["status", "error", "bytes", "dns"])
+    assert_values(set(table["status"].to_pylist()), {200}, "Unexpected status")
+    assert_values(set(table["error"].to_pylist()), {""}, "Unexpected errors")
+    assert_values(table["bytes"][0].as_py(), 2, "Unexpected body size")
+    assert_values(table["dns"].null_count, 50, "Missing phases are not null")
+
+
+def test_sample_log_to_parquet(tmp_path: Path) -> None:
+    """Test that a sample log converts to Parquet with its error kinds."""
+    log = SampleLog(tmp_path / "samples.log")
+    log.record({"status": 200, "request_time": 0.5, "ttfb": 0.1, "ttlb": 0.4})
+    log.record(TimeoutError())
+    log.close()
+
+    count = sample_log_to_parquet(
+        SampleLogReader(tmp_path / "samples.log"), tmp_path / "samples.parquet",
+    )
+
+    table = pq.read_table(tmp_path / "samples.parquet")
+    assert_values(count, 2, "Unexpected number of samples")
+    assert_values(table["error"].to_pylist(), ["", "timeout"], "Unexpected errors")
+    assert_values(table["request_time"][0].as_py(), 0.5, "Unexpected request time")
+
+
+def test_parquet_timeseries(local_server: str, tmp_path: Path) -> None:
+    """Test that intervals are written in row groups, and by export_metrics."""
+    writer = ParquetTimeseries(tmp_path / "live.parquet", row_group_size=1)
+    stats = asyncio.run(
+        load_tester(local_server, None, 2, duration=2.5, on_interval=writer),
+    )
+    writer.close()
+    export_metrics(stats, "parquet", str(tmp_path / "export.parquet"))
+
+    live = pq.ParquetFile(tmp_path / "live.parquet")
+    assert_values(live.metadata.num_row_groups, 3, "Unexpected row groups")
+    for path in ("live.parquet", "export.parquet"):
+        table = pq.read_table(tmp_path / path)
+        assert_values(
+            table["successful_requests"].to_pylist(),
+            [point["successful_requests"] for point in stats["timeseries"]],
+            f"Unexpected intervals in {path}",
+        )
+
+
+@pytest.mark.parametrize("options", [["-p", "2"], ["--distributed"]])
+def test_parquet_export_requires_single_process(options: list[str]) -> None:
+    """Test that runs which cannot stream their samples are rejected."""
+    args = _create_argument_parser().parse_args([
+        "http://example.com", "--export", "parquet", "--output", "run.parquet",
+        *options,
+    ])
+    assert_values(
+        _option_conflict(args),
+        "--export parquet cannot be used with --processes or --distributed",
+        "Unexpected conflict",
+    )
@@ -0,0 +1,102 @@
+"""Unit tests for staged load profiles."""
+import asyncio
+import math
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.profile import LoadProfile
+from ccload.script.request_script import RequestScript
+from tests.unit.utils import assert_values
+
+
+def test_profile_parse_levels() -> None:
+    """Test the level of every stage shape over time."""
+    profile = LoadProfile.parse("ramp:10:100,hold:10,step:10:50,spike:5:200,ramp:10:0")
+
+    assert_values(profile.duration, 45, "Unexpected duration")
+    assert_values(profile.peak, 200, "Unexpected peak")
+    assert_values(profile.level_at(5), 50, "Unexpected ramp level")
+    assert_values(profile.level_at(15), 100, "Unexpected hold level")
+    assert_values(profile.level_at(25), 50, "Unexpected step level")
+    assert_values(profile.level_at(32), 200, "Unexpected spike level")
+    # After the spike the level returns to the step level and ramps down.
+    assert_values(profile.level_at(40), 25, "Unexpected ramp-down level")
+    assert_values(profile.level_at(45), 0, "Unexpected level after the end")
+    assert_values(profile.stage_index(32), 3, "Unexpected stage")
+
+
+@pytest.mark.parametrize(
+    "spec", ["ramp:10", "wave:10:5", "hold:0", "ramp:10:5:1"],
+)
+def test_profile_parse_rejects_invalid_stages(spec: str) -> None:
+    """Test that malformed stages are rejected."""
+    with pytest.raises(ValueError):  # noqa: PT011
+        LoadProfile.parse(spec)
+
+
+def test_profile_advance_integrates_rate() -> None:
+    """Test that arrivals follow the integral of a ramping rate."""
+    profile = LoadProfile.parse("ramp:10:100,hold:10")
+
+    # 250 arrivals are expected by t=sqrt(2 * 250 / 10) = 7.07s on the ramp.
+    if profile.advance(0, 250) != pytest.approx(math.sqrt(50)):
+        raise AssertionError
+    # The ramp holds 500 arrivals, then 100/s: 600 arrivals by t=11s.
+    if profile.advance(0, 600) != pytest.approx(11):
+        raise AssertionError
+    assert_values(profile.advance(0, 5000), math.inf, "Arrival past the end")
+
+
+def test_script_stages(create_temp_script: Any) -> None:  # noqa: ANN401
+    """Test that script entries can declare stages."""
+    script_path = create_temp_script([{
+        "url": "https://example.com/",
+        "stages": [{"duration": 5, "target": 10}, {"shape": "hold", "duration": 5}],
+    }])
+    request = RequestScript(str(script_path)).get_requests()[0]
+    assert_values(request["profile"].duration, 10, "Unexpected profile duration")
+
+
+def test_load_tester_stage_breakdown(test_url: str) -> None:
+    """Test that a concurrency profile reports statistics per stage."""
+    async def fake_read_url(**_kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        await asyncio.sleep(0.01)
+        return {"status": 200, "ttfb": 0.01, "ttlb": 0.01, "request_time": 0.01}
+
+    profile = LoadProfile.parse("step:0.2:1,step:0.2:4")
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch("ccload.core.load_tester_features.read_url", fake_read_url),
+    ):
+        stats = asyncio.run(load_tester(test_url, None, 1, profile=profile))
+
+    first, second = stats["stages"]
+    assert_values(first["stage"], "step 0.2s to 1", "Unexpected stage name")
+    if second["successful_requests"] < 2 * first["successful_requests"]:
+        raise AssertionError
+    total = first["successful_requests"] + second["successful_requests"]
+    assert_values(total, stats["successful_requests"], "Stages do not add up")
+
+
+def test_load_tester_rate_profile(test_url: str) -> None:
+    """Test that a rate profile schedules the integral of its rate."""
+    async def fake_read_url(**_kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        return {"status": 200, "ttfb": 0.0, "ttlb": 0.0, "request_time": 0.0}
+
+    profile = LoadProfile.parse("step:0.2:50,step:0.2:100")
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch("ccload.core.load_tester_features.read_url", fake_read_url),
+    ):
+        stats = asyncio.run(load_tester(
+            test_url, None, 4, profile=profile, profile_target="rate",
+        ))
+
+    assert_values(
+        [stage["successful_requests"] for stage in stats["stages"]],
+        [10, 20],
+        "Unexpected arrivals per stage",
+    )
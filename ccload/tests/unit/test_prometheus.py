@@ -0,0 +1,100 @@
+"""Unit tests for the Prometheus exposition of metrics."""
+import asyncio
+
+import aiohttp
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.statistics import StatsRecorder
+from ccload.exporters.prometheus import (
+    LiveMetrics,
+    render_statistics,
+    serve_metrics,
+)
+from tests.unit.utils import assert_values
+
+
+def _samples(text: str) -> dict[str, float]:
+    """Parse the samples of a text exposition by metric name and labels."""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines() if line and not line.startswith("#")
+    }
+
+
+def test_render_statistics_histogram_buckets() -> None:
+    """Test that latencies are exposed as cumulative histogram buckets."""
+    recorder = StatsRecorder()
+    for latency in (0.002, 0.003, 0.02, 0.3, 4.0, 20.0):
+        recorder.record({
+            "status": 200, "request_time": latency, "ttfb": latency,
+            "ttlb": latency, "dns": 0.0005,
+        })
+    recorder.record({"status": 503, "request_time": 1, "ttfb": 1, "ttlb": 1})
+    recorder.record(ConnectionError())
+
+    samples = _samples(render_statistics(recorder.summary(2.0)))
+
+    name = "ccload_request_duration_seconds"
+    assert_values(
+        [
+            samples[f'{name}_bucket{{metric="request_time",le="{bound}"}}']
+            for bound in ("0.001", "0.0025", "0.005", "0.025", "0.5", "5", "10", "+Inf")
+        ],
+        [0, 1, 2, 3, 4, 5, 5, 6],
+        "Unexpected buckets",
+    )
+    assert_values(
+        samples[f'{name}_count{{metric="ttfb"}}'], 6, "Unexpected count",
+    )
+    assert_values(
+        round(samples[f'{name}_sum{{metric="ttlb"}}'], 6), 24.325, "Unexpected sum",
+    )
+    assert_values(
+        samples['ccload_request_phase_seconds_bucket{phase="dns",le="0.001"}'], 6,
+        "Unexpected phase bucket",
+    )
+    assert_values(
+        samples['ccload_requests_total{outcome="failed"}'], 2, "Unexpected failures",
+    )
+    assert_values(samples["ccload_requests_per_second"], 3, "Unexpected rate")
+
+
+def test_live_metrics_endpoint() -> None:
+    """Test that intervals are served cumulatively on /metrics."""
+    metrics = LiveMetrics()
+    histogram = LatencyHistogram()
+    histogram.record(0.004)
+    point = {
+        "total_requests": 3, "successful_requests": 1, "failed_requests": 1,
+        "requests_per_second": 1.0, "histogram": histogram.to_dict(),
+    }
+
+    async def scrape() -> tuple[str, str]:
+        async with (
+            serve_metrics(metrics, 0, "127.0.0.1") as url,
+            aiohttp.ClientSession() as session,
+        ):
+            metrics(point)
+            async with session.get(url) as response:
+                first = await response.text()
+            metrics(point)
+            async with session.get(url) as response:
+                return first, await response.text()
+
+    first, second = asyncio.run(scrape())
+
+    name = "ccload_request_duration_seconds"
+    for text, expected in ((first, 1), (second, 2)):
+        samples = _samples(text)
+        assert_values(
+            samples['ccload_requests_total{outcome="successful"}'], expected,
+            "Unexpected requests",
+        )
+        assert_values(
+            samples[f'{name}_bucket{{metric="request_time",le="0.005"}}'], expected,
+            "Unexpected bucket",
+        )
+    assert_values(
+        _samples(second)['ccload_requests_total{outcome="other"}'], 2,
+        "Unexpected other outcomes",
+    )
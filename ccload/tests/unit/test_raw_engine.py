@@ -0,0 +1,119 @@
+"""Unit tests for the raw HTTP/1.1 engine."""
+import asyncio
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.raw_engine import RawHttpClient, ResponseParser, encode_request
+from tests.unit.utils import assert_values
+
+RESPONSES = (
+    b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello"
+    b"HTTP/1.1 201 Created\r\nTransfer-Encoding: chunked\r\n\r\n"
+    b"3;ext=1\r\nabc\r\n4\r\ndefg\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    b"HTTP/1.1 100 Continue\r\n\r\n"
+    b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n"
+    b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 2\r\n\r\nno"
+)
+
+
+def test_encode_request() -> None:
+    """Test the encoding of a request with a query string and a JSON body."""
+    payload = encode_request(
+        "http://example.com:8080/path?q=1", "post", {"X-Token": "t"}, {"a": 1},
+    )
+    head, _, body = payload.partition(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    assert_values(lines[0], b"POST /path?q=1 HTTP/1.1", "Unexpected request line")
+    if b"Host: example.com:8080" not in lines or b"X-Token: t" not in lines:
+        raise AssertionError
+    assert_values(body, b'{"a": 1}', "Unexpected body")
+    if f"Content-Length: {len(body)}".encode() not in lines:
+        raise AssertionError
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, len(RESPONSES)])
+def test_parser_framing(chunk_size: int) -> None:
+    """Test that responses are delimited whatever the read boundaries."""
+    parser = ResponseParser()
+    responses = []
+    for i in range(0, len(RESPONSES), chunk_size):
+        responses.extend(parser.feed(RESPONSES[i:i + chunk_size]))
+    assert_values(
+        responses, [(200, 5), (201, 7), (204, 0), (503, 2)],
+        "Unexpected statuses or body sizes",
+    )
+    if parser.in_progress:
+        raise AssertionError
+
+
+def test_parser_head_and_close_delimited() -> None:
+    """Test HEAD responses and bodies delimited by the connection close."""
+    parser = ResponseParser(head_request=True)
+    responses = parser.feed(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n")
+    assert_values(responses, [(200, 0)], "HEAD response should have no body")
+
+    parser = ResponseParser()
+    assert_values(
+        parser.feed(b"HTTP/1.0 200 OK\r\n\r\nsome body"), [], "Completed early",
+    )
+    if parser.keep_alive:
+        raise AssertionError
+    assert_values(parser.feed_eof(), (200, 9), "Unexpected response at close")
+
+
+@pytest.mark.parametrize("pipeline", [1, 4])
+def test_raw_engine_load_test(local_server: str, pipeline: int) -> None:
+    """Test a load test through the raw engine against a local server."""
+    stats = asyncio.run(load_tester(
+        f"{local_server}/ping?x=1", 200, 8, engine="raw", pipeline=pipeline,
+    ))
+    assert_values(stats["successful_requests"], 200, "Unexpected successes")
+    assert_values(stats["failed_requests"], 0, "Unexpected failures")
+    if not 0 < stats["ttfb_min"] <= stats["ttlb_max"]:
+        raise AssertionError
+
+
+@pytest.mark.parametrize("pipeline", [1, 3])
+def test_raw_client_reconnects_after_close(pipeline: int) -> None:
+    """Test that requests survive a server closing every connection."""
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+    ) -> None:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\nbye")
+        writer.close()
+
+    async def run() -> list[int]:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = RawHttpClient(f"http://127.0.0.1:{port}/", pipeline=pipeline)
+        results = await asyncio.gather(*(client.request() for _ in range(3)))
+        statuses = [result["status"] for result in results]
+        client.close()
+        server.close()
+        await server.wait_closed()
+        return statuses
+
+    assert_values(asyncio.run(run()), [200, 200, 200], "Unexpected statuses")
+
+
+def test_raw_client_times_out_silent_server() -> None:
+    """Test that a server accepting but never answering fails the request."""
+    async def handle(
+        reader: asyncio.StreamReader, _writer: asyncio.StreamWriter,
+    ) -> None:
+        await reader.read()
+
+    async def run() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = RawHttpClient(f"http://127.0.0.1:{port}/", timeout=0.2)
+        try:
+            with pytest.raises(TimeoutError):
+                await client.request()
+        finally:
+            client.close()
+            server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+"""Unit tests for time-faithful traffic replay."""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from ccload.core.replay import ReplayIndex, replay_tester
+from tests.unit.utils import assert_values
+
+
+def _write_jsonl(path: Path, entries: list[dict]) -> Path:
+    """Write one JSON line per entry."""
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    return path
+
+
+def test_replay_index_sorts_jsonl(tmp_path: Path) -> None:
+    """Test that a JSONL log is indexed in time order from its first request."""
+    path = _write_jsonl(tmp_path / "log.jsonl", [
+        {"timestamp": 100.5, "url": "http://a/2", "method": "POST"},
+        {"timestamp": 100.0, "url": "http://a/0"},
+        {"timestamp": "1970-01-01T00:01:40.25+00:00", "url": "http://a/1"},
+    ])
+
+    index = ReplayIndex(path)
+
+    assert_values(index.log_format, "jsonl", "Unexpected format")
+    assert_values(list(index.offsets), [0.0, 0.25, 0.5], "Unexpected offsets")
+    assert_values(index.span, 0.5, "Unexpected span")
+    with path.open("rb") as f:
+        log = f.read()
+    assert_values(
+        [index.request(log, position)[0] for position in range(len(index))],
+        ["http://a/0", "http://a/1", "http://a/2"],
+        "Unexpected request order",
+    )
+
+
+def test_replay_index_reads_access_logs(tmp_path: Path) -> None:
+    """Test that access log paths are replayed under the base URL."""
+    path = tmp_path / "access.log"
+    path.write_text(
+        '10.0.0.1 - - [10/Oct/2026:13:55:36 +0000] "GET /a?q=1 HTTP/1.1" 200 5\n'
+        '10.0.0.2 - bob [10/Oct/2026:13:55:38 +0000] "POST /b HTTP/1.1" 201 0 '
+        '"-" "curl/8.0"\n',
+    )
+
+    index = ReplayIndex(path, base_url="http://host/")
+
+    assert_values(index.log_format, "access", "Unexpected format")
+    assert_values(list(index.offsets), [0.0, 2.0], "Unexpected offsets")
+    log = path.read_bytes()
+    assert_values(
+        [index.request(log, 0), index.request(log, 1)],
+        [("http://host/a?q=1", {"method": "GET"}),
+         ("http://host/b", {"method": "POST"})],
+        "Unexpected requests",
+    )
+    with pytest.raises(ValueError, match="base URL"):
+        ReplayIndex(path)
+
+
+def test_replay_keeps_inter_arrival_times(local_server: str, tmp_path: Path) -> None:
+    """Test that a replay follows the timeline of the log, sped up."""
+    path = _write_jsonl(tmp_path / "log.jsonl", [
+        {"timestamp": 1000 + 0.05 * position, "url": f"{local_server}/{position}"}
+        for position in range(20)
+    ])
+
+    stats = asyncio.run(replay_tester(ReplayIndex(path), 8, speedup=2))
+
+    assert_values(stats["successful_requests"], 20, "Unexpected requests")
+    assert_values(stats["scheduled_requests"], 20, "Unexpected scheduled requests")
+    assert_values(stats["speedup"], 2, "Unexpected speedup")
+    expected = 0.95 / 2
+    if not expected <= stats["elapsed_time"] < expected + 0.3:
+        msg = f"Replay took {stats['elapsed_time']}s instead of {expected}s"
+        raise AssertionError(msg)
+    if stats["schedule_lag_mean"] > 0.005:  # noqa: PLR2004
+        msg = f"Replay fell {stats['schedule_lag_mean']}s behind schedule"
+        raise AssertionError(msg)
@@ -0,0 +1,127 @@
+"""Unit tests for the binary sample log."""
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+
+from ccload.core import sample_log as sample_log_module
+from ccload.core.load_tester_features import _calculate_statistics, load_tester
+from ccload.core.sample_log import RECORD, SampleLog, SampleLogReader
+from tests.unit.utils import assert_values
+
+
+def _results() -> list[dict[str, Any] | Exception]:
+    results: list[dict[str, Any] | Exception] = [
+        {"status": 200, "request_time": i / 100, "ttfb": i / 200, "ttlb": i / 150,
+         "connect": 0.001, "bytes": i}
+        for i in range(1, 31)
+    ]
+    results.append({"status": 503, "request_time": 9, "ttfb": 9, "ttlb": 9})
+    results.append(TimeoutError())
+    results.append(aiohttp.ClientConnectionError("refused"))
+    return results
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_sample_log_round_trip(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, compress: bool,  # noqa: FBT001
+) -> None:
+    """Test that every sample is read back, across chunks, compressed or not."""
+    monkeypatch.setattr(sample_log_module, "CHUNK_RECORDS", 4)
+    path = tmp_path / "samples.log"
+    log = SampleLog(path, compress=compress)
+    for result in _results():
+        log.record(result)
+    log.close()
+
+    reader = SampleLogReader(path)
+    samples = list(reader)
+    assert_values(len(samples), 33, "Unexpected number of samples")
+    assert_values(samples[2]["bytes"], 3, "Unexpected body size")
+    assert_values(samples[2]["ttfb"], pytest.approx(0.015), "Unexpected ttfb")
+    assert_values("dns" in samples[2], False, "Unexpected phase")  # noqa: FBT003
+    assert_values(
+        [sample["error"] for sample in samples[-3:]],
+        ["", "timeout", "connection"],
+        "Unexpected error kinds",
+    )
+    if compress and path.stat().st_size >= 33 * RECORD.size:
+        msg = "Compressed log is not smaller than its records"
+        raise AssertionError(msg)
+
+    expected = _calculate_statistics(_results(), 1.0)
+    summary = reader.summary()
+    for key in ("total_requests", "successful_requests", "failed_requests"):
+        assert_values(summary[key], expected[key], f"Unexpected {key}")
+    assert_values(
+        summary["request_time_p50"], pytest.approx(expected["request_time_p50"]),
+        "Unexpected median",
+    )
+
+    reader.to_csv(tmp_path / "samples.csv")
+    lines = (tmp_path / "samples.csv").read_text().splitlines()
+    assert_values(len(lines), 34, "Unexpected CSV rows")
+
+
+def test_sample_log_reader_rejects_other_files(tmp_path: Path) -> None:
+    """Test that a file without the log signature is rejected."""
+    path = tmp_path / "other.log"
+    path.write_bytes(b"not a sample log")
+    with pytest.raises(ValueError, match="not a ccload sample log"):
+        SampleLogReader(path)
+
+
+def test_load_tester_writes_sample_log(local_server: str, tmp_path: Path) -> None:
+    """Test that a run appends every result to its sample log."""
+    log = SampleLog(tmp_path / "samples.log")
+    stats = asyncio.run(load_tester(local_server, 50, 5, sample_log=log))
+    log.close()
+
+    reader = SampleLogReader(tmp_path / "samples.log")
+    samples = list(reader)
+    assert_values(len(samples), stats["total_requests"], "Unexpected samples")
+    assert_values(samples[0]["bytes"], 2, "Unexpected body size")
+    # Offsets count from the start of the load, not the creation of the log.
+    assert_values(reader.started_at, stats["started_at"], "Unexpected start")
+    if samples[-1]["offset"] > stats["elapsed_time"]:
+        raise AssertionError
+
+
+@pytest.mark.parametrize("engine", ["aiohttp", "raw"])
+def test_sample_log_body_size(local_server: str, tmp_path: Path, engine: str) -> None:
+    """Test that both engines log the size of the response bodies."""
+    log = SampleLog(tmp_path / "samples.log")
+    asyncio.run(load_tester(local_server, 5, 1, engine=engine, sample_log=log))
+    log.close()
+    assert_values(
+        {sample["bytes"] for sample in SampleLogReader(tmp_path / "samples.log")},
+        {2}, "Unexpected body sizes",
+    )
+
+
+def test_sample_log_write_failure(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
+) -> None:
+    """Test that a failed write is raised instead of blocking or passing."""
+    monkeypatch.setattr(sample_log_module, "CHUNK_RECORDS", 2)
+    monkeypatch.setattr(sample_log_module, "MAX_PENDING_CHUNKS", 1)
+
+    def fail(_chunk: bytes) -> None:
+        msg = "No space left on device"
+        raise OSError(msg)
+
+    def record_all() -> None:
+        for result in _results() * 10:
+            log.record(result)
+
+    log = SampleLog(tmp_path / "samples.log")
+    monkeypatch.setattr(log, "_write_chunk", fail)
+    # Far more chunks than the queue holds: recording must fail, not block.
+    with pytest.raises(OSError, match="No space left"):
+        record_all()
+    with pytest.raises(OSError, match="Failed to write the sample log"):
+        log.close()
+    if not log._file.closed:  # noqa: SLF001
+        raise AssertionError
@@ -0,0 +1,83 @@
+"""Unit tests for the columnar sample buffer."""
+import asyncio
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ccload.core import samples as samples_module
+from ccload.core.load_tester_features import _calculate_statistics, load_tester
+from ccload.core.samples import SampleBuffer
+from tests.unit.utils import assert_values
+
+
+def _results() -> list[dict[str, Any] | Exception]:
+    results: list[dict[str, Any] | Exception] = [
+        {"status": 200, "request_time": i / 100, "ttfb": i / 200, "ttlb": i / 150}
+        for i in range(1, 101)
+    ]
+    results.append({"status": 503, "request_time": 9, "ttfb": 9, "ttlb": 9})
+    results.append({"status": 404, "request_time": 9, "ttfb": 9, "ttlb": 9})
+    results.append(Exception("Connection error"))
+    return results
+
+
+def test_sample_buffer_grows_in_chunks() -> None:
+    """Test that the buffer grows by whole chunks and stays compact."""
+    buffer = SampleBuffer(chunk_size=4)
+    for result in _results():
+        buffer.record(result)
+
+    assert_values(len(buffer), 103, "Unexpected number of samples")
+    assert_values(buffer.capacity, 104, "Unexpected capacity")
+    assert_values(buffer.nbytes, 103 * 26, "Unexpected bytes per sample")
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_sample_buffer_summary_matches_dict_statistics(
+    monkeypatch: pytest.MonkeyPatch, use_numpy: bool,  # noqa: FBT001
+) -> None:
+    """Test that vectorized statistics agree with the dict-based ones."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(samples_module, "np", None)
+
+    buffer = SampleBuffer(chunk_size=16)
+    for result in _results():
+        buffer.record(result)
+    stats = buffer.summary(2.0)
+    expected = _calculate_statistics(_results(), 2.0)
+
+    for key in ("total_requests", "successful_requests", "failed_requests"):
+        assert_values(stats[key], expected[key], f"Unexpected {key}")
+    for key in ("request_time_min", "ttfb_max", "ttlb_mean", "requests_per_second"):
+        if stats[key] != pytest.approx(expected[key]):
+            raise AssertionError(key)
+    if stats["request_time_p99"] != pytest.approx(0.99):
+        raise AssertionError
+    if stats["request_time_p50"] != pytest.approx(0.5):
+        raise AssertionError
+
+
+def test_sample_buffer_summary_empty() -> None:
+    """Test the statistics of an empty buffer."""
+    stats = SampleBuffer().summary(0)
+    assert_values(stats["total_requests"], 0, "Unexpected total")
+    assert_values(stats["ttfb_p99"], 0, "Unexpected percentile")
+
+
+@patch("ccload.core.load_tester_features.aiohttp.ClientSession")
+def test_load_tester_records_samples(
+    mock_session_cls: MagicMock,
+    mock_client_session_factory: Callable[[int], MagicMock],
+    test_url: str,
+) -> None:
+    """Test that load_tester writes every result into the buffer."""
+    mock_session_cls.return_value = mock_client_session_factory(200)
+
+    buffer = SampleBuffer()
+    stats = asyncio.run(load_tester(test_url, 7, 3, samples=buffer))
+    assert_values(len(buffer), 7, "Unexpected number of samples")
+    assert_values(stats["successful_requests"], 7, "Unexpected successes")
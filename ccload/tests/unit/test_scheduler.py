@@ -0,0 +1,147 @@
+"""Unit tests for the worker-pool scheduler."""
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.scheduler import LeasedCounter, RequestCounter, run_worker_pool
+from tests.unit.utils import assert_values
+
+
+def test_request_counter_budget() -> None:
+    """Test that the counter hands out exactly n_request tickets."""
+    counter = RequestCounter(3)
+    tickets = [counter.take() for _ in range(5)]
+    assert_values(tickets, [0, 1, 2, None, None], "Unexpected tickets")
+
+
+def test_leased_counter_waits_for_leases() -> None:
+    """Test that a leased counter asks for more work and waits for it."""
+    requests: list[int] = []
+
+    async def run() -> list[int | None]:
+        counter = LeasedCounter(4, lambda: requests.append(counter.issued))
+        tickets = [await counter.acquire() for _ in range(4)]
+        waiting = asyncio.ensure_future(counter.acquire())
+        await asyncio.sleep(0)
+        if waiting.done():
+            raise AssertionError
+        counter.grant(1)
+        tickets.append(await waiting)
+        counter.close()
+        tickets.append(await counter.acquire())
+        return tickets
+
+    assert_values(asyncio.run(run()), [0, 1, 2, 3, 4, None], "Unexpected tickets")
+    # Half of the first lease left, then the second lease spent at once.
+    assert_values(requests, [2, 5], "Unexpected lease requests")
+
+
+def test_worker_pool_bounds_concurrency() -> None:
+    """Test that in-flight requests never exceed the number of workers."""
+    counter = RequestCounter(50)
+    state = {"in_flight": 0, "peak": 0, "done": 0}
+
+    async def worker() -> None:
+        while counter.take() is not None:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(0)
+            state["in_flight"] -= 1
+            state["done"] += 1
+
+    asyncio.run(run_worker_pool(4, worker))
+    assert_values(state["done"], 50, "Not every request was executed")
+    assert_values(state["peak"], 4, "Unexpected peak concurrency")
+
+
+@patch("ccload.core.load_tester_features.aiohttp.ClientSession")
+def test_load_tester_issues_one_call_per_request(
+    mock_session_cls: MagicMock,
+    mock_client_session_factory: Callable[[int], MagicMock],
+    test_url: str,
+) -> None:
+    """Test that the pool issues exactly n_request HTTP requests."""
+    mock_session = mock_client_session_factory(200)
+    mock_session_cls.return_value = mock_session
+
+    n_request = 25
+    stats = asyncio.run(load_tester(test_url, n_request, 8))
+    assert_values(
+        mock_session.request.call_count, n_request, "Unexpected request count",
+    )
+    assert_values(stats["total_requests"], n_request, "Unexpected total")
+
+
+def test_request_counter_deadline() -> None:
+    """Test that the counter stops handing out tickets at the deadline."""
+    counter = RequestCounter(None, deadline=time.perf_counter() - 1)
+    assert_values(counter.take(), None, "Ticket handed out after deadline")
+
+    counter = RequestCounter(None, deadline=time.perf_counter() + 60)
+    assert_values(counter.take(), 0, "No ticket handed out before deadline")
+
+
+@pytest.mark.parametrize(
+    ("request_time", "grace_period", "expected_cancelled"),
+    [(0.01, 1.0, 0), (10.0, 0.05, 4)],
+)
+def test_load_tester_duration_drain(
+    request_time: float,
+    grace_period: float,
+    expected_cancelled: int,
+    test_url: str,
+) -> None:
+    """Test that in-flight requests drain or are cancelled after the deadline."""
+    async def fake_read_url(**_kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        await asyncio.sleep(request_time)
+        return {
+            "status": 200,
+            "ttfb": request_time,
+            "ttlb": request_time,
+            "request_time": request_time,
+        }
+
+    duration = 0.1
+    with (
+        patch("ccload.core.load_tester_features.aiohttp.ClientSession"),
+        patch("ccload.core.load_tester_features.read_url", fake_read_url),
+    ):
+        stats = asyncio.run(load_tester(
+            test_url, None, 4, duration=duration, grace_period=grace_period,
+        ))
+
+    assert_values(
+        stats["cancelled_requests"], expected_cancelled, "Unexpected cancellations",
+    )
+    if stats["elapsed_time"] > duration + grace_period + 0.5:
+        raise AssertionError
+    expected_rps = stats["successful_requests"] / stats["elapsed_time"]
+    if stats["requests_per_second"] != pytest.approx(expected_rps):
+        raise AssertionError
+
+
+def test_worker_pool_counts_only_requests_in_flight() -> None:
+    """Test that idle workers cancelled at the deadline are not counted."""
+    state = {"in_flight": 0}
+
+    async def run() -> int:
+        idle = asyncio.Event()
+        workers = iter([True, False, False, False])
+
+        async def worker() -> None:
+            if next(workers):
+                state["in_flight"] += 1
+                await asyncio.sleep(10)
+            await idle.wait()
+
+        return await run_worker_pool(
+            4, worker, time.perf_counter() + 0.05, 0.05,
+            lambda: state["in_flight"],
+        )
+
+    assert_values(asyncio.run(run()), 1, "Unexpected cancellations")
@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Any, TypeVar
 from unittest.mock import MagicMock, patch
 
+from ccload.core.load_tester_features import create_session
 from ccload.script.request_script import (
     RequestScript,
     script_load_tester,
@@ -64,3 +65,55 @@ def test_script_load_tester(
 
     keys = stats.keys()
     assert_values(len(keys), 2, "Unexpected number of results")
+
+
+def test_script_entries_keep_their_own_budget(
+    local_server: str, create_temp_script: Callable[[dict | list[dict]], Path],
+) -> None:
+    """Test that every entry sends its own number of requests and reports them."""
+    script_path = create_temp_script([
+        {"url": f"{local_server}/a", "number": 7, "concurrency": 2},
+        {"url": f"{local_server}/a", "number": 3, "concurrency": 1},
+    ])
+
+    stats = asyncio.run(script_load_tester(str(script_path)))
+
+    assert_values(
+        list(stats), [f"{local_server}/a", f"{local_server}/a #2"],
+        "Unexpected entry names",
+    )
+    assert_values(
+        [result["successful_requests"] for result in stats.values()], [7, 3],
+        "Unexpected requests per entry",
+    )
+
+
+def test_script_phases(
+    local_server: str, create_temp_script: Callable[[dict | list[dict]], Path],
+) -> None:
+    """Test that entries of a phase run together, sharing one session per host."""
+    script_path = create_temp_script([
+        {"name": "browse", "url": f"{local_server}/a", "phase": "mixed",
+         "duration": 0.3, "concurrency": 2},
+        {"name": "search", "url": f"{local_server}/b", "phase": "mixed",
+         "duration": 0.3, "concurrency": 3},
+        {"name": "after", "url": f"{local_server}/c", "number": 5},
+    ])
+
+    with patch(
+        "ccload.script.request_script.create_session", wraps=create_session,
+    ) as create:
+        stats = asyncio.run(script_load_tester(str(script_path)))
+
+    browse, search, after = stats["browse"], stats["search"], stats["after"]
+    if abs(browse["started_at"] - search["started_at"]) > 0.1:  # noqa: PLR2004
+        msg = "Entries of a phase did not start together"
+        raise AssertionError(msg)
+    if after["started_at"] < max(browse["finished_at"], search["finished_at"]):
+        msg = "The next phase started before the previous one finished"
+        raise AssertionError(msg)
+    assert_values(after["successful_requests"], 5, "Unexpected requests")
+    assert_values(
+        [call.args for call in create.call_args_list], [(5,), (1,)],
+        "Unexpected sessions",
+    )
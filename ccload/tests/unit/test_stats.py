@@ -66,3 +66,24 @@ def test_calculate_statistics_failures() -> None:
         raise AssertionError
     if stats["failed_requests"] != 2:  # 500 status + exception  # noqa: PLR2004
         raise AssertionError
+
+
+def test_calculate_statistics_percentiles() -> None:
+    """Test that percentiles are reported for successful requests only."""
+    results: list[dict[str, Any] | Exception] = [
+        {"status": 200, "request_time": i / 100, "ttfb": 0.01, "ttlb": 0.02}
+        for i in range(1, 101)
+    ]
+    results.append(
+        {"status": 500, "request_time": 10.0, "ttfb": 10.0, "ttlb": 10.0},
+    )
+    stats = _calculate_statistics(results, 1.0)
+
+    if stats["request_time_p50"] != pytest.approx(0.5, rel=0.01):
+        raise AssertionError
+    if stats["request_time_p99"] != pytest.approx(0.99, rel=0.01):
+        raise AssertionError
+    if stats["request_time_p99_9"] != pytest.approx(1.0, rel=0.01):
+        raise AssertionError
+    if stats["histograms"]["request_time"]["count"] != 100:  # noqa: PLR2004
+        raise AssertionError
@@ -0,0 +1,118 @@
+"""Unit tests for the per-interval time series."""
+import asyncio
+import csv
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ccload.core.histogram import LatencyHistogram
+from ccload.core.load_tester_features import load_tester
+from ccload.core.timeseries import IntervalAggregator, merge_timeseries
+from ccload.exporters.metric_exporter import export_metrics
+from tests.unit.utils import assert_values
+
+OK = {"status": 200, "request_time": 0.01, "ttfb": 0.01, "ttlb": 0.01}
+
+
+def test_aggregator_closes_idle_and_partial_intervals() -> None:
+    """Test that every interval produces a point, idle or partial."""
+    points: list[dict[str, Any]] = []
+
+    async def run() -> IntervalAggregator:
+        aggregator = IntervalAggregator(0.05, listeners=[points.append])
+        aggregator.start()
+        for _ in range(3):
+            aggregator.record(OK)
+        aggregator.record(RuntimeError("boom"))
+        await asyncio.sleep(0.12)
+        aggregator.record(OK)
+        await asyncio.sleep(0.01)
+        await aggregator.stop()
+        return aggregator
+
+    aggregator = asyncio.run(run())
+    assert_values(list(aggregator.points), points, "Listeners missed points")
+    assert_values(
+        [point["total_requests"] for point in points], [4, 0, 1],
+        "Unexpected per-interval totals",
+    )
+    assert_values(points[0]["failed_requests"], 1, "Unexpected failures")
+    if points[0]["requests_per_second"] != pytest.approx(3 / 0.05):
+        raise AssertionError
+    if not 0 < points[-1]["duration"] < 0.05:  # noqa: PLR2004
+        raise AssertionError
+
+
+def test_aggregator_ring_buffer_is_bounded() -> None:
+    """Test that only the most recent points are kept."""
+    async def run() -> IntervalAggregator:
+        aggregator = IntervalAggregator(0.01, capacity=3)
+        aggregator.start()
+        await asyncio.sleep(0.1)
+        await aggregator.stop()
+        return aggregator
+
+    aggregator = asyncio.run(run())
+    assert_values(len(aggregator.points), 3, "Ring buffer not bounded")
+    if aggregator.points[0]["offset"] == 0:
+        raise AssertionError
+
+
+def _point(offset: float, request_times: list[float]) -> dict[str, Any]:
+    """Build the point of an interval in which every request succeeded."""
+    histogram = LatencyHistogram()
+    for request_time in request_times:
+        histogram.record(request_time)
+    return {
+        "offset": offset, "duration": 1.0, "total_requests": len(request_times),
+        "successful_requests": len(request_times), "failed_requests": 0,
+        "requests_per_second": len(request_times),
+        "histogram": histogram.to_dict(),
+    }
+
+
+def test_merge_timeseries() -> None:
+    """Test that points are aligned on their offset and merged exactly."""
+    fast = [0.1] * 90
+    slow = [0.5] * 10
+    merged = merge_timeseries([
+        [_point(0, fast), _point(1, fast)],
+        [_point(0, slow)],
+    ])
+    single = merge_timeseries([[_point(0, fast + slow)]])
+
+    assert_values([p["offset"] for p in merged], [0, 1], "Unexpected offsets")
+    assert_values(merged[0]["successful_requests"], 100, "Unexpected count")
+    for key in ("request_time_p50", "request_time_p90", "request_time_p99"):
+        assert_values(merged[0][key], single[0][key], f"Unexpected {key}")
+    # The p90 of the merged interval is fast, not the slow run's p90.
+    if merged[0]["request_time_p90"] > 0.2:  # noqa: PLR2004
+        raise AssertionError
+    if merged[0]["request_time_mean"] != pytest.approx(0.14, rel=1e-2):
+        raise AssertionError
+
+
+def test_load_tester_timeseries(local_server: str, tmp_path: Path) -> None:
+    """Test that the time series covers the run and is exported."""
+    points: list[dict[str, Any]] = []
+    stats = asyncio.run(
+        load_tester(local_server, 20, 2, on_interval=points.append),
+    )
+
+    assert_values(stats["timeseries"], points, "Unexpected time series")
+    assert_values(
+        sum(point["total_requests"] for point in points), 20,
+        "Requests missing from the time series",
+    )
+
+    export_metrics(stats, "csv", str(tmp_path / "out.csv"))
+    with (tmp_path / "out.timeseries.csv").open() as f:
+        rows = list(csv.DictReader(f))
+    assert_values(len(rows), len(points), "Unexpected time series rows")
+    export_metrics(stats, "json", str(tmp_path / "out.json"))
+    exported = json.loads((tmp_path / "out.json").read_text())
+    assert_values(
+        len(exported["metrics"]["timeseries"]), len(points), "Missing in JSON",
+    )
@@ -0,0 +1,70 @@
+"""Unit tests for the per-phase request timings."""
+import asyncio
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.statistics import StatsRecorder, merge_statistics
+from ccload.core.tracing import request_phases
+from tests.unit.utils import assert_values
+
+
+def test_request_phases() -> None:
+    """Test that the marks are split into contiguous phases."""
+    marks = {
+        "queued_start": 1.0, "queued_end": 1.5,
+        "connect_start": 1.5, "dns_start": 1.5, "dns_end": 1.75,
+        "connect_end": 2.5, "sent": 2.75,
+    }
+    phases = request_phases(marks, 1.0, 4.0)
+    assert_values(
+        phases,
+        {
+            "queue_wait": 0.5, "dns": 0.25, "connect": 0.75,
+            "request_sent": 0.25, "server_time": 1.25,
+        },
+        "Unexpected phases",
+    )
+    assert_values(
+        request_phases({"sent": 1.25}, 1.0, 2.0),
+        {"request_sent": 0.25, "server_time": 0.75},
+        "Unexpected phases on a reused connection",
+    )
+
+
+@pytest.mark.parametrize("engine", ["aiohttp", "raw"])
+def test_load_tester_reports_phases(local_server: str, engine: str) -> None:
+    """Test that both engines report connect and server phases."""
+    n_request, n_concurrency = 40, 4
+    stats = asyncio.run(
+        load_tester(local_server, n_request, n_concurrency, engine=engine),
+    )
+    assert_values(stats["server_time_count"], n_request, "Unexpected server count")
+    assert_values(stats["request_sent_count"], n_request, "Unexpected sent count")
+    # Connections are reused, so only a few requests pay for the connect.
+    if not 1 <= stats["connect_count"] <= n_concurrency:
+        raise AssertionError
+    if "tls_count" in stats or "server_time" not in stats["histograms"]:
+        raise AssertionError
+    if stats["server_time_p50"] > stats["ttfb_p50"]:
+        raise AssertionError
+
+
+def test_phases_survive_merge() -> None:
+    """Test that phase histograms are merged across runs."""
+    recorder = StatsRecorder()
+    recorder.record({
+        "status": 200, "ttfb": 0.2, "ttlb": 0.3, "request_time": 0.3,
+        "connect": 0.05, "server_time": 0.1,
+    })
+    recorder.record({
+        "status": 200, "ttfb": 0.1, "ttlb": 0.2, "request_time": 0.2,
+        "server_time": 0.09,
+    })
+    stats = recorder.summary(1.0)
+    stats.update(started_at=0.0, finished_at=1.0)
+    merged = merge_statistics([stats, stats])
+    assert_values(merged["server_time_count"], 4, "Unexpected server count")
+    assert_values(merged["connect_count"], 2, "Unexpected connect count")
+    if "dns_count" in merged:
+        raise AssertionError
@@ -0,0 +1,94 @@
+"""Unit tests for weighted URL mixes."""
+import asyncio
+from collections import Counter
+
+import pytest
+
+from ccload.core.load_tester_features import load_tester
+from ccload.core.statistics import merge_statistics
+from ccload.core.url_mix import AliasSampler, UrlMix
+from tests.unit.utils import assert_values
+
+
+def test_alias_sampler_follows_weights() -> None:
+    """Test that indices are drawn in proportion to their weights."""
+    weights = [1, 2, 3, 4, 0.5]
+    sampler = AliasSampler(weights, seed=1)
+    draws = 200_000
+    counts = Counter(sampler.sample() for _ in range(draws))
+
+    total = sum(weights)
+    for index, weight in enumerate(weights):
+        expected = draws * weight / total
+        if abs(counts[index] - expected) > 0.05 * expected:
+            msg = f"Index {index} drawn {counts[index]} times, expected {expected}"
+            raise AssertionError(msg)
+
+
+def test_alias_sampler_rejects_invalid_weights() -> None:
+    """Test that empty and non-positive weights are rejected."""
+    for weights in ([], [1, 0], [2, -1]):
+        with pytest.raises(ValueError):  # noqa: PT011
+            AliasSampler(weights)
+
+
+def test_url_mix_parse() -> None:
+    """Test parsing URL lists with optional weights, comments and blanks."""
+    mix = UrlMix.parse([
+        "# API surface\n",
+        "http://example.com/a 3\n",
+        "\n",
+        "http://example.com/b\n",
+        "http://example.com/c 0.5\n",
+    ])
+
+    assert_values(
+        mix.urls,
+        ["http://example.com/a", "http://example.com/b", "http://example.com/c"],
+        "Unexpected URLs",
+    )
+    assert_values(mix.weights, [3.0, 1.0, 0.5], "Unexpected weights")
+
+
+@pytest.mark.parametrize(
+    "lines", [[], ["http://example.com x"], ["http://example.com 1 2"],
+              ["http://example.com 0"]],
+)
+def test_url_mix_parse_rejects_invalid_lists(lines: list[str]) -> None:
+    """Test that empty lists and malformed lines are rejected."""
+    with pytest.raises(ValueError):  # noqa: PT011
+        UrlMix.parse(lines)
+
+
+def test_load_tester_sends_url_mix(local_server: str) -> None:
+    """Test that a mix spreads requests over its URLs and breaks them down."""
+    mix = UrlMix([f"{local_server}/a", f"{local_server}/b"], [3, 1])
+
+    stats = asyncio.run(load_tester(mix, 400, 8))
+
+    assert_values(stats["successful_requests"], 400, "Unexpected requests")
+    urls = stats["urls"]
+    assert_values(
+        [entry["url"] for entry in urls], mix.urls, "Unexpected URL breakdown",
+    )
+    assert_values(
+        sum(entry["successful_requests"] for entry in urls), 400,
+        "Per-URL requests do not add up",
+    )
+    if not 240 < urls[0]["successful_requests"] < 360:  # noqa: PLR2004
+        msg = f"Weighted URL got {urls[0]['successful_requests']} requests"
+        raise AssertionError(msg)
+
+    merged = merge_statistics([stats, stats])
+    assert_values(
+        [entry["successful_requests"] for entry in merged["urls"]],
+        [2 * entry["successful_requests"] for entry in urls],
+        "Unexpected merged URL breakdown",
+    )
+
+
+def test_load_tester_rejects_url_mix_on_raw_engine() -> None:
+    """Test that only the aiohttp engine accepts a URL mix."""
+    mix = UrlMix(["http://127.0.0.1/a", "http://127.0.0.1/b"])
+    with pytest.raises(ValueError, match="URL mix"):
+        asyncio.run(load_tester(mix, 1, 1, engine="raw"))
@@ -0,0 +1,123 @@
+"""Unit tests for the local worker manager."""
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ccload.distributed import worker_manager
+from ccload.distributed.worker_manager import (
+    WorkerPool,
+    free_ports,
+    wait_until_ready,
+    workers_down,
+)
+from tests.unit.utils import assert_values
+
+# Stand-in worker answering its health endpoint once it is listening.
+HEALTH_SERVER = """
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+HTTPServer(("127.0.0.1", int(sys.argv[1])), Handler).serve_forever()
+"""
+
+
+def test_free_ports_are_distinct() -> None:
+    """Test that the free ports handed out are all different."""
+    ports = free_ports(5)
+    assert_values(len(set(ports)), 5, "Duplicate ports")
+
+
+def test_wait_until_ready(local_server: str) -> None:
+    """Test that a worker answering its health endpoint is ready at once."""
+    async def run() -> None:
+        async with asyncio.timeout(5):
+            await wait_until_ready([local_server])
+
+    asyncio.run(run())
+
+
+def test_worker_pool_lifecycle(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a pool is ready on free ports, recorded, reused and stopped."""
+    script = tmp_path / "health_server.py"
+    script.write_text(HEALTH_SERVER)
+    monkeypatch.setattr(
+        worker_manager, "worker_command",
+        lambda port, _loop: [sys.executable, str(script), str(port)],
+    )
+    state = tmp_path / "workers.json"
+
+    pool = asyncio.run(worker_manager.workers_up(2, path=state))
+    try:
+        assert_values(len(set(pool.urls)), 2, "Workers share a port")
+        loaded = WorkerPool.load(state)
+        if loaded is None or not loaded.alive:
+            raise AssertionError
+        assert_values(loaded.urls, pool.urls, "Unexpected recorded workers")
+    finally:
+        workers_down(state)
+    for process in pool.processes:
+        process.wait(timeout=5)
+    if pool.alive or state.exists():
+        raise AssertionError
+
+
+def test_worker_pool_not_ready(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that workers never answering their health endpoint are stopped."""
+    monkeypatch.setattr(worker_manager, "READY_TIMEOUT", 0.3)
+    monkeypatch.setattr(
+        worker_manager, "worker_command",
+        lambda _port, _loop: [sys.executable, "-c", "import time; time.sleep(30)"],
+    )
+    with pytest.raises(RuntimeError, match="not ready"):
+        asyncio.run(WorkerPool.start(1))
+    assert_values(workers_down(tmp_path / "none.json"), None, "Unexpected pool")
+
+
+def test_stale_pool_is_not_signalled(tmp_path: Path) -> None:
+    """Test that a recorded process id now used by another process is left alone."""
+    state = tmp_path / "workers.json"
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        WorkerPool(
+            ["http://127.0.0.1:9"], [process.pid], started=["not its start time"],
+        ).save(state)
+        pool = WorkerPool.load(state)
+        if pool is None or pool.alive:
+            raise AssertionError
+        workers_down(state)
+        if process.poll() is not None:
+            raise AssertionError
+        # The same process, recorded with its own start time, is the worker.
+        if not WorkerPool(["http://127.0.0.1:9"], [process.pid]).alive:
+            raise AssertionError
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_unhealthy_pool(
+    local_server: str, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a warm pool is only trusted once its workers answer."""
+    monkeypatch.setattr(worker_manager, "HEALTH_TIMEOUT", 0.2)
+    pool = WorkerPool([local_server], [])
+    if not asyncio.run(pool.healthy()):
+        raise AssertionError
+    port = free_ports(1)[0]
+    if asyncio.run(WorkerPool([f"http://127.0.0.1:{port}"], []).healthy()):
+        raise AssertionError
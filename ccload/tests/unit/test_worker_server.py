@@ -0,0 +1,127 @@
+"""Unit tests for the FastAPI worker server, served as deployed."""
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Any
+
+import aiohttp
+import pytest
+
+from ccload.distributed.distributed_load_test import run_distributed_load_test
+from ccload.distributed.streaming import iter_ndjson
+from tests.unit.utils import assert_values
+
+
+async def _request(
+    method: str, url: str, payload: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    async with (
+        aiohttp.ClientSession() as session,
+        session.request(method, url, json=payload) as response,
+    ):
+        response.raise_for_status()
+        return await response.json()
+
+
+def test_health_and_clock(fastapi_worker_factory: Callable[[], str]) -> None:
+    """Test that the worker answers its health and clock endpoints."""
+    worker = fastapi_worker_factory()
+    assert_values(
+        asyncio.run(_request("GET", f"{worker}/health")), {"status": "ok"},
+        "Unexpected health answer",
+    )
+    clock = asyncio.run(_request("GET", f"{worker}/clock"))
+    if clock["time"] != pytest.approx(time.time(), abs=5):
+        raise AssertionError
+
+
+def test_run_test(local_server: str, fastapi_worker_factory: Callable[[], str]) -> None:
+    """Test that the worker runs a test and answers its statistics."""
+    stats = asyncio.run(_request(
+        "POST", f"{fastapi_worker_factory()}/run-test",
+        {"url": local_server, "n_request": 5, "n_concurrency": 2},
+    ))
+    assert_values(stats["successful_requests"], 5, "Unexpected successes")
+
+
+def test_control_endpoints_unknown_test(
+    fastapi_worker_factory: Callable[[], str],
+) -> None:
+    """Test that starting or leasing a test that is not running is refused."""
+    worker = fastapi_worker_factory()
+    assert_values(
+        asyncio.run(_request(
+            "POST", f"{worker}/start", {"test_id": "missing", "start_at": 0},
+        )),
+        {"started": False},
+        "Unknown test started",
+    )
+    assert_values(
+        asyncio.run(_request(
+            "POST", f"{worker}/lease", {"test_id": "missing", "n_request": 1},
+        )),
+        {"granted": False},
+        "Unknown test granted a lease",
+    )
+
+
+def test_distributed_run_on_worker_app(
+    local_server: str, fastapi_worker_factory: Callable[[], str],
+) -> None:
+    """Test a leased, two-phase distributed run streamed by the worker app."""
+    workers = [fastapi_worker_factory(), fastapi_worker_factory()]
+    points: list[dict[str, Any]] = []
+
+    stats = asyncio.run(run_distributed_load_test(
+        local_server, n_request=40, n_concurrency=2, workers=workers,
+        on_interval=points.append,
+    ))
+
+    assert_values(stats["total_requests"], 40, "Unexpected merged total")
+    assert_values(
+        sorted(worker["worker"] for worker in stats["workers"]), sorted(workers),
+        "Unexpected per-worker breakdown",
+    )
+    first, second = stats["workers"]
+    if first["started_at"] != pytest.approx(second["started_at"], abs=0.01):
+        raise AssertionError
+    assert_values(
+        sum(point["total_requests"] for point in points), 40,
+        "Live intervals do not cover every request",
+    )
+
+
+def test_prepared_stream_heartbeats_and_start(
+    local_server: str, fastapi_worker_factory: Callable[[], str],
+) -> None:
+    """Test that a prepared test sends heartbeats until it is started."""
+    worker = fastapi_worker_factory()
+
+    async def run() -> list[str]:
+        payload = {
+            "url": local_server, "n_request": 3, "n_concurrency": 1,
+            "test_id": "prepared",
+        }
+        kinds = []
+        async with (
+            aiohttp.ClientSession() as session,
+            session.post(f"{worker}/run-test/stream", json=payload) as response,
+        ):
+            async for message in iter_ndjson(response.content.iter_any()):
+                kinds.append(message["type"])
+                if message["type"] == "heartbeat" and kinds.count("heartbeat") == 1:
+                    started = await _request(
+                        "POST", f"{worker}/start",
+                        {"test_id": "prepared", "start_at": time.time()},
+                    )
+                    assert_values(started, {"started": True}, "Test not started")
+                if message["type"] == "result":
+                    assert_values(
+                        message["statistics"]["total_requests"], 3,
+                        "Unexpected total",
+                    )
+        return kinds
+
+    kinds = asyncio.run(run())
+    assert_values(kinds[:2], ["prepared", "heartbeat"], "Unexpected messages")
+    assert_values(kinds[-1], "result", "Missing result")